@@ -1,16 +1,39 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, validator
 from typing import List, Dict, Any, Optional
-import joblib
 import numpy as np
+import os
 import sqlite3
 import json
+import asyncio
 import datetime
+import hmac
+import tempfile
+import time
+from functools import partial
 from pathlib import Path
 
+import config
+from batching import MicroBatcher
+from bulk_import import BulkImportError, MachineCheck, import_summary, open_chunks, write_chunk
+from events import EventBroker, format_sse
+from executors import BoundedExecutor, ExecutorOverloaded
+from feature_engine import FeatureEngine
+from history_store import ColumnarHistory, open_history
+from inference import bulk_score, get_visualization_properties, load_models, model_registry, score_timed
+from ingest import IngestSession, IngestStoreError
+from metrics import Metrics, RequestMetricsMiddleware, request_started
+from migrations import migrate
+from prediction_cache import PredictionCache, parse_quanta
+from profiler import SlowRequestProfiler
+from registry import MachineRegistry
+from retention import SENSOR_COLUMNS, run_retention
+from storage import ConnectionPool, insert_returning_ids
+from write_behind import WriteBehindBuffer
+
 # Initialize FastAPI app
 app = FastAPI(title="Digital Twin Inventory Management System")
 
@@ -23,18 +46,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Stage timing histograms and request counters, exposed at /metrics
+metrics = Metrics(enabled=config.METRICS_ENABLED)
+
+# Opt-in flame-graph dumps for requests slower than PROFILE_SLOW_MS
+profiler = SlowRequestProfiler(
+    config.PROFILE_DIR,
+    threshold=config.PROFILE_SLOW_MS / 1000,
+    interval=config.PROFILE_INTERVAL_MS / 1000,
+    cooldown=config.PROFILE_COOLDOWN_SECONDS,
+) if config.PROFILE_SLOW_MS > 0 else None
+
+app.add_middleware(
+    RequestMetricsMiddleware,
+    metrics=metrics,
+    on_complete=profiler.request_finished if profiler is not None else None,
+)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Database connection
-def get_db():
-    conn = sqlite3.connect('inventory.db', check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Database connection pool, opened on startup and closed on shutdown
+db = ConnectionPool(config.DB_PATH, size=config.DB_POOL_SIZE)
+
+# Sensor reading history: sensor_readings rows or per-day column chunks (history_store.py)
+history = open_history(config.HISTORY_BACKEND, db, config.HISTORY_DIR, config.HISTORY_CACHE_MB * 1024 * 1024)
+
+# Worker pools so blocking SQLite I/O and model inference never run on the event loop
+db_executor = BoundedExecutor('db', config.DB_WORKERS, config.DB_MAX_QUEUE)
+inference_executor = BoundedExecutor(
+    'inference', config.INFERENCE_WORKERS, config.INFERENCE_MAX_QUEUE,
+    kind=config.INFERENCE_EXECUTOR,
+    # Process workers need their own copy of the models
+    initializer=load_models if config.INFERENCE_EXECUTOR == 'process' else None,
+)
+
+async def score_batch(machine_type: str, features: np.ndarray):
+    # Model stages are timed inside the worker, which may be another process
+    result, timings = await inference_executor.submit(score_timed, machine_type, features)
+    metrics.observe_stages(machine_type, timings)
+    return result
+
+# Coalesces concurrent single-reading predictions into stacked model calls
+batcher = MicroBatcher(
+    score_batch,
+    max_batch_size=config.MICROBATCH_MAX_SIZE,
+    max_wait=config.MICROBATCH_MAX_WAIT_MS / 1000,
+)
+
+async def write_predictions(readings, predictions, machine_type):
+    await db_executor.submit(store_predictions, readings, predictions, machine_type)
+
+# Shares one transaction between the prediction rows of concurrent requests
+write_buffer = WriteBehindBuffer(
+    write_predictions,
+    max_rows=config.WRITE_BEHIND_MAX_ROWS,
+    max_delay=config.WRITE_BEHIND_MAX_DELAY_MS / 1000,
+    max_pending=config.WRITE_BEHIND_MAX_PENDING,
+    durability=config.WRITE_BEHIND_MODE,
+) if config.WRITE_BEHIND_MODE != 'off' else None
+
+# Cached machine metadata so predictions skip the per-request type lookup
+registry = MachineRegistry(max_size=config.REGISTRY_MAX_SIZE)
+
+# Health updates pushed to dashboards over /events
+broker = EventBroker(max_queue=config.EVENTS_MAX_QUEUE)
 
 # Database initialization - NO NEED FOR MANUAL SQLITE COMMAND!
 def init_db():
-    conn = get_db()
+    with db.connection() as conn:
+        create_tables(conn)
+        migrate(conn)
+
+def create_tables(conn: sqlite3.Connection):
     cursor = conn.cursor()
     
     # Read and execute the schema.sql file
@@ -135,28 +219,6 @@ def init_db():
         except Exception as e:
             print(f"❌ Error creating tables: {e}")
 
-# Load ML models
-motor_models = {}
-blade_models = {}
-
-def load_models():
-    try:
-        # Motor models
-        motor_models['classifier'] = joblib.load('saved_models/motor_gradient_boosting_classifier.pkl')
-        motor_models['regressor'] = joblib.load('saved_models/motor_gradient_boosting_regressor.pkl')
-        motor_models['scaler'] = joblib.load('saved_models/motor_scaler.pkl')
-        motor_models['encoder'] = joblib.load('saved_models/motor_label_encoder.pkl')
-        
-        # Blade models
-        blade_models['classifier'] = joblib.load('saved_models/blade_gradient_boosting_classifier.pkl')
-        blade_models['regressor'] = joblib.load('saved_models/blade_gradient_boosting_regressor.pkl')
-        blade_models['scaler'] = joblib.load('saved_models/blade_scaler.pkl')
-        blade_models['encoder'] = joblib.load('saved_models/blade_label_encoder.pkl')
-        
-        print("✅ All models loaded successfully!")
-    except Exception as e:
-        print(f"❌ Error loading models: {e}")
-
 # Pydantic models
 class MachineBase(BaseModel):
     machine_id: str
@@ -215,23 +277,217 @@ class PredictionResponse(BaseModel):
     color_code: str
     maintenance_required: bool
 
+# Long-running tasks started on startup and cancelled on shutdown
+background_tasks = set()
+
+def apply_retention():
+    # The columnar store keeps raw readings instead of rollups; only predictions are pruned in SQLite
+    columnar = isinstance(history, ColumnarHistory)
+    with db.connection() as conn:
+        result = run_retention(
+            conn, config.RETENTION_RAW_DAYS, config.RETENTION_RESOLUTION, config.RETENTION_PREDICTION_DAYS,
+            rollup=not columnar,
+        )
+    if columnar:
+        # Seal finished days and drop those past HISTORY_RETENTION_DAYS
+        result["history"] = history.compact(config.HISTORY_RETENTION_DAYS)
+    return result
+
+async def retention_loop():
+    """Periodically roll up and prune old sensor readings, starting one interval after startup"""
+    while True:
+        await asyncio.sleep(config.RETENTION_INTERVAL_MINUTES * 60)
+        try:
+            result = await db_executor.submit(apply_retention)
+            if "history" in result:
+                print(f"✅ History: sealed {result['history']['sealed_chunks']} day chunks, "
+                      f"deleted {result['history']['deleted_chunks']}")
+            elif result['cutoff'] is not None:
+                print(f"✅ Retention: rolled up {result['readings_rolled_up']} readings older than {result['cutoff']}")
+            if result['predictions_pruned']:
+                print(f"✅ Retention: pruned {result['predictions_pruned']} predictions")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Retention job failed: {e}")
+
+# Serializes reloads, rollbacks and the watcher so only one swap runs at a time
+model_swap_lock = asyncio.Lock()
+
+async def apply_model_swap(previous, current):
+    """Bring caches and worker processes in line with a newly active model set"""
+    if config.INFERENCE_EXECUTOR == 'process':
+        # Workers hold their own copy; start a pool whose workers load and warm the
+        # new version as they start, and let jobs already running on the old pool finish there
+        await inference_executor.restart(
+            initializer=partial(load_models, current.version, tuple(current.models)),
+        )
+    if prediction_cache is not None:
+        for machine_type, fingerprint in current.fingerprints.items():
+            if previous is None or previous.fingerprints.get(machine_type) != fingerprint:
+                prediction_cache.invalidate(machine_type)
+    print(f"✅ Model version {current.version} active (was {previous.version if previous else None})")
+
+async def activate_model_version(version: str = None):
+    async with model_swap_lock:
+        # Loading and warming happen on a worker thread; only the swap touches the live set.
+        # Types already serving traffic are preloaded so they don't go cold after the swap.
+        active = model_registry.active
+        preload = sorted(active.models) if active is not None else ()
+        model_set = await asyncio.to_thread(model_registry.load, version, preload)
+        previous = model_registry.swap(model_set, pin=version is not None)
+        await apply_model_swap(previous, model_set)
+        return model_set
+
+async def rollback_model_version():
+    async with model_swap_lock:
+        previous, current = model_registry.rollback()
+        await apply_model_swap(previous, current)
+        return current
+
+async def model_watch_loop():
+    """Hot-swap the newest bundle in MODEL_DIR unless an admin pinned a version"""
+    while True:
+        await asyncio.sleep(config.MODEL_WATCH_SECONDS)
+        try:
+            latest = await asyncio.to_thread(model_registry.latest_version)
+            active = model_registry.active
+            if latest and not model_registry.pinned and (active is None or latest != active.version):
+                await activate_model_version()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Model reload failed: {e}")
+
+def warm_registry():
+    for entry in fetch_machine_entries(limit=registry.max_size):
+        registry.put(entry)
+    print(f"✅ Machine registry loaded ({len(registry)} machines)")
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
+    db.open()
     init_db()  # This will create the database automatically
-    load_models()
+    if model_registry.active is None:
+        # Workers forked by serve.py inherit the master's models
+        load_models()
+    if prediction_cache is not None:
+        # Cached predictions belong to the previous models
+        prediction_cache.invalidate()
+    warm_registry()
+    db_executor.start()
+    inference_executor.start()
+    if write_buffer is not None:
+        write_buffer.start()
+    if profiler is not None:
+        profiler.start()
 
-# Routes
-@app.get("/", response_class=HTMLResponse)
-async def read_root():
-    return FileResponse("static/index.html")
+    if config.RETENTION_ENABLED:
+        background_tasks.add(asyncio.create_task(retention_loop()))
+    if config.MODEL_WATCH_SECONDS > 0:
+        background_tasks.add(asyncio.create_task(model_watch_loop()))
 
-@app.post("/machines/", response_model=Dict[str, Any])
-async def create_machine(machine: MachineCreate):
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    try:
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    if write_buffer is not None:
+        # Drain buffered rows while the DB executor is still running
+        await write_buffer.close()
+        print(f"✅ Write-behind buffer drained ({write_buffer.written_rows} rows written)")
+    inference_executor.shutdown()
+    db_executor.shutdown()
+    db.close()
+    if profiler is not None:
+        profiler.stop()
+
+@app.exception_handler(ExecutorOverloaded)
+async def executor_overloaded_handler(request, exc: ExecutorOverloaded):
+    # Back-pressure: tell clients to retry instead of queueing without bound
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+# Feature columns expected by each model, in training order
+MOTOR_FEATURES = [
+    'current_phase_a', 'current_phase_b', 'current_phase_c',
+    'power_consumption', 'power_factor', 'vibration', 'temperature', 'speed'
+]
+BLADE_FEATURES = ['vibration', 'torque', 'speed', 'noise', 'temperature']
+
+# Optional memoization of repeated (quantized) feature vectors
+prediction_cache = PredictionCache(
+    {'motor': MOTOR_FEATURES, 'blade': BLADE_FEATURES},
+    quantum=config.PREDICTION_CACHE_QUANTUM,
+    quanta=parse_quanta(config.PREDICTION_CACHE_QUANTA),
+    max_size=config.PREDICTION_CACHE_MAX_SIZE,
+    ttl=config.PREDICTION_CACHE_TTL_SECONDS,
+) if config.PREDICTION_CACHE_ENABLED else None
+
+# Rolling per-machine features maintained from every scored reading
+feature_engine = FeatureEngine(
+    {'motor': MOTOR_FEATURES, 'blade': BLADE_FEATURES},
+    window=config.FEATURES_WINDOW,
+    alpha=config.FEATURES_EWMA_ALPHA,
+    max_machines=config.FEATURES_MAX_MACHINES,
+    smoothing=config.FEATURES_SMOOTHING,
+) if config.FEATURES_ENABLED else None
+
+INSERT_PREDICTION_SQL = """INSERT INTO predictions 
+            (machine_id, health_status, rul_hours, confidence, maintenance_required) 
+            VALUES (?, ?, ?, ?, ?)"""
+
+# Machines with their type-specific details
+MACHINE_ENTRY_SQL = """SELECT m.*,
+            md.max_current_phase_a AS motor_max_current_phase_a, md.max_current_phase_b AS motor_max_current_phase_b,
+            md.max_current_phase_c AS motor_max_current_phase_c, md.max_power_consumption AS motor_max_power_consumption,
+            md.max_temperature AS motor_max_temperature, md.max_vibration AS motor_max_vibration,
+            md.nominal_speed AS motor_nominal_speed,
+            bd.max_vibration AS blade_max_vibration, bd.max_torque AS blade_max_torque, bd.max_speed AS blade_max_speed,
+            bd.max_noise AS blade_max_noise, bd.max_temperature AS blade_max_temperature,
+            bd.material AS blade_material, bd.length AS blade_length, bd.width AS blade_width
+        FROM machines m
+        LEFT JOIN motor_details md ON md.machine_id = m.machine_id AND m.type = 'motor'
+        LEFT JOIN blade_details bd ON bd.machine_id = m.machine_id AND m.type = 'blade'"""
+
+# Machine with its type-specific details and latest prediction, in one query
+MACHINE_DETAIL_SQL = """SELECT m.*,
+            md.max_current_phase_a AS motor_max_current_phase_a, md.max_current_phase_b AS motor_max_current_phase_b,
+            md.max_current_phase_c AS motor_max_current_phase_c, md.max_power_consumption AS motor_max_power_consumption,
+            md.max_temperature AS motor_max_temperature, md.max_vibration AS motor_max_vibration,
+            md.nominal_speed AS motor_nominal_speed,
+            bd.max_vibration AS blade_max_vibration, bd.max_torque AS blade_max_torque, bd.max_speed AS blade_max_speed,
+            bd.max_noise AS blade_max_noise, bd.max_temperature AS blade_max_temperature,
+            bd.material AS blade_material, bd.length AS blade_length, bd.width AS blade_width,
+            p.timestamp AS prediction_timestamp, p.health_status AS prediction_health_status,
+            p.rul_hours AS prediction_rul_hours, p.confidence AS prediction_confidence,
+            p.maintenance_required AS prediction_maintenance_required
+        FROM machines m
+        LEFT JOIN motor_details md ON md.machine_id = m.machine_id AND m.type = 'motor'
+        LEFT JOIN blade_details bd ON bd.machine_id = m.machine_id AND m.type = 'blade'
+        LEFT JOIN machine_health p ON p.machine_id = m.machine_id
+        WHERE m.machine_id = ?"""
+
+# Every machine with its latest prediction (machine_health is maintained by a
+# trigger on predictions), lowest RUL first; one row per machine
+FLEET_SQL = """SELECT m.machine_id, m.name, m.type, m.location, m.manufacturer, m.status,
+            h.timestamp, h.health_status, h.rul_hours, h.confidence, h.maintenance_required
+        FROM machines m
+        LEFT JOIN machine_health h ON h.machine_id = m.machine_id
+        {where}
+        ORDER BY h.rul_hours IS NULL, h.rul_hours, m.machine_id"""
+
+FLEET_GROUP_COLUMNS = ('location', 'type', 'manufacturer')
+
+HISTORY_PAGE_SIZE = 1000
+
+# Blocking database operations, run on db_executor
+def insert_machine(machine: MachineCreate):
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        
         # Insert into machines table
         cursor.execute(
             "INSERT INTO machines (machine_id, name, type, manufacturer, model, location) VALUES (?, ?, ?, ?, ?, ?)",
@@ -260,143 +516,733 @@ async def create_machine(machine: MachineCreate):
                  machine.blade_details.max_noise, machine.blade_details.max_temperature,
                  machine.blade_details.material, machine.blade_details.length, machine.blade_details.width)
             )
+
+def fetch_machines() -> List[Dict[str, Any]]:
+    with db.connection() as conn:
+        cursor = conn.execute("SELECT * FROM machines ORDER BY installation_date DESC")
+        return [dict(row) for row in cursor.fetchall()]
+
+def store_predictions(readings: List[SensorData], predictions: List[PredictionResponse], machine_type: str = 'mixed'):
+    """Insert predictions and their sensor readings in one transaction"""
+    started = time.perf_counter()
+    with db.transaction() as conn:
+        checked_out = time.perf_counter()
+        prediction_ids = insert_returning_ids(
+            conn, INSERT_PREDICTION_SQL,
+            [
+                (reading.machine_id, prediction.health_status, prediction.rul_hours,
+                 max(prediction.confidence_scores.values()) if prediction.confidence_scores else 0.0,
+                 prediction.maintenance_required)
+                for reading, prediction in zip(readings, predictions)
+            ]
+        )
+        predictions_inserted = time.perf_counter()
+        history.write(
+            conn, [reading.machine_id for reading in readings], None,
+            {column: [getattr(reading, column) for reading in readings] for column in SENSOR_COLUMNS},
+            prediction_ids,
+        )
+        readings_inserted = time.perf_counter()
+    metrics.observe_stages(machine_type, {
+        'db_checkout': checked_out - started,
+        'insert_predictions': predictions_inserted - checked_out,
+        'insert_readings': readings_inserted - predictions_inserted,
+        'commit': time.perf_counter() - readings_inserted,
+    })
+
+def fold_machine_row(row: sqlite3.Row) -> Dict[str, Any]:
+    """Fold the prefixed join columns of a machine row into nested objects"""
+    machine, motor_details, blade_details, latest_prediction = {}, {}, {}, {}
+    for key in row.keys():
+        if key.startswith('motor_'):
+            motor_details[key[len('motor_'):]] = row[key]
+        elif key.startswith('blade_'):
+            blade_details[key[len('blade_'):]] = row[key]
+        elif key.startswith('prediction_'):
+            latest_prediction[key[len('prediction_'):]] = row[key]
+        else:
+            machine[key] = row[key]
+    
+    machine['motor_details'] = motor_details if row['type'] == 'motor' and any(v is not None for v in motor_details.values()) else None
+    machine['blade_details'] = blade_details if row['type'] == 'blade' and any(v is not None for v in blade_details.values()) else None
+    if latest_prediction:
+        if latest_prediction['timestamp'] is not None:
+            latest_prediction['maintenance_required'] = bool(latest_prediction['maintenance_required'])
+            machine['latest_prediction'] = latest_prediction
+        else:
+            machine['latest_prediction'] = None
+    return machine
+
+def fetch_machine_detail(machine_id: str) -> Optional[Dict[str, Any]]:
+    with db.connection() as conn:
+        row = conn.execute(MACHINE_DETAIL_SQL, (machine_id,)).fetchone()
+    return fold_machine_row(row) if row is not None else None
+
+def fetch_machine_entries(machine_ids: Optional[List[str]] = None, limit: int = -1) -> List[Dict[str, Any]]:
+    """Registry entries for the given machines, or for all machines up to limit"""
+    with db.connection() as conn:
+        if machine_ids is None:
+            rows = conn.execute(f"{MACHINE_ENTRY_SQL} ORDER BY m.id LIMIT ?", (limit,)).fetchall()
+        else:
+            placeholders = ", ".join("?" * len(machine_ids))
+            rows = conn.execute(f"{MACHINE_ENTRY_SQL} WHERE m.machine_id IN ({placeholders})", machine_ids).fetchall()
+    return [fold_machine_row(row) for row in rows]
+
+def fetch_fleet_summary(group_by: List[str], lowest: int, maintenance_limit: int,
+                        include_decommissioned: bool) -> Dict[str, Any]:
+    """Status counts, lowest-RUL machines and maintenance lists, overall and per group"""
+    where = "" if include_decommissioned else "WHERE m.status != 'decommissioned'"
+    with db.connection() as conn:
+        rows = conn.execute(FLEET_SQL.format(where=where)).fetchall()
+    
+    def new_summary() -> Dict[str, Any]:
+        return {"machines": 0, "status_counts": {}, "maintenance_required_count": 0,
+                "lowest_rul": [], "maintenance_required": []}
+    
+    fleet = new_summary()
+    groups: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        entry = {
+            "machine_id": row['machine_id'], "name": row['name'], "type": row['type'],
+            "location": row['location'], "health_status": row['health_status'],
+            "rul_hours": row['rul_hours'], "timestamp": row['timestamp'],
+        }
+        key = tuple(row[column] for column in group_by)
+        if key not in groups:
+            groups[key] = {**dict(zip(group_by, key)), **new_summary()}
+        # Rows arrive lowest RUL first, so the first entries of each list are the most urgent
+        for summary in (fleet, groups[key]):
+            summary["machines"] += 1
+            status = row['health_status'] or 'unknown'
+            summary["status_counts"][status] = summary["status_counts"].get(status, 0) + 1
+            if row['rul_hours'] is not None and len(summary["lowest_rul"]) < lowest:
+                summary["lowest_rul"].append(entry)
+            if row['maintenance_required']:
+                summary["maintenance_required_count"] += 1
+                if len(summary["maintenance_required"]) < maintenance_limit:
+                    summary["maintenance_required"].append(entry)
+    
+    fleet["group_by"] = group_by
+    fleet["groups"] = sorted(groups.values(), key=lambda group: [str(group[column]) for column in group_by]) if group_by else []
+    return fleet
+
+# Prediction helpers
+def build_features(machine_type: str, readings: List[SensorData]) -> np.ndarray:
+    """Stack sensor readings into a feature matrix for the given machine type"""
+    columns = MOTOR_FEATURES if machine_type == 'motor' else BLADE_FEATURES
+    return np.array(
+        [[getattr(reading, column) or 0 for column in columns] for reading in readings],
+        dtype=float
+    )
+
+def build_responses(health_statuses, rul_predictions, probabilities, classes) -> List[PredictionResponse]:
+    responses = []
+    for health_status, rul_prediction, row_probabilities in zip(health_statuses, rul_predictions, probabilities):
+        confidence_scores = {str(cls): float(prob) for cls, prob in zip(classes, row_probabilities)}
         
-        conn.commit()
+        # Determine color and maintenance requirement
+        color_code, maintenance_required = get_visualization_properties(health_status, rul_prediction)
+        
+        responses.append(PredictionResponse(
+            health_status=str(health_status),
+            rul_hours=float(rul_prediction),
+            confidence_scores=confidence_scores,
+            color_code=color_code,
+            maintenance_required=maintenance_required
+        ))
+    return responses
+
+async def score_features(machine_type: str, features: np.ndarray):
+    if len(features) == 1 and config.MICROBATCH_ENABLED:
+        # Single readings share a stacked model call with concurrent requests
+        health_status, rul_prediction, row_probabilities, classes = await batcher.submit(machine_type, features)
+        return [health_status], [rul_prediction], [row_probabilities], classes
+    
+    # One pass over each model on the inference pool
+    return await score_batch(machine_type, features)
+
+async def predict_rows(machine_type: str, readings: List[SensorData]) -> List[PredictionResponse]:
+    """Score readings of one machine type with a single call per model"""
+    commit_features = None
+    with metrics.time('features', machine_type):
+        features = build_features(machine_type, readings)
+        if feature_engine is not None:
+            # The windows only take the readings once they have been scored
+            features, commit_features = feature_engine.prepare(
+                machine_type, [reading.machine_id for reading in readings], features
+            )
+    if prediction_cache is None:
+        # 'inference' includes queueing and micro-batch wait; the model stages are timed separately
+        with metrics.time('inference', machine_type):
+            scored = await score_features(machine_type, features)
+        if commit_features is not None:
+            commit_features()
+        with metrics.time('postprocess', machine_type):
+            return build_responses(*scored)
+    
+    # Serve repeated readings from the cache and only score the rest
+    keys = prediction_cache.keys(machine_type, features)
+    results = [prediction_cache.get(machine_type, key) for key in keys]
+    missing = [index for index, result in enumerate(results) if result is None]
+    if missing:
+        generation = prediction_cache.generation(machine_type)
+        with metrics.time('inference', machine_type):
+            health_statuses, rul_predictions, probabilities, classes = await score_features(machine_type, features[missing])
+        for position, index in enumerate(missing):
+            results[index] = (health_statuses[position], rul_predictions[position], probabilities[position], classes)
+            prediction_cache.put(machine_type, keys[index], results[index], generation)
+    if commit_features is not None:
+        commit_features()
+    
+    with metrics.time('postprocess', machine_type):
+        return build_responses(
+            [result[0] for result in results],
+            [result[1] for result in results],
+            [result[2] for result in results],
+            results[0][3],
+        )
+
+async def resolve_machines(machine_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Registry entries for known machines; misses are loaded in one query"""
+    found, missing = registry.lookup(machine_ids)
+    if missing:
+        for entry in await db_executor.submit(fetch_machine_entries, missing):
+            registry.put(entry)
+            found[entry['machine_id']] = entry
+    return found
+
+async def resolve_machine_types(machine_ids: List[str]) -> Dict[str, str]:
+    return {machine_id: entry['type'] for machine_id, entry in (await resolve_machines(machine_ids)).items()}
+
+async def persist_predictions(readings: List[SensorData], predictions: List[PredictionResponse],
+                              machine_type: str = 'mixed'):
+    """Store predictions, then push them to /events subscribers"""
+    with metrics.time('persist', machine_type):
+        if write_buffer is not None:
+            await write_buffer.submit(readings, predictions, machine_type)
+        else:
+            await db_executor.submit(store_predictions, readings, predictions, machine_type)
+    if broker.has_subscribers:
+        await publish_predictions(readings, predictions)
+
+async def publish_predictions(readings: List[SensorData], predictions: List[PredictionResponse]):
+    machines = await resolve_machines(sorted({reading.machine_id for reading in readings}))
+    timestamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    broker.publish([
+        {
+            "machine_id": reading.machine_id,
+            "location": machines[reading.machine_id]['location'] if reading.machine_id in machines else None,
+            "timestamp": timestamp,
+            "health_status": prediction.health_status,
+            "rul_hours": prediction.rul_hours,
+            "color_code": prediction.color_code,
+            "maintenance_required": prediction.maintenance_required,
+        }
+        for reading, prediction in zip(readings, predictions)
+    ])
+
+# Routes
+@app.get("/", response_class=HTMLResponse)
+async def read_root():
+    return FileResponse("static/index.html")
+
+@app.post("/machines/", response_model=Dict[str, Any])
+async def create_machine(machine: MachineCreate):
+    try:
+        await db_executor.submit(insert_machine, machine)
+        # Keep the registry coherent with the new row
+        for entry in await db_executor.submit(fetch_machine_entries, [machine.machine_id]):
+            registry.put(entry)
         return {"message": "Machine added successfully", "machine_id": machine.machine_id}
     
     except sqlite3.IntegrityError:
         raise HTTPException(status_code=400, detail="Machine ID already exists")
+    except ExecutorOverloaded:
+        raise
     except Exception as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error adding machine: {str(e)}")
 
 @app.get("/machines/", response_model=List[Dict[str, Any]])
 async def get_machines():
-    conn = get_db()
-    cursor = conn.cursor()
+    return await db_executor.submit(fetch_machines)
+
+def encode_cursor(entry: Dict[str, Any]) -> str:
+    return f"{entry['timestamp']}|{entry['id']}"
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        timestamp, row_id = cursor.rsplit("|", 1)
+        return timestamp, int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def to_db_timestamp(value: Optional[datetime.datetime]) -> Optional[str]:
+    """Format a filter bound like SQLite's CURRENT_TIMESTAMP (UTC, no offset)"""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+@app.get("/machines/{machine_id}", response_model=Dict[str, Any])
+async def get_machine(machine_id: str):
+    machine = await db_executor.submit(fetch_machine_detail, machine_id)
+    if machine is None:
+        raise HTTPException(status_code=404, detail="Machine not found")
+    return machine
+
+@app.get("/machines/{machine_id}/features", response_model=Dict[str, Any])
+async def get_machine_features(machine_id: str):
+    """Rolling statistics over the machine's recent readings (since server start)"""
+    if feature_engine is None:
+        raise HTTPException(status_code=404, detail="Feature engine is disabled")
+    snapshot = feature_engine.snapshot(machine_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No readings for this machine yet")
+    return snapshot
+
+@app.get("/machines/{machine_id}/history")
+async def get_machine_history(
+    machine_id: str,
+    limit: int = Query(100, ge=1, le=HISTORY_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    stream: bool = False,
+):
+    """Sensor readings with their predictions, newest first.
+
+    Pages are keyset-paginated: pass the X-Next-Cursor header of a response as
+    ``cursor`` to get the next page.  With ``stream=true`` the whole range is
+    streamed as one JSON array, fetched page by page.
+    """
+    machine_types = await resolve_machine_types([machine_id])
+    if machine_id not in machine_types:
+        raise HTTPException(status_code=404, detail="Machine not found")
+    
+    position = decode_cursor(cursor) if cursor else None
+    start_bound, end_bound = to_db_timestamp(start), to_db_timestamp(end)
+    
+    if not stream:
+        page = await db_executor.submit(history.page, machine_id, limit, position, start_bound, end_bound)
+        headers = {"X-Next-Cursor": encode_cursor(page[-1])} if len(page) == limit else {}
+        return JSONResponse(content=page, headers=headers)
+    
+    async def stream_history():
+        page_position = position
+        first = True
+        yield "["
+        while True:
+            page = await db_executor.submit(
+                history.page, machine_id, HISTORY_PAGE_SIZE, page_position, start_bound, end_bound
+            )
+            for entry in page:
+                yield ("" if first else ",") + json.dumps(entry)
+                first = False
+            if len(page) < HISTORY_PAGE_SIZE:
+                break
+            page_position = (page[-1]['timestamp'], page[-1]['id'])
+        yield "]"
+    
+    return StreamingResponse(stream_history(), media_type="application/json")
+
+@app.get("/machines/{machine_id}/history/downsampled", response_model=List[Dict[str, Any]])
+async def get_machine_history_downsampled(
+    machine_id: str,
+    bucket_seconds: int = Query(3600, ge=1, le=31 * 86400),
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+):
+    """Sensor averages, sample counts and vibration/temperature maxima per time bucket, oldest first"""
+    machine_types = await resolve_machine_types([machine_id])
+    if machine_id not in machine_types:
+        raise HTTPException(status_code=404, detail="Machine not found")
+    return await db_executor.submit(
+        history.downsample, machine_id, bucket_seconds, to_db_timestamp(start), to_db_timestamp(end)
+    )
+
+@app.get("/events")
+async def health_events(
+    machine_id: Optional[List[str]] = Query(None),
+    location: Optional[List[str]] = Query(None),
+):
+    """Server-Sent Events stream of health updates.
+
+    Repeat ``machine_id`` or ``location`` to receive only matching machines.
+    """
+    subscription = broker.subscribe(machine_id, location)
     
-    cursor.execute("SELECT * FROM machines ORDER BY installation_date DESC")
-    machines = [dict(row) for row in cursor.fetchall()]
-    return machines
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), config.EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            broker.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/fleet/summary", response_model=Dict[str, Any])
+async def get_fleet_summary(
+    group_by: Optional[List[str]] = Query(None),
+    lowest: int = Query(10, ge=0, le=1000),
+    maintenance_limit: int = Query(100, ge=0, le=10000),
+    include_decommissioned: bool = False,
+):
+    """Fleet health from each machine's latest prediction.
+
+    Repeat ``group_by`` (location, type, manufacturer) to also summarize per
+    group.  Cost is one row per machine, independent of prediction history.
+    """
+    group_by = group_by or []
+    invalid = [column for column in group_by if column not in FLEET_GROUP_COLUMNS]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Cannot group by: {', '.join(invalid)}")
+    return await db_executor.submit(
+        fetch_fleet_summary, list(dict.fromkeys(group_by)), lowest, maintenance_limit, include_decommissioned
+    )
+
+def database_size() -> int:
+    """Bytes on disk for the database file and its WAL"""
+    return sum(
+        os.path.getsize(path)
+        for path in (config.DB_PATH, config.DB_PATH + '-wal')
+        if os.path.exists(path)
+    )
+
+@app.get("/stats/", response_model=Dict[str, Any])
+async def get_stats():
+    return {
+        "db_pool": db.stats(),
+        "database": {"bytes": database_size()},
+        "history": await db_executor.submit(history.stats),
+        "db_executor": db_executor.stats(),
+        "inference_executor": inference_executor.stats(),
+        "batching": batcher.stats(),
+        "events": broker.stats(),
+        "registry": registry.stats(),
+        "prediction_cache": prediction_cache.stats() if prediction_cache is not None else None,
+        "features": feature_engine.stats() if feature_engine is not None else None,
+        "model_version": model_registry.active.version if model_registry.active is not None else None,
+        "write_behind": write_buffer.stats() if write_buffer is not None else None,
+        "stages": metrics.stage_summary(),
+        "profiler": profiler.stats() if profiler is not None else None,
+    }
+
+def metric_families() -> list:
+    """Gauges and counters owned by other components, in metrics.render() form"""
+    executors = (db_executor, inference_executor)
+    pool = db.stats()
+    buffered = write_buffer.stats() if write_buffer is not None else {}
+    active = model_registry.active
+    return [
+        ('dt_db_pool_connections', 'gauge', 'SQLite pool connections by state', {
+            (('state', 'idle'),): pool['idle'],
+            (('state', 'in_use'),): pool['in_use'],
+        }),
+        ('dt_database_bytes', 'gauge', 'Database and WAL size on disk', {(): database_size()}),
+        ('dt_executor_in_flight', 'gauge', 'Jobs running or queued per worker pool', {
+            (('executor', executor.name),): executor.stats()['in_flight'] for executor in executors
+        }),
+        ('dt_executor_queue_depth', 'gauge', 'Jobs waiting for a worker per pool', {
+            (('executor', executor.name),): executor.queue_depth for executor in executors
+        }),
+        ('dt_executor_rejected_total', 'counter', 'Jobs rejected with 503 because the queue was full', {
+            (('executor', executor.name),): executor.rejected for executor in executors
+        }),
+        ('dt_microbatch_batches_total', 'counter', 'Micro-batches scored', {(): batcher.batches}),
+        ('dt_microbatch_rows_total', 'counter', 'Rows scored through micro-batches', {(): batcher.rows}),
+        ('dt_registry_machines', 'gauge', 'Machines in the metadata cache', {(): len(registry)}),
+        ('dt_event_subscribers', 'gauge', 'Connected /events clients', {(): broker.stats()['subscribers']}),
+        ('dt_write_behind_pending_rows', 'gauge', 'Prediction rows waiting in the write-behind buffer', {
+            (): buffered.get('pending_rows', 0)
+        }),
+        ('dt_write_behind_rows_total', 'counter', 'Prediction rows by write-behind outcome', {
+            (('outcome', outcome),): buffered.get(f'{outcome}_rows', 0) for outcome in ('written', 'failed', 'rejected')
+        }),
+        ('dt_write_behind_batches_total', 'counter', 'Write-behind transactions committed', {
+            (): buffered.get('batches', 0)
+        }),
+        ('dt_model_info', 'gauge', 'Active model version', {
+            (('version', active.version if active is not None else 'none'),): 1
+        }),
+    ]
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of the stage histograms and service counters"""
+    return PlainTextResponse(metrics.render(metric_families()), media_type="text/plain; version=0.0.4")
+
+def require_admin(token: Optional[str]):
+    # No configured token means no admin access, not open access
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin routes are disabled; set DT_ADMIN_TOKEN to enable them")
+    if token is None or not hmac.compare_digest(token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/models", response_model=Dict[str, Any])
+async def get_model_versions(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    return await asyncio.to_thread(model_registry.describe)
+
+@app.post("/admin/models/reload", response_model=Dict[str, Any])
+async def reload_models(version: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    """Load a model version (default: newest bundle) in the background and swap it in"""
+    require_admin(x_admin_token)
+    try:
+        model_set = await activate_model_version(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model load failed, active version unchanged: {e}")
+    return model_set.describe()
+
+@app.post("/admin/models/rollback", response_model=Dict[str, Any])
+async def rollback_models(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    try:
+        model_set = await rollback_model_version()
+    except LookupError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return model_set.describe()
 
 @app.post("/predict/", response_model=PredictionResponse)
 async def predict_health(sensor_data: SensorData):
-    conn = get_db()
-    cursor = conn.cursor()
+    # Body read, JSON decoding and pydantic validation all happen before the handler runs
+    validated = time.perf_counter()
+    started = request_started.get()
     
     # Get machine type
-    cursor.execute("SELECT type FROM machines WHERE machine_id = ?", (sensor_data.machine_id,))
-    machine = cursor.fetchone()
+    machine_types = await resolve_machine_types([sensor_data.machine_id])
     
-    if not machine:
+    if sensor_data.machine_id not in machine_types:
         raise HTTPException(status_code=404, detail="Machine not found")
     
-    machine_type = machine['type']
+    machine_type = machine_types[sensor_data.machine_id]
+    if started is not None:
+        metrics.observe('validation', machine_type, validated - started)
+    metrics.observe('machine_lookup', machine_type, time.perf_counter() - validated)
     
     try:
-        if machine_type == 'motor':
-            # Prepare features for motor
-            features = np.array([[
-                sensor_data.current_phase_a or 0,
-                sensor_data.current_phase_b or 0,
-                sensor_data.current_phase_c or 0,
-                sensor_data.power_consumption or 0,
-                sensor_data.power_factor or 0,
-                sensor_data.vibration or 0,
-                sensor_data.temperature or 0,
-                sensor_data.speed or 0
-            ]])
-            
-            # Preprocess features
-            scaled_features = motor_models['scaler'].transform(features)
-            
-            # Predict health status
-            health_encoded = motor_models['classifier'].predict(scaled_features)
-            health_status = motor_models['encoder'].inverse_transform(health_encoded)[0]
-            
-            # Predict RUL
-            rul_prediction = motor_models['regressor'].predict(scaled_features)[0]
-            
-            # Get confidence scores
-            probabilities = motor_models['classifier'].predict_proba(scaled_features)[0]
-            confidence_scores = {
-                cls: float(prob) for cls, prob in 
-                zip(motor_models['encoder'].classes_, probabilities)
-            }
-            
-        else:  # blade
-            # Prepare features for blade
-            features = np.array([[
-                sensor_data.vibration or 0,
-                sensor_data.torque or 0,
-                sensor_data.speed or 0,
-                sensor_data.noise or 0,
-                sensor_data.temperature or 0
-            ]])
-            
-            # Preprocess features
-            scaled_features = blade_models['scaler'].transform(features)
-            
-            # Predict health status
-            health_encoded = blade_models['classifier'].predict(scaled_features)
-            health_status = blade_models['encoder'].inverse_transform(health_encoded)[0]
-            
-            # Predict RUL
-            rul_prediction = blade_models['regressor'].predict(scaled_features)[0]
-            
-            # Get confidence scores
-            probabilities = blade_models['classifier'].predict_proba(scaled_features)[0]
-            confidence_scores = {
-                cls: float(prob) for cls, prob in 
-                zip(blade_models['encoder'].classes_, probabilities)
-            }
+        prediction = (await predict_rows(machine_type, [sensor_data]))[0]
         
-        # Determine color and maintenance requirement
-        color_code, maintenance_required = get_visualization_properties(health_status, rul_prediction)
+        # Store prediction and sensor readings in database
+        await persist_predictions([sensor_data], [prediction], machine_type)
         
-        # Store prediction in database
-        max_confidence = max(confidence_scores.values()) if confidence_scores else 0.0
-        cursor.execute(
-            """INSERT INTO predictions 
-            (machine_id, health_status, rul_hours, confidence, maintenance_required) 
-            VALUES (?, ?, ?, ?, ?)""",
-            (sensor_data.machine_id, health_status, float(rul_prediction), max_confidence, maintenance_required)
-        )
+        return prediction
         
-        # Store sensor readings
-        cursor.execute(
-            """INSERT INTO sensor_readings 
-            (machine_id, current_phase_a, current_phase_b, current_phase_c, 
-             power_consumption, power_factor, vibration, temperature, speed, torque, noise) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (sensor_data.machine_id, sensor_data.current_phase_a, sensor_data.current_phase_b, 
-             sensor_data.current_phase_c, sensor_data.power_consumption, sensor_data.power_factor,
-             sensor_data.vibration, sensor_data.temperature, sensor_data.speed, 
-             sensor_data.torque, sensor_data.noise)
-        )
+    except ExecutorOverloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+@app.post("/predict/batch", response_model=List[PredictionResponse])
+async def predict_health_batch(readings: List[SensorData]):
+    if not readings:
+        return []
+    
+    # Resolve all machine types in one query
+    machine_ids = sorted({reading.machine_id for reading in readings})
+    machine_types = await resolve_machine_types(machine_ids)
+    
+    missing = [machine_id for machine_id in machine_ids if machine_id not in machine_types]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Machine not found: {', '.join(missing)}")
+    
+    # Group row positions by machine type so each model runs once on the stacked matrix
+    groups: Dict[str, List[int]] = {}
+    for index, reading in enumerate(readings):
+        groups.setdefault(machine_types[reading.machine_id], []).append(index)
+    
+    try:
+        predictions: List[Optional[PredictionResponse]] = [None] * len(readings)
+        for machine_type, indices in groups.items():
+            group_predictions = await predict_rows(machine_type, [readings[i] for i in indices])
+            for index, prediction in zip(indices, group_predictions):
+                predictions[index] = prediction
         
-        conn.commit()
+        # Store all predictions and sensor readings together
+        await persist_predictions(readings, predictions, next(iter(groups)) if len(groups) == 1 else 'mixed')
         
-        return PredictionResponse(
-            health_status=health_status,
-            rul_hours=float(rul_prediction),
-            confidence_scores=confidence_scores,
-            color_code=color_code,
-            maintenance_required=maintenance_required
-        )
+        return predictions
         
+    except ExecutorOverloaded:
+        raise
     except Exception as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
-def get_visualization_properties(health_status: str, rul_hours: float) -> tuple:
-    """Determine color and maintenance requirements"""
-    if health_status == "Critical" or rul_hours < 24:
-        return "#dc3545", True  # Red - Immediate maintenance
-    elif health_status == "Warning" or rul_hours < 168:  # 1 week
-        return "#ffc107", True   # Yellow - Schedule maintenance
-    else:
-        return "#28a745", False  # Green - No maintenance needed
+def write_import_chunk(machine_type: str, chunk, check: MachineCheck, scores) -> None:
+    with db.transaction() as conn:
+        write_chunk(conn, machine_type, chunk, history, check, scores)
+
+async def submit_when_free(executor: BoundedExecutor, fn, *args):
+    """Bulk work waits for room on a full pool instead of failing part way through"""
+    while True:
+        try:
+            return await executor.submit(fn, *args)
+        except ExecutorOverloaded:
+            await asyncio.sleep(0.1)
+
+async def run_import(upload, file_format: str, machine_id: Optional[str], predict: bool,
+                     create_machines: bool) -> Dict[str, Any]:
+    """Parse on a worker thread, score on the inference pool, and give each chunk's
+    writes their own db_executor job, so live requests interleave with the import"""
+    started = time.perf_counter()
+    machine_type, chunks = await asyncio.to_thread(
+        open_chunks, upload, file_format, machine_id, config.IMPORT_CHUNK_ROWS
+    )
+    check = MachineCheck(machine_type, create_machines)
+    rows = 0
+    try:
+        while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+            scores = await submit_when_free(inference_executor, bulk_score, machine_type, chunk.features) if predict else None
+            await submit_when_free(db_executor, write_import_chunk, machine_type, chunk, check, scores)
+            rows += len(chunk.machine_ids)
+    except Exception as e:
+        raise BulkImportError(e, rows) from e
+    finally:
+        # Release the parser before the caller closes the upload
+        chunks.close()
+    return import_summary(machine_type, rows, rows if predict else 0, started)
+
+@app.post("/import/readings", response_model=Dict[str, Any])
+async def import_sensor_readings(
+    request: Request,
+    machine_id: Optional[str] = None,
+    predict: bool = False,
+    create_machines: bool = False,
+    format: Optional[str] = Query(None, pattern="^(csv|parquet)$"),
+):
+    """Bulk import a CSV/Parquet file (raw request body) in the motor/blade dataset layout.
+
+    Each chunk commits on its own; a failure reports how many rows were
+    committed before it.  Indexes stay in place (dropping them is left to the
+    bulk_import.py CLI), since history queries would scan without them.
+    """
+    file_format = format or ('parquet' if 'parquet' in request.headers.get('content-type', '') else 'csv')
+    upload = tempfile.SpooledTemporaryFile(max_size=config.IMPORT_SPOOL_BYTES)
+    try:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        return await run_import(upload, file_format, machine_id, predict, create_machines)
+    except BulkImportError as e:
+        bad_input = isinstance(e.__cause__, (ValueError, KeyError))
+        raise HTTPException(status_code=400 if bad_input else 500, detail=f"Import failed: {e}")
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Import failed: {e}")
+    finally:
+        upload.close()
+
+# Streaming ingestion
+def ingest_session() -> IngestSession:
+    return IngestSession(
+        resolve_machine_types, predict_rows, persist_predictions,
+        flush_rows=config.INGEST_FLUSH_ROWS,
+        flush_interval=config.INGEST_FLUSH_INTERVAL,
+    )
+
+def parse_readings(payload: Any) -> List[SensorData]:
+    """Accept a single reading object or a list of them"""
+    items = payload if isinstance(payload, list) else [payload]
+    return [SensorData(**item) for item in items]
+
+@app.websocket("/ws/ingest")
+async def ingest_websocket(websocket: WebSocket):
+    """Long-lived ingestion stream.
+
+    Each text message is a reading object or a list of readings; the reply is
+    the matching prediction object or list.  Rows are persisted in periodic
+    bulk writes.
+    """
+    await websocket.accept()
+    async with ingest_session() as session:
+        try:
+            while True:
+                message = await websocket.receive_text()
+                try:
+                    payload = json.loads(message)
+                    results = await session.process(parse_readings(payload))
+                except ExecutorOverloaded as e:
+                    await websocket.send_json({"error": str(e), "retry": True})
+                    continue
+                except IngestStoreError as e:
+                    # Scored and still buffered; the rows are written by a later flush
+                    results = e.results
+                    await websocket.send_json({
+                        "error": f"Storage error: {str(e)}",
+                        "results": results if isinstance(payload, list) else results[0],
+                    })
+                    continue
+                except Exception as e:
+                    await websocket.send_json({"error": f"Invalid message: {str(e)}"})
+                    continue
+                await websocket.send_json(results if isinstance(payload, list) else results[0])
+        except WebSocketDisconnect:
+            pass
+
+class DuplexStreamingResponse(StreamingResponse):
+    """Streams a response while the request body is still being read.
+
+    StreamingResponse watches receive() for disconnects, which would steal the
+    request body chunks the generator is consuming; a disconnect surfaces from
+    request.stream() instead.
+    """
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+@app.post("/ingest/stream")
+async def ingest_ndjson(request: Request):
+    """Chunked NDJSON ingestion.
+
+    The request body is a stream of newline-delimited readings; the response
+    streams one prediction line per reading, in order.  All lines that arrive
+    in the same chunk are scored together.
+    """
+    async def results():
+        async with ingest_session() as session:
+            buffer = b""
+            async for chunk in request.stream():
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                lines = [line for line in lines if line.strip()]
+                if lines:
+                    for result in await process_lines(session, lines):
+                        yield json.dumps(result) + "\n"
+            if buffer.strip():
+                for result in await process_lines(session, [buffer]):
+                    yield json.dumps(result) + "\n"
+    
+    return DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
+async def process_lines(session: IngestSession, lines: List[bytes]) -> List[Dict[str, Any]]:
+    readings, results = [], [None] * len(lines)
+    positions = []
+    for index, line in enumerate(lines):
+        try:
+            readings.append(SensorData(**json.loads(line)))
+            positions.append(index)
+        except Exception as e:
+            results[index] = {"error": f"Invalid reading: {str(e)}"}
+    if readings:
+        try:
+            scored = await session.process(readings)
+        except IngestStoreError as e:
+            # Scored and still buffered; the rows are written by a later flush
+            scored = [{**result, "storage_error": str(e)} for result in e.results]
+        for index, result in zip(positions, scored):
+            results[index] = result
+    return results
 
 if __name__ == "__main__":
     import uvicorn
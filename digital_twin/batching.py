@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import numpy as np
+
+# Micro-batching scheduler for single-reading predictions.
+#
+# Concurrent /predict/ requests for the same machine type are collected for up
+# to ``max_batch_size`` rows or ``max_wait`` seconds, whichever comes first,
+# then scored with one stacked call per model.  Results are fanned back out to
+# the waiting requests, so clients keep sending one reading per request while
+# the models see batches.
+
+class MicroBatcher:
+    def __init__(self, run_batch, max_batch_size: int = 32, max_wait: float = 0.002):
+        # run_batch(machine_type, features) -> awaitable of
+        # (health_statuses, rul_predictions, probabilities, class_labels)
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending = {}  # machine_type -> [(features, future, enqueued_at)]
+        self._timers = {}
+        # Running batches; the loop only keeps weak references to tasks
+        self._tasks = set()
+        
+        # Metrics
+        self.batches = 0
+        self.rows = 0
+        self.queue_delay_total = 0.0
+        self.queue_delay_max = 0.0
+    
+    async def submit(self, machine_type: str, features: np.ndarray):
+        """Queue one feature row; resolves to (status, rul, probabilities, class_labels)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(machine_type, [])
+        pending.append((features, future, time.perf_counter()))
+        
+        if len(pending) >= self.max_batch_size:
+            self._flush(machine_type)
+        elif machine_type not in self._timers:
+            self._timers[machine_type] = loop.call_later(self.max_wait, self._flush, machine_type)
+        
+        return await future
+    
+    def _flush(self, machine_type: str):
+        timer = self._timers.pop(machine_type, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(machine_type, None)
+        if batch:
+            task = asyncio.ensure_future(self._run(machine_type, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._finished)
+    
+    def _finished(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Prediction batch failed: {task.exception()}")
+    
+    async def _run(self, machine_type: str, batch: list):
+        started = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            delay = started - enqueued_at
+            self.queue_delay_total += delay
+            self.queue_delay_max = max(self.queue_delay_max, delay)
+        self.batches += 1
+        self.rows += len(batch)
+        
+        try:
+            health_statuses, rul_predictions, probabilities, classes = await self.run_batch(
+                machine_type, np.vstack([features for features, _, _ in batch])
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for index, (_, future, _) in enumerate(batch):
+            # Requests may have been cancelled while waiting
+            if not future.done():
+                future.set_result((health_statuses[index], rul_predictions[index], probabilities[index], classes))
+    
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "fill_ratio": self.rows / (self.batches * self.max_batch_size) if self.batches else 0.0,
+            "mean_queue_delay_ms": 1000 * self.queue_delay_total / self.rows if self.rows else 0.0,
+            "max_queue_delay_ms": 1000 * self.queue_delay_max,
+        }
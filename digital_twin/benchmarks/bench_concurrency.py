@@ -0,0 +1,74 @@
+"""p50/p99 latency for mixed /machines/ and /predict/ traffic at increasing concurrency.
+
+Starts a local uvicorn server with a throwaway database unless --url is given.
+Run from the digital_twin directory:
+
+    python benchmarks/bench_concurrency.py [--concurrency 1 8 32 64] [--requests 400]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import BLADE_READING, MOTOR_READING, local_server, percentile, register_machine  # noqa: E402
+
+async def run_level(url, concurrency, total, predict_ratio):
+    latencies = {"machines": [], "predict": []}
+    statuses = {}
+    remaining = total
+    
+    async def client(http):
+        nonlocal remaining
+        rng = random.Random()
+        while remaining > 0:
+            remaining -= 1
+            if rng.random() < predict_ratio:
+                kind = "predict"
+                if rng.random() < 0.5:
+                    request = http.post("/predict/", json={"machine_id": "BENCH-M", **MOTOR_READING})
+                else:
+                    request = http.post("/predict/", json={"machine_id": "BENCH-B", **BLADE_READING})
+            else:
+                kind = "machines"
+                request = http.get("/machines/")
+            start = time.perf_counter()
+            response = await request
+            latencies[kind].append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    
+    for kind, values in latencies.items():
+        values.sort()
+        print(f"{concurrency:>6} {kind:<9}{len(values):>7}{percentile(values, 50) * 1e3:>10.1f}"
+              f"{percentile(values, 99) * 1e3:>10.1f}")
+    print(f"{'':>6} total {total / elapsed:>10.0f} req/s, status codes {statuses}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="benchmark an already running server")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64])
+    parser.add_argument('--requests', type=int, default=400, help="requests per concurrency level")
+    parser.add_argument('--predict-ratio', type=float, default=0.5)
+    args = parser.parse_args()
+    
+    with (nullcontext(args.url) if args.url else local_server()) as url:
+        register_machine(url, "BENCH-M", "motor")
+        register_machine(url, "BENCH-B", "blade")
+        print(f"{'conc':>6} {'route':<9}{'count':>7}{'p50 ms':>10}{'p99 ms':>10}")
+        for concurrency in args.concurrency:
+            asyncio.run(run_level(url, concurrency, args.requests, args.predict_ratio))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Sensor history backends: storage size, write rate and read latency, SQLite rows vs columnar chunks.
+
+Writes --days of once-per-second motor readings for --machines machines
+(interleaved, as live traffic would arrive) through each backend's write(),
+then times the reads behind /machines/{id}/history and its /downsampled
+variant.  The columnar store is measured with its finished days sealed by
+compact(), first with a cold cache and then warm.  Run from the digital_twin
+directory:
+
+    python benchmarks/bench_history.py [--machines 2] [--days 3] [--repeat 20]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import APP_DIR, MOTOR_READING  # noqa: E402
+
+sys.path.insert(0, str(APP_DIR))
+
+from history_store import ColumnarHistory, SQLiteHistory, format_epochs  # noqa: E402
+from storage import ConnectionPool  # noqa: E402
+
+CHUNK_ROWS = 50000
+
+def generate(machines: int, days: int, end: int):
+    """Yield (machine_ids, timestamps, values) chunks in arrival order"""
+    seconds = days * 86400
+    rng = np.random.default_rng(0)
+    for offset in range(0, seconds, CHUNK_ROWS // machines):
+        ticks = np.arange(end - seconds + offset, min(end, end - seconds + offset + CHUNK_ROWS // machines))
+        epochs = np.repeat(ticks, machines)
+        machine_ids = [f"BENCH-{index}" for index in range(machines)] * len(ticks)
+        values = {
+            # Noisy sensors rounded like a real historian export
+            column: np.round(base * (1 + 0.05 * rng.standard_normal(len(epochs))), 3).tolist()
+            for column, base in MOTOR_READING.items()
+        }
+        yield machine_ids, format_epochs(epochs), values
+
+def timed(function, repeat: int) -> float:
+    """Median milliseconds per call"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return float(np.median(samples)) * 1e3
+
+def directory_bytes(path: str) -> int:
+    return sum(entry.stat().st_size for entry in Path(path).rglob('*') if entry.is_file())
+
+def read_timings(history, end: str, middle: tuple, repeat: int) -> dict:
+    return {
+        "newest page (1000)": timed(lambda: history.page("BENCH-0", 1000), repeat),
+        "1h window a day ago": timed(lambda: history.page("BENCH-0", 1000, None, *middle), repeat),
+        "downsample all, 1h": timed(lambda: history.downsample("BENCH-0", 3600), repeat),
+        "downsample 1 day, 60s": timed(
+            lambda: history.downsample("BENCH-0", 60, format_epochs(np.array([end - 86400]))[0]), repeat
+        ),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--machines", type=int, default=2)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # Whole days ending at midnight UTC, so every day can be sealed
+    end = int(time.time()) // 86400 * 86400
+    middle = tuple(format_epochs(np.array([end - 86400, end - 86400 + 3600])))
+    rows = args.machines * args.days * 86400
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        with sqlite3.connect(db_path) as conn:
+            conn.executescript((APP_DIR / "schema.sql").read_text())
+        db = ConnectionPool(db_path, size=2)
+        db.open()
+
+        sqlite_history = SQLiteHistory(db)
+        started = time.perf_counter()
+        for machine_ids, timestamps, values in generate(args.machines, args.days, end):
+            with db.transaction() as conn:
+                sqlite_history.write(conn, machine_ids, timestamps, values)
+        write_seconds = time.perf_counter() - started
+        with db.connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            page_count, page_size = conn.execute("PRAGMA page_count").fetchone()[0], conn.execute("PRAGMA page_size").fetchone()[0]
+        results["sqlite"] = (rows / write_seconds, page_count * page_size, read_timings(sqlite_history, end, middle, args.repeat))
+
+        columnar = ColumnarHistory(os.path.join(tmp, "history"), db)
+        started = time.perf_counter()
+        for machine_ids, timestamps, values in generate(args.machines, args.days, end):
+            columnar.write(None, machine_ids, timestamps, values)
+        write_seconds = time.perf_counter() - started
+        open_bytes = directory_bytes(columnar.directory)
+        compact = columnar.compact()
+        print(f"columnar: {open_bytes / rows:.1f} bytes/reading in open chunks, "
+              f"compact() sealed {compact['sealed_chunks']} chunks in {compact['seconds']:.2f}s")
+        columnar.cache_bytes = 0  # nothing is kept, every read decompresses
+        results["columnar (cold)"] = (rows / write_seconds, directory_bytes(columnar.directory),
+                                      read_timings(columnar, end, middle, args.repeat))
+        columnar.cache_bytes = 64 * 1024 * 1024
+        results["columnar (warm)"] = (rows / write_seconds, directory_bytes(columnar.directory),
+                                      read_timings(columnar, end, middle, args.repeat))
+        db.close()
+
+    print(f"\n{rows} readings ({args.machines} machines x {args.days} days at 1 Hz)")
+    names = list(next(iter(results.values()))[2])
+    print(f"{'backend':<17}{'rows/s':>10}{'bytes/row':>11}" + "".join(f"{name + ' ms':>26}" for name in names))
+    for backend, (rate, size, timings) in results.items():
+        print(f"{backend:<17}{rate:>10.0f}{size / rows:>11.1f}" + "".join(f"{timings[name]:>26.2f}" for name in names))
+
+if __name__ == "__main__":
+    main()
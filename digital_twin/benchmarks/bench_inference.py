@@ -0,0 +1,58 @@
+"""Per-call inference latency, unfused vs fused path.
+
+Run from the digital_twin directory:
+
+    python benchmarks/bench_inference.py [--iterations 2000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from inference import prepare_models, run_models, run_models_unfused  # noqa: E402
+
+def load(machine_type: str) -> dict:
+    models = {
+        'classifier': joblib.load(f'saved_models/{machine_type}_gradient_boosting_classifier.pkl'),
+        'regressor': joblib.load(f'saved_models/{machine_type}_gradient_boosting_regressor.pkl'),
+        'scaler': joblib.load(f'saved_models/{machine_type}_scaler.pkl'),
+        'encoder': joblib.load(f'saved_models/{machine_type}_label_encoder.pkl'),
+    }
+    prepare_models(models)
+    return models
+
+def time_per_call(fn, models, features, iterations):
+    fn(models, features)  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(models, features)
+    return (time.perf_counter() - start) / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    print(f"{'model':<8}{'unfused (us)':>14}{'fused (us)':>12}{'speedup':>10}")
+    for machine_type in ('motor', 'blade'):
+        models = load(machine_type)
+        features = rng.normal(size=(1, models['scaler'].n_features_in_))
+        
+        # Both paths must agree before timing them
+        fused = run_models(models, features)
+        unfused = run_models_unfused(models, features)
+        assert fused[0][0] == unfused[0][0]
+        assert np.allclose(fused[1], unfused[1]) and np.allclose(fused[2], unfused[2])
+        
+        before = time_per_call(run_models_unfused, models, features, args.iterations)
+        after = time_per_call(run_models, models, features, args.iterations)
+        print(f"{machine_type:<8}{before * 1e6:>14.1f}{after * 1e6:>12.1f}{before / after:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Per-reading overhead: one POST /predict/ per reading vs streaming ingestion.
+
+Starts a local uvicorn server with a throwaway database unless --url is given.
+The WebSocket variant needs the optional ``websockets`` package.
+Run from the digital_twin directory:
+
+    python benchmarks/bench_ingest.py [--readings 2000] [--chunk 50]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import MOTOR_READING, local_server, register_machine  # noqa: E402
+
+def reading(i):
+    return {"machine_id": "BENCH-M", **MOTOR_READING, "speed": 1500.0 + i % 7}
+
+def bench_request_response(url, count):
+    with httpx.Client(base_url=url, timeout=60) as http:
+        start = time.perf_counter()
+        for i in range(count):
+            http.post("/predict/", json=reading(i)).raise_for_status()
+        return time.perf_counter() - start
+
+def bench_ndjson(url, count, chunk):
+    def body():
+        for offset in range(0, count, chunk):
+            yield "".join(json.dumps(reading(i)) + "\n" for i in range(offset, min(count, offset + chunk))).encode()
+    
+    with httpx.Client(base_url=url, timeout=60) as http:
+        start = time.perf_counter()
+        with http.stream("POST", "/ingest/stream", content=body()) as response:
+            lines = sum(1 for _ in response.iter_lines())
+        elapsed = time.perf_counter() - start
+    assert lines == count, lines
+    return elapsed
+
+async def bench_websocket(url, count, chunk):
+    import websockets
+    
+    async with websockets.connect(url.replace("http", "ws", 1) + "/ws/ingest") as ws:
+        start = time.perf_counter()
+        for offset in range(0, count, chunk):
+            await ws.send(json.dumps([reading(i) for i in range(offset, min(count, offset + chunk))]))
+            json.loads(await ws.recv())
+        return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="benchmark an already running server")
+    parser.add_argument('--readings', type=int, default=2000)
+    parser.add_argument('--chunk', type=int, default=50, help="readings per stream chunk/message")
+    args = parser.parse_args()
+    
+    with (nullcontext(args.url) if args.url else local_server()) as url:
+        register_machine(url, "BENCH-M", "motor")
+        results = {
+            "POST /predict/": bench_request_response(url, args.readings),
+            "NDJSON stream": bench_ndjson(url, args.readings, args.chunk),
+        }
+        try:
+            results["WebSocket"] = asyncio.run(bench_websocket(url, args.readings, args.chunk))
+        except ImportError:
+            print("websockets not installed, skipping WebSocket variant")
+        
+        baseline = results["POST /predict/"]
+        for name, elapsed in results.items():
+            print(f"{name:<16}{elapsed / args.readings * 1e6:>10.0f} us/reading"
+                  f"{args.readings / elapsed:>10.0f} readings/s{baseline / elapsed:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
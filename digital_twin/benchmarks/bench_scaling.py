@@ -0,0 +1,91 @@
+"""/predict/ throughput of serve.py as the number of worker processes grows.
+
+For each worker count, starts `serve.py --workers N` with a throwaway database
+and drives /predict/ for both machine types from several client processes, so
+the load generator isn't held back by its own GIL.  Throughput can only grow
+with workers up to the number of cores, which the report prints alongside.
+Run from the digital_twin directory:
+
+    python benchmarks/bench_scaling.py [--workers 1 2 4] [--clients 4] [--concurrency 16] [--seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import BLADE_READING, MOTOR_READING, local_server, percentile, register_machine  # noqa: E402
+
+PAYLOADS = (
+    {"machine_id": "BENCH-M", **MOTOR_READING},
+    {"machine_id": "BENCH-B", **BLADE_READING},
+)
+
+async def drive(url: str, concurrency: int, seconds: float) -> tuple:
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client(http, offset):
+        nonlocal errors
+        count = offset
+        while time.perf_counter() < deadline:
+            count += 1
+            started = time.perf_counter()
+            response = await http.post("/predict/", json=PAYLOADS[count % len(PAYLOADS)])
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as http:
+        await asyncio.gather(*(client(http, offset) for offset in range(concurrency)))
+    return latencies, errors
+
+def client_process(args: tuple) -> tuple:
+    return asyncio.run(drive(*args))
+
+def run_level(url: str, clients: int, concurrency: int, seconds: float) -> dict:
+    started = time.perf_counter()
+    with Pool(clients) as pool:
+        results = pool.map(client_process, [(url, concurrency, seconds)] * clients)
+    elapsed = time.perf_counter() - started
+    latencies = sorted(value for values, _ in results for value in values)
+    return {
+        # Elapsed includes process startup, so this slightly understates throughput
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1e3,
+        "p99_ms": percentile(latencies, 99) * 1e3,
+        "errors": sum(errors for _, errors in results),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="connections per client process")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} client processes x {args.concurrency} connections")
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for workers in args.workers:
+        command = [sys.executable, "serve.py", "--workers", str(workers), "--log-level", "warning"]
+        with local_server(env={"DT_RETENTION_ENABLED": "0"}, command=command) as url:
+            register_machine(url, "BENCH-M", "motor")
+            register_machine(url, "BENCH-B", "blade")
+            # Warm every worker's connection pool and caches before measuring
+            run_level(url, 1, args.concurrency, 1.0)
+            result = run_level(url, args.clients, args.concurrency, args.seconds)
+        print(f"{workers:>8}{result['requests_per_second']:>10.0f}{result['p50_ms']:>9.1f}"
+              f"{result['p99_ms']:>9.1f}{result['errors']:>8}")
+
+if __name__ == "__main__":
+    main()
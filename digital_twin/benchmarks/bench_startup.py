@@ -0,0 +1,120 @@
+"""Model startup time and per-worker memory: pickled vs memory-mapped compiled models.
+
+Publishes saved_models/ (with its .npy export) into a temporary bundle
+directory, then for each configuration measures
+  * model load time in a fresh interpreter (imports included), and
+  * RSS / PSS of every worker of a multi-worker uvicorn server after it has
+    served both machine types.  PSS splits shared pages between processes, so
+    it shows what memory-mapped models save across workers.
+Linux only (reads /proc).  Run from the digital_twin directory:
+
+    python benchmarks/bench_startup.py [--workers 4] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common import APP_DIR, BLADE_READING, MOTOR_READING, local_server, register_machine  # noqa: E402
+from model_registry import publish  # noqa: E402
+
+CONFIGS = {
+    # What startup used to do: unpickle all eight files up front
+    "pickle, eager": {"DT_MODEL_FORMAT": "pickle", "DT_MODEL_PRELOAD": "motor,blade"},
+    "pickle, lazy": {"DT_MODEL_FORMAT": "pickle", "DT_MODEL_PRELOAD": ""},
+    "compiled, lazy": {"DT_MODEL_FORMAT": "compiled", "DT_MODEL_PRELOAD": ""},
+}
+
+LOAD_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import inference
+inference.load_models()
+loaded = time.perf_counter()
+for machine_type in ('motor', 'blade'):
+    inference.get_models(machine_type)
+first_use = time.perf_counter()
+print(json.dumps({"startup": loaded - start, "first_use": first_use - start, "sklearn": "sklearn" in sys.modules}))
+"""
+
+def load_timing(env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", LOAD_SCRIPT], cwd=APP_DIR, env=dict(os.environ, **env),
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def memory_kb(pid: int) -> tuple:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("Rss", "Pss"):
+                fields[name] = int(value.split()[0])
+    return fields["Rss"], fields["Pss"]
+
+def server_workers(port: int) -> list:
+    """Worker pids of the uvicorn master listening on port"""
+    master, children = None, {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode()
+            with open(f"/proc/{entry}/stat") as f:
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except OSError:
+            continue
+        if "uvicorn" in cmdline and f"--port {port}" in cmdline:
+            master = int(entry)
+        elif "resource_tracker" not in cmdline:
+            children.setdefault(parent, []).append(int(entry))
+    return children.get(master, [])
+
+def measure_server(env: dict, workers: int, requests: int) -> list:
+    command = [sys.executable, "-m", "uvicorn", "app:app", "--log-level", "warning", "--workers", str(workers)]
+    with local_server(env=env, command=command) as url:
+        register_machine(url, "BENCH-M", "motor")
+        register_machine(url, "BENCH-B", "blade")
+        # Separate connections so requests spread over the workers
+        for _ in range(requests):
+            httpx.post(f"{url}/predict/", json={"machine_id": "BENCH-M", **MOTOR_READING})
+            httpx.post(f"{url}/predict/", json={"machine_id": "BENCH-B", **BLADE_READING})
+        port = int(url.rsplit(":", 1)[1])
+        return [memory_kb(pid) for pid in server_workers(port)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3, help="load-time samples per configuration")
+    parser.add_argument("--requests", type=int, default=50, help="predictions per machine type before measuring")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        publish(str(APP_DIR / "saved_models"), model_dir, "bench")
+        print(f"{'configuration':<16} {'startup':>9} {'first use':>10} {'sklearn':>8} "
+              f"{'RSS/worker':>11} {'PSS/worker':>11} {'PSS total':>10}")
+        for name, config_env in CONFIGS.items():
+            env = dict(config_env, DT_MODEL_DIR=model_dir, DT_RETENTION_ENABLED="0")
+            timings = [load_timing(env) for _ in range(args.repeat)]
+            startup = min(timing["startup"] for timing in timings)
+            first_use = min(timing["first_use"] for timing in timings)
+            memory = measure_server(env, args.workers, args.requests)
+            rss = sum(m[0] for m in memory) / max(len(memory), 1) / 1024
+            pss = sum(m[1] for m in memory) / max(len(memory), 1) / 1024
+            print(f"{name:<16} {startup * 1000:>7.0f}ms {first_use * 1000:>8.0f}ms "
+                  f"{str(timings[0]['sklearn']):>8} {rss:>8.1f} MB {pss:>8.1f} MB "
+                  f"{pss * len(memory):>7.1f} MB  ({len(memory)} workers)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compiled tree engine vs sklearn: correctness and latency.
+
+Run from the digital_twin directory:
+
+    python benchmarks/bench_tree_engine.py [--iterations 2000] [--batch-size 1000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tree_engine import CompiledModels  # noqa: E402
+
+def load(machine_type: str) -> dict:
+    return {
+        'classifier': joblib.load(f'saved_models/{machine_type}_gradient_boosting_classifier.pkl'),
+        'regressor': joblib.load(f'saved_models/{machine_type}_gradient_boosting_regressor.pkl'),
+        'scaler': joblib.load(f'saved_models/{machine_type}_scaler.pkl'),
+        'encoder': joblib.load(f'saved_models/{machine_type}_label_encoder.pkl'),
+    }
+
+def sklearn_path(models, features):
+    scaled = models['scaler'].transform(features)
+    return models['classifier'].predict_proba(scaled), models['regressor'].predict(scaled)
+
+def compiled_path(engine, features):
+    scaled = engine.scale_features(features)
+    return engine.predict_proba(scaled), engine.predict_rul(scaled)
+
+def time_per_call(fn, target, features, iterations):
+    fn(target, features)  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(target, features)
+    return (time.perf_counter() - start) / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    for machine_type in ('motor', 'blade'):
+        models = load(machine_type)
+        engine = CompiledModels.from_sklearn(models)
+        n_features = models['scaler'].n_features_in_
+        
+        # Sample around the training distribution so every branch gets exercised
+        check = models['scaler'].mean_ + models['scaler'].scale_ * rng.normal(0, 2, size=(20000, n_features))
+        expected_proba, expected_rul = sklearn_path(models, check)
+        got_proba, got_rul = compiled_path(engine, check)
+        proba_err = np.abs(expected_proba - got_proba).max()
+        rul_err = np.abs(expected_rul - got_rul).max()
+        assert np.allclose(expected_proba, got_proba, rtol=1e-9, atol=1e-12), proba_err
+        assert np.allclose(expected_rul, got_rul, rtol=1e-9, atol=1e-9), rul_err
+        
+        print(f"{machine_type}: max |dproba| = {proba_err:.2e}, max |drul| = {rul_err:.2e}")
+        for batch_size in (1, 16, 64, 256, args.batch_size):
+            features = check[:batch_size]
+            iterations = max(1, args.iterations // batch_size * 10) if batch_size > 1 else args.iterations
+            before = time_per_call(sklearn_path, models, features, iterations)
+            after = time_per_call(compiled_path, engine, features, iterations)
+            print(f"  batch {batch_size:>5}: sklearn {before * 1e6:9.1f} us "
+                  f"({batch_size / before:10.0f} rows/s), compiled {after * 1e6:9.1f} us "
+                  f"({batch_size / after:10.0f} rows/s), {before / after:5.1f}x")
+
+if __name__ == "__main__":
+    main()
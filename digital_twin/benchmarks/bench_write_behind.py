@@ -0,0 +1,107 @@
+"""Insert throughput of prediction rows: a transaction per request vs the write-behind buffer.
+
+Concurrent asyncio producers each persist one reading + prediction at a time
+through the app's own store path (the DB executor and store_predictions), the
+way /predict/ does, against a throwaway database.  Models and HTTP are left
+out so the numbers show the storage side alone.  Reports rows/s, per-call
+latency as seen by the request and the writer's batch sizes.  Run from the
+digital_twin directory:
+
+    python benchmarks/bench_write_behind.py [--clients 1 16 64] [--seconds 3]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import APP_DIR, MOTOR_READING, percentile  # noqa: E402
+
+MODES = ("direct", "flush", "async")
+
+async def run_mode(app, mode: str, clients: int, seconds: float, max_delay_ms: float) -> dict:
+    reading = app.SensorData(machine_id="BENCH-M", **MOTOR_READING)
+    prediction = app.PredictionResponse(
+        health_status="Normal", rul_hours=900.0, confidence_scores={"Normal": 0.99},
+        color_code="#28a745", maintenance_required=False,
+    )
+    buffer = None
+    if mode != "direct":
+        buffer = app.WriteBehindBuffer(app.write_predictions, max_delay=max_delay_ms / 1000, durability=mode)
+        buffer.start()
+    latencies = []
+    rejected = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client():
+        nonlocal rejected
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if buffer is None:
+                    await app.db_executor.submit(app.store_predictions, [reading], [prediction], "motor")
+                else:
+                    await buffer.submit([reading], [prediction], "motor")
+            except app.ExecutorOverloaded:
+                # A real client would get a 503 and retry
+                rejected += 1
+                await asyncio.sleep(0.001)
+                continue
+            latencies.append(time.perf_counter() - started)
+            # Let other requests run, as a handler awaiting I/O would
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    if buffer is not None:
+        # Fire-and-forget rows only count once they are on disk
+        await buffer.close()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    stats = buffer.stats() if buffer is not None else {}
+    return {
+        "rows_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1e3,
+        "p99_ms": percentile(latencies, 99) * 1e3,
+        "mean_batch_rows": stats.get("mean_batch_rows", 1.0),
+        "max_batch_rows": stats.get("max_batch_rows", 1),
+        "rejected": rejected,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 16, 64], help="concurrent producers")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--max-delay-ms", type=float, help="write-behind time trigger (default: DT_WRITE_BEHIND_MAX_DELAY_MS)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(DT_DB_PATH=os.path.join(tmp, "bench.db"), DT_RETENTION_ENABLED="0", DT_WRITE_BEHIND_MODE="off")
+        os.chdir(APP_DIR)
+        sys.path.insert(0, str(APP_DIR))
+        import app
+
+        app.db.open()
+        app.init_db()
+        app.db_executor.start()
+        with app.db.transaction() as conn:
+            conn.execute("INSERT INTO machines (machine_id, name, type) VALUES ('BENCH-M', 'BENCH-M', 'motor')")
+        max_delay_ms = app.config.WRITE_BEHIND_MAX_DELAY_MS if args.max_delay_ms is None else args.max_delay_ms
+
+        print(f"{'mode':<8}{'clients':>8}{'rows/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'batch mean':>12}{'batch max':>11}{'503s':>7}")
+        for clients in args.clients:
+            for mode in MODES:
+                result = asyncio.run(run_mode(app, mode, clients, args.seconds, max_delay_ms))
+                print(f"{mode:<8}{clients:>8}{result['rows_per_second']:>10.0f}{result['p50_ms']:>9.2f}"
+                      f"{result['p99_ms']:>9.2f}{result['mean_batch_rows']:>12.1f}{result['max_batch_rows']:>11}{result['rejected']:>7}")
+
+        app.db_executor.shutdown()
+        app.db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Shared helpers for the HTTP benchmarks."""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+MOTOR_READING = {
+    "current_phase_a": 10.2, "current_phase_b": 10.4, "current_phase_c": 10.1,
+    "power_consumption": 6.3, "power_factor": 0.88, "vibration": 0.45,
+    "temperature": 44.1, "speed": 1500.0,
+}
+BLADE_READING = {"vibration": 0.6, "torque": 21.0, "speed": 1200.0, "noise": 68.0, "temperature": 35.0}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@contextmanager
+def local_server(env: dict = None, command: list = None, startup_timeout: float = 60.0):
+    """Start the app on a free port with a throwaway database; yields the base URL"""
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        server_env = dict(os.environ, DT_DB_PATH=os.path.join(tmp, "bench.db"), **(env or {}))
+        command = command or [sys.executable, "-m", "uvicorn", "app:app", "--log-level", "warning"]
+        process = subprocess.Popen(
+            command + ["--host", "127.0.0.1", "--port", str(port)],
+            cwd=APP_DIR, env=server_env,
+        )
+        url = f"http://127.0.0.1:{port}"
+        try:
+            deadline = time.monotonic() + startup_timeout
+            while True:
+                try:
+                    httpx.get(f"{url}/machines/", timeout=1.0).raise_for_status()
+                    break
+                except httpx.HTTPError:
+                    if process.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError("Server failed to start")
+                    time.sleep(0.2)
+            yield url
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+def register_machine(url: str, machine_id: str, machine_type: str, **fields):
+    response = httpx.post(f"{url}/machines/", json={
+        "machine_id": machine_id, "name": machine_id, "type": machine_type, **fields
+    })
+    # 400 means it already exists, which is fine for repeated runs
+    if response.status_code not in (200, 400):
+        response.raise_for_status()
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
@@ -0,0 +1,121 @@
+"""Concurrent read/write throughput: pooled WAL storage vs connect-per-request.
+
+Run from the digital_twin directory:
+
+    python benchmarks/load_storage.py [--threads 1 4 8] [--seconds 3] [--write-ratio 0.3]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from storage import ConnectionPool  # noqa: E402
+
+MACHINES = [f"M{i:03d}" for i in range(50)]
+
+class NaiveStorage:
+    """The old get_db(): a fresh rollback-journal connection per request"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._open = []
+    
+    def open(self):
+        pass
+    
+    def close(self):
+        for conn in self._open:
+            conn.close()
+    
+    @contextmanager
+    def connection(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row
+        self._open.append(conn)  # never closed by the request, like get_db()
+        yield conn
+    
+    @contextmanager
+    def transaction(self):
+        with self.connection() as conn:
+            yield conn
+            conn.commit()
+
+def prepare(path):
+    conn = sqlite3.connect(path)
+    with open('schema.sql') as f:
+        conn.executescript(f.read())
+    conn.executemany(
+        "INSERT INTO machines (machine_id, name, type) VALUES (?, ?, 'motor')",
+        [(machine_id, machine_id) for machine_id in MACHINES]
+    )
+    conn.commit()
+    conn.close()
+
+def worker(storage, deadline, write_ratio, counts, errors):
+    rng = random.Random(threading.get_ident())
+    reads = writes = failed = 0
+    while time.perf_counter() < deadline:
+        machine_id = rng.choice(MACHINES)
+        try:
+            if rng.random() < write_ratio:
+                with storage.transaction() as conn:
+                    conn.execute(
+                        "INSERT INTO predictions (machine_id, health_status, rul_hours, confidence, maintenance_required) VALUES (?, 'Normal', 900.0, 0.99, 0)",
+                        (machine_id,)
+                    )
+                    conn.execute(
+                        "INSERT INTO sensor_readings (machine_id, vibration, temperature, speed) VALUES (?, 0.4, 44.0, 1500.0)",
+                        (machine_id,)
+                    )
+                writes += 1
+            else:
+                with storage.connection() as conn:
+                    conn.execute("SELECT type FROM machines WHERE machine_id = ?", (machine_id,)).fetchone()
+                    conn.execute("SELECT * FROM machines ORDER BY installation_date DESC").fetchall()
+                reads += 1
+        except sqlite3.Error:
+            failed += 1
+    counts.append((reads, writes))
+    errors.append(failed)
+
+def run(label, make_storage, threads, seconds, write_ratio):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'load.db')
+        prepare(path)
+        storage = make_storage(path, threads)
+        storage.open()
+        counts, errors = [], []
+        deadline = time.perf_counter() + seconds
+        pool = [threading.Thread(target=worker, args=(storage, deadline, write_ratio, counts, errors)) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        storage.close()
+    
+    reads = sum(r for r, _ in counts)
+    writes = sum(w for _, w in counts)
+    print(f"{label:<8}{threads:>8}{reads / seconds:>12.0f}{writes / seconds:>12.0f}{sum(errors):>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    args = parser.parse_args()
+    
+    print(f"{'storage':<8}{'threads':>8}{'reads/s':>12}{'writes/s':>12}{'errors':>8}")
+    for threads in args.threads:
+        run('naive', lambda path, n: NaiveStorage(path), threads, args.seconds, args.write_ratio)
+        run('pooled', lambda path, n: ConnectionPool(path, size=n), threads, args.seconds, args.write_ratio)
+
+if __name__ == "__main__":
+    main()
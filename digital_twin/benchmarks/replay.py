@@ -0,0 +1,207 @@
+"""Replay the bundled sensor datasets against POST /predict/ and report serving metrics.
+
+Registers N virtual motors and/or blades, then streams rows from the CSV
+datasets (or files produced by datasets/dataset.py) through concurrent
+asyncio HTTP clients, either as fast as possible or at a fixed target rate.
+Requests are scheduled open-loop at the target rate and latency is measured
+from the scheduled send time, so a server that falls behind shows up in the
+percentiles instead of silently lowering the offered load.
+
+Reports throughput, latency percentiles, status codes / error rate and
+database growth (from /stats/).  Starts a local uvicorn server with a
+throwaway database unless --url is given.  Run from the digital_twin directory:
+
+    python benchmarks/replay.py [--machines 20] [--duration 30] [--rate 200] [--json results.json]
+    python benchmarks/replay.py --dataset combined --concurrency 64 --requests 20000
+    python benchmarks/replay.py --motor-file ../datasets/generated/motor --blade-file ../datasets/generated/blade
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import httpx
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import APP_DIR, local_server, percentile, register_machine  # noqa: E402
+
+DATASETS_DIR = APP_DIR.parent / "datasets"
+
+# CSV column -> SensorData field, per dataset layout
+MOTOR_COLUMNS = {
+    "PhaseA_Current": "current_phase_a", "PhaseB_Current": "current_phase_b", "PhaseC_Current": "current_phase_c",
+    "Power_Consumption": "power_consumption", "Power_Factor": "power_factor",
+    "Vibration": "vibration", "Temp": "temperature", "Speed": "speed",
+}
+BLADE_COLUMNS = {"Vibration": "vibration", "Torque": "torque", "Speed": "speed", "Noise": "noise", "Temp": "temperature"}
+# The combined dataset only has the mean motor current and no power factor or motor speed
+COMBINED_MOTOR_COLUMNS = {
+    "Motor_Current": ("current_phase_a", "current_phase_b", "current_phase_c"),
+    "Motor_Power": "power_consumption", "Motor_Vibration": "vibration", "Motor_Temp": "temperature",
+}
+COMBINED_BLADE_COLUMNS = {
+    "Blade_Vibration": "vibration", "Blade_Torque": "torque", "Blade_Speed": "speed",
+    "Blade_Noise": "noise", "Blade_Temp": "temperature",
+}
+
+def read_frame(path: Path, max_rows: int) -> pd.DataFrame:
+    """A CSV file, or every CSV in a directory (dataset.py output), capped at max_rows"""
+    files = sorted(path.glob("*.csv")) if path.is_dir() else [path]
+    frames, remaining = [], max_rows
+    for file in files:
+        if remaining <= 0:
+            break
+        frames.append(pd.read_csv(file, nrows=remaining))
+        remaining -= len(frames[-1])
+    return pd.concat(frames, ignore_index=True)
+
+def to_readings(frame: pd.DataFrame, columns: dict) -> list:
+    """Rows as SensorData field dicts (without machine_id)"""
+    fields = {}
+    for column, names in columns.items():
+        for name in (names if isinstance(names, tuple) else (names,)):
+            fields[name] = frame[column].to_numpy(dtype=float)
+    return [dict(zip(fields, values)) for values in zip(*(array.tolist() for array in fields.values()))]
+
+def load_sources(args) -> dict:
+    """{machine_type: [reading fields, ...]} for the requested dataset"""
+    if args.dataset == "combined":
+        frame = read_frame(args.combined_file, args.max_rows)
+        sources = {"motor": to_readings(frame, COMBINED_MOTOR_COLUMNS), "blade": to_readings(frame, COMBINED_BLADE_COLUMNS)}
+    else:
+        sources = {}
+        if args.dataset in ("motor", "both"):
+            sources["motor"] = to_readings(read_frame(args.motor_file, args.max_rows), MOTOR_COLUMNS)
+        if args.dataset in ("blade", "both"):
+            sources["blade"] = to_readings(read_frame(args.blade_file, args.max_rows), BLADE_COLUMNS)
+    return sources
+
+def request_stream(sources: dict, machines: int, prefix: str):
+    """Endless round-robin over virtual machines; each replays its own slice of the data"""
+    cursors = []
+    for machine_type, rows in sources.items():
+        for index in range(machines):
+            machine_id = f"{prefix}-{machine_type[0].upper()}{index + 1:04d}"
+            offset = index * len(rows) // machines
+            cursors.append((machine_id, itertools.islice(itertools.cycle(rows), offset, None)))
+    for machine_id, rows in itertools.cycle(cursors):
+        yield {"machine_id": machine_id, **next(rows)}
+
+async def fetch_stats(http) -> dict:
+    try:
+        response = await http.get("/stats/")
+        return response.json() if response.status_code == 200 else {}
+    except httpx.HTTPError:
+        return {}
+
+async def replay(url, sources, args) -> dict:
+    stream = request_stream(sources, args.machines, args.prefix)
+    latencies, statuses = [], {}
+    sent = 0
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as http:
+        before = await fetch_stats(http)
+        start = time.perf_counter()
+        deadline = start + args.duration if args.duration else None
+
+        async def client():
+            nonlocal sent
+            while True:
+                if (args.requests and sent >= args.requests) or (deadline and time.perf_counter() >= deadline):
+                    return
+                index = sent
+                sent += 1
+                reading = next(stream)
+                # Open-loop schedule: request i is due at start + i / rate
+                scheduled = start + index / args.rate if args.rate else time.perf_counter()
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    response = await http.post("/predict/", json=reading)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] = statuses.get(type(e).__name__, 0) + 1
+                latencies.append(time.perf_counter() - scheduled)
+
+        await asyncio.gather(*(client() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+        after = await fetch_stats(http)
+
+    latencies.sort()
+    ok = statuses.get(200, 0)
+    db_before = (before.get("database") or {}).get("bytes")
+    db_after = (after.get("database") or {}).get("bytes")
+    return {
+        "requests": len(latencies),
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed,
+        "target_rps": args.rate or None,
+        "latency_ms": {
+            name: percentile(latencies, q) * 1e3
+            for name, q in (("p50", 50), ("p90", 90), ("p99", 99), ("p99.9", 99.9), ("max", 100))
+        },
+        "latency_mean_ms": float(np.mean(latencies)) * 1e3 if latencies else None,
+        "status_codes": {str(code): count for code, count in sorted(statuses.items(), key=str)},
+        "error_rate": 1 - ok / len(latencies) if latencies else None,
+        "db_growth_bytes": db_after - db_before if db_before is not None and db_after is not None else None,
+        "db_bytes_per_reading": (db_after - db_before) / ok if ok and db_before is not None and db_after is not None else None,
+    }
+
+def print_report(result: dict):
+    latency = result["latency_ms"]
+    print(f"requests      {result['requests']} in {result['elapsed_seconds']:.1f}s")
+    target = f" (target {result['target_rps']:.0f})" if result["target_rps"] else ""
+    print(f"throughput    {result['throughput_rps']:.0f} req/s{target}")
+    print("latency ms    " + "  ".join(f"{name} {value:.1f}" for name, value in latency.items()))
+    print(f"status codes  {result['status_codes']}  error rate {result['error_rate']:.2%}")
+    if result["db_growth_bytes"] is not None:
+        print(f"db growth     {result['db_growth_bytes'] / 1e6:.2f} MB"
+              f" ({result['db_bytes_per_reading'] or 0:.0f} bytes/reading)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="replay against an already running server")
+    parser.add_argument('--dataset', choices=('both', 'motor', 'blade', 'combined'), default='both')
+    parser.add_argument('--motor-file', type=Path, default=DATASETS_DIR / "motor_dataset_consistent.csv")
+    parser.add_argument('--blade-file', type=Path, default=DATASETS_DIR / "blade_dataset.csv")
+    parser.add_argument('--combined-file', type=Path, default=DATASETS_DIR / "combined_dataset_consistent.csv")
+    parser.add_argument('--max-rows', type=int, default=100000, help="rows loaded per file")
+    parser.add_argument('--machines', type=int, default=10, help="virtual machines per machine type")
+    parser.add_argument('--prefix', default='REPLAY')
+    parser.add_argument('--rate', type=float, default=0, help="target requests/s (0 = as fast as possible)")
+    parser.add_argument('--concurrency', type=int, default=32, help="concurrent HTTP clients")
+    parser.add_argument('--requests', type=int, default=0, help="stop after this many requests")
+    parser.add_argument('--duration', type=float, default=0, help="stop after this many seconds")
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--json', type=Path, help="also write the results to this file")
+    args = parser.parse_args()
+    if not args.requests and not args.duration:
+        args.requests = 2000
+
+    sources = load_sources(args)
+    with (nullcontext(args.url) if args.url else local_server()) as url:
+        for machine_type in sources:
+            for index in range(args.machines):
+                register_machine(url, f"{args.prefix}-{machine_type[0].upper()}{index + 1:04d}", machine_type,
+                                 location=f"Replay line {index % 4 + 1}")
+        result = asyncio.run(replay(url, sources, args))
+
+    result["config"] = {
+        "dataset": args.dataset, "machines": args.machines, "concurrency": args.concurrency,
+        "rate": args.rate, "requests": args.requests, "duration": args.duration,
+    }
+    print_report(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
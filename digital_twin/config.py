@@ -0,0 +1,131 @@
+import os
+
+# Runtime settings, overridable through environment variables
+
+# Inference backend: 'sklearn' (default) or 'compiled' (flattened tree arrays, see tree_engine.py)
+INFERENCE_BACKEND = os.environ.get('DT_INFERENCE_BACKEND', 'sklearn').lower()
+
+# Largest batch scored by the compiled backend; bigger batches go to sklearn's
+# Cython tree traversal, which wins once per-call overhead is amortized
+COMPILED_MAX_BATCH = int(os.environ.get('DT_COMPILED_MAX_BATCH', '64'))
+
+# SQLite database file and connection pool size
+DB_PATH = os.environ.get('DT_DB_PATH', 'inventory.db')
+DB_POOL_SIZE = int(os.environ.get('DT_DB_POOL_SIZE', '8'))
+
+# Worker pools (see executors.py). Inference runs on 'thread' or 'process'
+# workers; queue limits bound how many jobs may wait before requests get a 503.
+INFERENCE_EXECUTOR = os.environ.get('DT_INFERENCE_EXECUTOR', 'thread').lower()
+INFERENCE_WORKERS = int(os.environ.get('DT_INFERENCE_WORKERS', '2'))
+INFERENCE_MAX_QUEUE = int(os.environ.get('DT_INFERENCE_MAX_QUEUE', '64'))
+DB_WORKERS = int(os.environ.get('DT_DB_WORKERS', str(DB_POOL_SIZE)))
+DB_MAX_QUEUE = int(os.environ.get('DT_DB_MAX_QUEUE', '256'))
+
+# Micro-batching of concurrent single-reading /predict/ calls (see batching.py)
+MICROBATCH_ENABLED = os.environ.get('DT_MICROBATCH_ENABLED', '1') == '1'
+MICROBATCH_MAX_SIZE = int(os.environ.get('DT_MICROBATCH_MAX_SIZE', '32'))
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get('DT_MICROBATCH_MAX_WAIT_MS', '2'))
+
+# Retention job (see retention.py), off unless enabled: raw readings older
+# than RETENTION_RAW_DAYS are rolled up into minute/hour buckets and deleted,
+# and predictions older than RETENTION_PREDICTION_DAYS are deleted. A value of
+# 0 keeps them forever, like HISTORY_RETENTION_DAYS. The first pass runs one
+# interval after startup.
+RETENTION_ENABLED = os.environ.get('DT_RETENTION_ENABLED', '0') == '1'
+RETENTION_RAW_DAYS = float(os.environ.get('DT_RETENTION_RAW_DAYS', '0'))
+RETENTION_RESOLUTION = os.environ.get('DT_RETENTION_RESOLUTION', 'minute')
+RETENTION_PREDICTION_DAYS = float(os.environ.get('DT_RETENTION_PREDICTION_DAYS', '0'))
+RETENTION_INTERVAL_MINUTES = float(os.environ.get('DT_RETENTION_INTERVAL_MINUTES', '60'))
+
+# Streaming ingestion (see ingest.py): buffered rows are written in one
+# transaction once FLUSH_ROWS accumulate or every FLUSH_INTERVAL seconds
+INGEST_FLUSH_ROWS = int(os.environ.get('DT_INGEST_FLUSH_ROWS', '500'))
+INGEST_FLUSH_INTERVAL = float(os.environ.get('DT_INGEST_FLUSH_INTERVAL', '1.0'))
+
+# Server-Sent Events (see events.py): per-client queue bound and keep-alive period
+EVENTS_MAX_QUEUE = int(os.environ.get('DT_EVENTS_MAX_QUEUE', '256'))
+EVENTS_KEEPALIVE_SECONDS = float(os.environ.get('DT_EVENTS_KEEPALIVE_SECONDS', '15'))
+
+# Machine registry cache (see registry.py)
+REGISTRY_MAX_SIZE = int(os.environ.get('DT_REGISTRY_MAX_SIZE', '10000'))
+
+# Prediction cache (see prediction_cache.py). Features are quantized with
+# PREDICTION_CACHE_QUANTUM (0 = exact match) unless overridden per feature,
+# e.g. DT_PREDICTION_CACHE_QUANTA="vibration=0.01,temperature=0.1"
+PREDICTION_CACHE_ENABLED = os.environ.get('DT_PREDICTION_CACHE_ENABLED', '0') == '1'
+PREDICTION_CACHE_QUANTUM = float(os.environ.get('DT_PREDICTION_CACHE_QUANTUM', '0'))
+PREDICTION_CACHE_QUANTA = os.environ.get('DT_PREDICTION_CACHE_QUANTA', '')
+PREDICTION_CACHE_MAX_SIZE = int(os.environ.get('DT_PREDICTION_CACHE_MAX_SIZE', '50000'))
+PREDICTION_CACHE_TTL_SECONDS = float(os.environ.get('DT_PREDICTION_CACHE_TTL_SECONDS', '300'))
+
+# Model bundles (see model_registry.py). MODEL_WATCH_SECONDS > 0 polls
+# MODEL_DIR and hot-swaps the newest bundle; 0 leaves reloads to /admin/models.
+# Admin routes require the X-Admin-Token header and answer 403 while ADMIN_TOKEN is unset.
+MODEL_DIR = os.environ.get('DT_MODEL_DIR', 'model_bundles')
+MODEL_FALLBACK_DIR = os.environ.get('DT_MODEL_FALLBACK_DIR', 'saved_models')
+MODEL_HISTORY = int(os.environ.get('DT_MODEL_HISTORY', '2'))
+MODEL_WATCH_SECONDS = float(os.environ.get('DT_MODEL_WATCH_SECONDS', '0'))
+ADMIN_TOKEN = os.environ.get('DT_ADMIN_TOKEN', '')
+
+# Model artifact format: 'compiled' memory-maps the .npy trees written by
+# `python model_registry.py compile|publish` and never imports sklearn;
+# 'pickle' loads the joblib files; 'auto' prefers compiled when present,
+# unless DT_INFERENCE_BACKEND=sklearn is set explicitly, and keeps the pickles
+# for batches above COMPILED_MAX_BATCH, loaded when the first one arrives.
+# `compile` writes the fallback directory's trees under MODEL_COMPILED_DIR,
+# one directory per set of pickles.
+# Machine types load on first use unless listed in MODEL_PRELOAD ("motor,blade").
+MODEL_FORMAT = os.environ.get('DT_MODEL_FORMAT', 'auto').lower()
+if MODEL_FORMAT == 'auto' and os.environ.get('DT_INFERENCE_BACKEND', '').lower() == 'sklearn':
+    MODEL_FORMAT = 'pickle'
+MODEL_COMPILED_DIR = os.environ.get('DT_MODEL_COMPILED_DIR', 'compiled_models')
+MODEL_PRELOAD = [name for name in os.environ.get('DT_MODEL_PRELOAD', '').split(',') if name]
+
+# Rolling-window features per machine (see feature_engine.py). FEATURES_SMOOTHING
+# selects what the models score: 'raw' readings, 'ewma' or the rolling 'mean'.
+FEATURES_ENABLED = os.environ.get('DT_FEATURES_ENABLED', '1') == '1'
+FEATURES_WINDOW = int(os.environ.get('DT_FEATURES_WINDOW', '60'))
+FEATURES_EWMA_ALPHA = float(os.environ.get('DT_FEATURES_EWMA_ALPHA', '0.2'))
+FEATURES_MAX_MACHINES = int(os.environ.get('DT_FEATURES_MAX_MACHINES', '10000'))
+FEATURES_SMOOTHING = os.environ.get('DT_FEATURES_SMOOTHING', 'raw').lower()
+
+# Bulk import (see bulk_import.py): rows per transaction, and upload size kept
+# in memory before spooling to a temporary file
+IMPORT_CHUNK_ROWS = int(os.environ.get('DT_IMPORT_CHUNK_ROWS', '50000'))
+IMPORT_SPOOL_BYTES = int(os.environ.get('DT_IMPORT_SPOOL_BYTES', str(64 * 1024 * 1024)))
+
+# Instrumentation (see metrics.py): per-stage timing histograms served at
+# /metrics. PROFILE_SLOW_MS > 0 starts a sampling profiler that writes
+# collapsed-stack flame-graph data for slower requests to PROFILE_DIR.
+METRICS_ENABLED = os.environ.get('DT_METRICS_ENABLED', '1') == '1'
+PROFILE_SLOW_MS = float(os.environ.get('DT_PROFILE_SLOW_MS', '0'))
+PROFILE_INTERVAL_MS = float(os.environ.get('DT_PROFILE_INTERVAL_MS', '5'))
+PROFILE_DIR = os.environ.get('DT_PROFILE_DIR', 'profiles')
+PROFILE_COOLDOWN_SECONDS = float(os.environ.get('DT_PROFILE_COOLDOWN_SECONDS', '10'))
+
+# Write-behind buffer for prediction rows (see write_behind.py): 'flush' acks a
+# request once the batch holding its rows has committed, 'async' acks right
+# away (fire-and-forget, buffered rows are lost on a crash), 'off' commits one
+# transaction per request. Batches are written at MAX_ROWS or after MAX_DELAY_MS
+# (0 = whenever the writer is free; rows arriving during a write share the next one).
+WRITE_BEHIND_MODE = os.environ.get('DT_WRITE_BEHIND_MODE', 'flush').lower()
+WRITE_BEHIND_MAX_ROWS = int(os.environ.get('DT_WRITE_BEHIND_MAX_ROWS', '1000'))
+WRITE_BEHIND_MAX_DELAY_MS = float(os.environ.get('DT_WRITE_BEHIND_MAX_DELAY_MS', '0'))
+WRITE_BEHIND_MAX_PENDING = int(os.environ.get('DT_WRITE_BEHIND_MAX_PENDING', '20000'))
+
+# Multi-worker server (see serve.py): worker processes (0 = one per CPU) and
+# how long a replacement worker gets to start before its predecessor is
+# stopped during a SIGHUP model reload
+SERVER_WORKERS = int(os.environ.get('DT_WORKERS', '0'))
+SERVER_RESTART_GRACE_SECONDS = float(os.environ.get('DT_RESTART_GRACE_SECONDS', '5'))
+
+# Sensor history backend (see history_store.py): 'sqlite' stores a
+# sensor_readings row per reading; 'columnar' stores per-machine, per-day
+# column chunks under HISTORY_DIR while machines and predictions stay in
+# SQLite. The retention job compresses finished days and, with
+# HISTORY_RETENTION_DAYS > 0, deletes older ones. HISTORY_CACHE_MB bounds the
+# decompressed days kept in memory.
+HISTORY_BACKEND = os.environ.get('DT_HISTORY_BACKEND', 'sqlite').lower()
+HISTORY_DIR = os.environ.get('DT_HISTORY_DIR', 'history')
+HISTORY_CACHE_MB = float(os.environ.get('DT_HISTORY_CACHE_MB', '64'))
+HISTORY_RETENTION_DAYS = float(os.environ.get('DT_HISTORY_RETENTION_DAYS', '0'))
@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+# In-process publish/subscribe for health updates.
+#
+# Prediction paths publish one event per scored reading; every /events
+# subscriber owns a bounded queue and an optional machine/location filter.
+# A slow client never blocks publishers: when its queue is full the oldest
+# event is dropped, since only the newest state per machine matters to a
+# dashboard.
+
+class Subscription:
+    def __init__(self, machine_ids=None, locations=None, max_queue: int = 256):
+        self.machine_ids = set(machine_ids) if machine_ids else None
+        self.locations = set(locations) if locations else None
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+    
+    def matches(self, event: dict) -> bool:
+        if self.machine_ids is not None and event['machine_id'] not in self.machine_ids:
+            return False
+        if self.locations is not None and event.get('location') not in self.locations:
+            return False
+        return True
+    
+    def offer(self, event: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+class EventBroker:
+    def __init__(self, max_queue: int = 256):
+        self.max_queue = max_queue
+        self._subscriptions = set()
+        self.published = 0
+    
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+    
+    def subscribe(self, machine_ids=None, locations=None) -> Subscription:
+        subscription = Subscription(machine_ids, locations, self.max_queue)
+        self._subscriptions.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+    
+    def publish(self, events: list):
+        """Fan events out to matching subscribers; only called from the event loop"""
+        self.published += len(events)
+        for subscription in self._subscriptions:
+            for event in events:
+                if subscription.matches(event):
+                    subscription.offer(event)
+    
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscriptions),
+            "published": self.published,
+            "dropped": sum(subscription.dropped for subscription in self._subscriptions),
+        }
+
+def format_sse(event: dict, name: str = "health") -> str:
+    return f"event: {name}\ndata: {json.dumps(event)}\n\n"
@@ -0,0 +1,91 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Worker pools that keep blocking work off the asyncio event loop.
+#
+# Every route is ``async def``, so a blocking sqlite3 call or a CPU-bound model
+# evaluation run inline stalls every other request.  Work is dispatched to a
+# bounded executor instead.  Each executor admits at most ``max_workers``
+# running plus ``max_queue`` waiting jobs; beyond that submit() fails fast with
+# ExecutorOverloaded so callers can shed load instead of queueing unboundedly.
+
+class ExecutorOverloaded(Exception):
+    def __init__(self, name: str):
+        super().__init__(f"{name} executor queue is full")
+        self.name = name
+
+class BoundedExecutor:
+    def __init__(self, name: str, max_workers: int, max_queue: int, kind: str = 'thread', initializer=None):
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.initializer = initializer
+        self._executor = None
+        self._in_flight = 0
+        self.rejected = 0
+    
+    def _create(self):
+        if self.kind == 'process':
+            return ProcessPoolExecutor(max_workers=self.max_workers, initializer=self.initializer)
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=self.name,
+            initializer=self.initializer,
+        )
+    
+    def start(self):
+        if self._executor is None:
+            self._executor = self._create()
+    
+    async def restart(self, initializer=None):
+        """Swap in a fresh pool; jobs already running finish on the old one.
+        
+        Every worker of the new pool runs initializer() before its first job,
+        however the pool hands out work; one round trip is made before the
+        swap so a failing initializer breaks the new pool, not live traffic.
+        """
+        previous_initializer = self.initializer
+        if initializer is not None:
+            self.initializer = initializer
+        executor = self._create()
+        try:
+            await asyncio.get_running_loop().run_in_executor(executor, os.getpid)
+        except BaseException:
+            self.initializer = previous_initializer
+            executor.shutdown(wait=False)
+            raise
+        previous, self._executor = self._executor, executor
+        if previous is not None:
+            previous.shutdown(wait=False)
+    
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+    
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.max_workers)
+    
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "rejected": self.rejected,
+        }
+    
+    async def submit(self, fn, *args):
+        """Run fn(*args) on the pool; only called from the event loop thread"""
+        if self._executor is None:
+            raise RuntimeError(f"{self.name} executor is not running")
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise ExecutorOverloaded(self.name)
+        
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._in_flight -= 1
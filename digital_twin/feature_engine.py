@@ -0,0 +1,270 @@
+import copy
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+# Streaming rolling-window features per machine.
+#
+# Each machine keeps a ring buffer (fixed-size NumPy arrays) of its last
+# `window` readings together with running sums, so every update is O(1) in
+# the window length: the evicted row is subtracted and the new one added.
+# From the sums we get the rolling mean, population std and least-squares
+# slope against reading time (units per hour), plus an EWMA over all readings.
+# Readings without a timestamp of their own are stamped on arrival; several
+# readings of one machine that arrive together are spread evenly over the time
+# since its previous reading, so a batch doesn't collapse onto one instant.
+# Motors also get a derived phase-imbalance channel: the largest deviation of a
+# phase current from the three-phase average, relative to that average (NEMA).
+#
+# Sums are kept relative to a per-channel shift and a time origin, and are
+# recomputed from the buffer every `window` updates (amortized O(1)) so float
+# drift and cancellation can't build up.
+#
+# Memory per machine is bounded: 8 bytes * (window * (channels + 1) + 6 * channels)
+# of arrays plus ~1.4 KB of object overhead.  A motor has 9 channels, so the
+# default window of 60 costs 5.2 KB of arrays, ~6.6 KB in total; at most
+# `max_machines` windows are kept (LRU), i.e. ~66 MB for 10,000 motors.
+# Only touched from the event loop.  prepare() computes the rows to score
+# without touching the windows and returns a commit() for after the prediction
+# succeeded, so a failed predict leaves the features as they were.
+
+PHASE_COLUMNS = ('current_phase_a', 'current_phase_b', 'current_phase_c')
+STATISTICS = ('mean', 'std', 'ewma', 'slope_per_hour')
+
+class RollingWindow:
+    def __init__(self, n_channels: int, size: int, alpha: float):
+        self.size = size
+        self.alpha = alpha
+        self.values = np.zeros((size, n_channels))
+        self.times = np.zeros(size)        # hours since self.origin
+        self.count = 0
+        self.position = 0
+        self.updates = 0
+        self.origin = None                 # epoch seconds
+        self.last_timestamp = None         # epoch seconds of the newest push
+        self.shift = np.zeros(n_channels)  # sums are of (value - shift)
+        self.sum = np.zeros(n_channels)
+        self.sum_sq = np.zeros(n_channels)
+        self.sum_tx = np.zeros(n_channels)
+        self.sum_t = 0.0
+        self.sum_tt = 0.0
+        self.ewma = np.zeros(n_channels)
+        self.latest = np.zeros(n_channels)
+
+    @property
+    def n_bytes(self) -> int:
+        return sum(array.nbytes for array in (
+            self.values, self.times, self.shift, self.sum, self.sum_sq, self.sum_tx, self.ewma, self.latest
+        ))
+
+    def push(self, row: np.ndarray, timestamp: float):
+        if self.origin is None:
+            self.origin = timestamp
+            self.shift[:] = row
+        t = (timestamp - self.origin) / 3600
+        self.last_timestamp = timestamp if self.last_timestamp is None else max(self.last_timestamp, timestamp)
+
+        if self.count == self.size:
+            # Evict the oldest reading, which the write position points at
+            old = self.values[self.position] - self.shift
+            old_t = self.times[self.position]
+            self.sum -= old
+            self.sum_sq -= old * old
+            self.sum_tx -= old_t * old
+            self.sum_t -= old_t
+            self.sum_tt -= old_t * old_t
+        else:
+            self.count += 1
+
+        self.values[self.position] = row
+        self.times[self.position] = t
+        new = row - self.shift
+        self.sum += new
+        self.sum_sq += new * new
+        self.sum_tx += t * new
+        self.sum_t += t
+        self.sum_tt += t * t
+
+        if self.updates == 0:
+            self.ewma[:] = row
+        else:
+            self.ewma += self.alpha * (row - self.ewma)
+        self.latest[:] = row
+        self.position = (self.position + 1) % self.size
+        self.updates += 1
+        if self.updates % self.size == 0:
+            self._resync()
+
+    def _resync(self):
+        """Recompute the sums from the buffer around its current mean and oldest time"""
+        values = self.values[:self.count]
+        times = self.times[:self.count]
+        oldest = times.min()
+        self.origin += oldest * 3600
+        self.times[:self.count] -= oldest
+        self.shift = values.mean(axis=0)
+        centered = values - self.shift
+        self.sum = centered.sum(axis=0)
+        self.sum_sq = (centered * centered).sum(axis=0)
+        self.sum_tx = times @ centered
+        self.sum_t = float(times.sum())
+        self.sum_tt = float(times @ times)
+
+    def statistics(self) -> np.ndarray:
+        """(len(STATISTICS), n_channels) array of the current rolling statistics"""
+        n = self.count
+        mean_offset = self.sum / n
+        variance = np.maximum(self.sum_sq / n - mean_offset * mean_offset, 0.0)
+        denominator = n * self.sum_tt - self.sum_t * self.sum_t
+        if n > 1 and denominator > 1e-12:
+            slope = (n * self.sum_tx - self.sum_t * self.sum) / denominator
+        else:
+            slope = np.zeros_like(self.sum)
+        return np.stack([self.shift + mean_offset, np.sqrt(variance), self.ewma, slope])
+
+class FeatureEngine:
+    def __init__(self, feature_columns: dict, window: int = 60, alpha: float = 0.2,
+                 max_machines: int = 10000, smoothing: str = 'raw', interval: float = 1.0):
+        # feature_columns: {machine_type: [feature names in model order]}
+        self.feature_columns = feature_columns
+        self.window = window
+        self.alpha = alpha
+        self.max_machines = max_machines
+        # Which values the models score: 'raw' readings, or their 'ewma' / rolling 'mean'
+        self.smoothing = smoothing
+        # Assumed seconds between readings a machine sends before its first arrival
+        self.interval = interval
+        self.channels = {
+            machine_type: list(columns) + (['phase_imbalance'] if set(PHASE_COLUMNS) <= set(columns) else [])
+            for machine_type, columns in feature_columns.items()
+        }
+        self._phase_index = {
+            machine_type: [columns.index(column) for column in PHASE_COLUMNS]
+            for machine_type, columns in feature_columns.items()
+            if set(PHASE_COLUMNS) <= set(columns)
+        }
+        self._windows = OrderedDict()  # machine_id -> (machine_type, RollingWindow)
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def feature_names(self, machine_type: str) -> list:
+        """Column names of vector(), in order"""
+        return [f'{channel}_{statistic}' for statistic in STATISTICS for channel in self.channels[machine_type]]
+
+    def _channel_values(self, machine_type: str, features: np.ndarray) -> np.ndarray:
+        phase_index = self._phase_index.get(machine_type)
+        if phase_index is None:
+            return features
+        phases = features[:, phase_index]
+        average = phases.mean(axis=1)
+        deviation = np.abs(phases - average[:, None]).max(axis=1)
+        imbalance = np.divide(deviation, average, out=np.zeros_like(average), where=average > 0)
+        return np.column_stack([features, imbalance])
+
+    def _window(self, machine_id: str, machine_type: str) -> RollingWindow:
+        item = self._windows.get(machine_id)
+        if item is not None and item[0] == machine_type:
+            self._windows.move_to_end(machine_id)
+            return item[1]
+        window = RollingWindow(len(self.channels[machine_type]), self.window, self.alpha)
+        self._windows[machine_id] = (machine_type, window)
+        if len(self._windows) > self.max_machines:
+            self._windows.popitem(last=False)
+            self.evictions += 1
+        return window
+
+    def _timestamps(self, machine_type: str, machine_ids: list) -> list:
+        """Arrival times, with each machine's readings spread since its previous one"""
+        now = time.time()
+        counts = Counter(machine_ids)
+        seen = Counter()
+        timestamps = []
+        for machine_id in machine_ids:
+            n = counts[machine_id]
+            item = self._windows.get(machine_id)
+            previous = item[1].last_timestamp if item is not None and item[0] == machine_type else None
+            spacing = (now - previous) / n if previous is not None and previous < now else self.interval
+            seen[machine_id] += 1
+            timestamps.append(now - (n - seen[machine_id]) * spacing)
+        return timestamps
+
+    def prepare(self, machine_type: str, machine_ids: list, features: np.ndarray, timestamps=None):
+        """Rows the models should score for readings in arrival order, and a commit()
+        that adds the readings to their windows once the rows have been scored.
+
+        timestamps are epoch seconds per row; None stamps the readings on arrival.
+        """
+        timestamps = self._timestamps(machine_type, machine_ids) if timestamps is None else list(timestamps)
+        values = self._channel_values(machine_type, features)
+        scored = features
+        if self.smoothing != 'raw':
+            # Push onto copies so nothing changes until commit()
+            n_features = features.shape[1]
+            scored = np.empty_like(features)
+            previews = {}
+            for row, (machine_id, row_values, timestamp) in enumerate(zip(machine_ids, values, timestamps)):
+                window = previews.get(machine_id)
+                if window is None:
+                    item = self._windows.get(machine_id)
+                    if item is not None and item[0] == machine_type:
+                        window = copy.deepcopy(item[1])
+                    else:
+                        window = RollingWindow(len(self.channels[machine_type]), self.window, self.alpha)
+                    previews[machine_id] = window
+                window.push(row_values, timestamp)
+                if self.smoothing == 'ewma':
+                    scored[row] = window.ewma[:n_features]
+                else:
+                    scored[row] = window.shift[:n_features] + window.sum[:n_features] / window.count
+
+        def commit():
+            for machine_id, row_values, timestamp in zip(machine_ids, values, timestamps):
+                self._window(machine_id, machine_type).push(row_values, timestamp)
+
+        return scored, commit
+
+    def observe(self, machine_type: str, machine_ids: list, features: np.ndarray, timestamps=None) -> np.ndarray:
+        """prepare() and commit() at once"""
+        scored, commit = self.prepare(machine_type, machine_ids, features, timestamps)
+        commit()
+        return scored
+
+    def vector(self, machine_id: str):
+        """Flat rolling-feature vector (see feature_names), or None before the first reading"""
+        item = self._windows.get(machine_id)
+        if item is None:
+            return None
+        return item[1].statistics().ravel()
+
+    def snapshot(self, machine_id: str):
+        item = self._windows.get(machine_id)
+        if item is None:
+            return None
+        machine_type, window = item
+        statistics = window.statistics()
+        return {
+            "machine_id": machine_id,
+            "machine_type": machine_type,
+            "samples": window.count,
+            "window": window.size,
+            "features": {
+                channel: {
+                    "latest": float(window.latest[index]),
+                    **{name: float(statistics[row, index]) for row, name in enumerate(STATISTICS)},
+                }
+                for index, channel in enumerate(self.channels[machine_type])
+            },
+        }
+
+    def stats(self) -> dict:
+        return {
+            "machines": len(self._windows),
+            "max_machines": self.max_machines,
+            "window": self.window,
+            "smoothing": self.smoothing,
+            "bytes": sum(window.n_bytes for _, window in self._windows.values()),
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,677 @@
+import argparse
+import fcntl
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import partial
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from retention import SENSOR_COLUMNS
+
+# Sensor history backends.
+#
+# SQLiteHistory keeps one sensor_readings row per reading, as before.
+# ColumnarHistory stores readings per machine and per UTC day as typed column
+# chunks under a directory, while machines and predictions stay in SQLite:
+#
+#   <root>/<machine_id>/<YYYY-MM-DD>.<layout>.rows   open chunk, appended
+#   <root>/<machine_id>/<YYYY-MM-DD>.<layout>.npz    sealed chunk, compressed
+#
+# A row holds uint32 milliseconds since midnight, its int64 id and float32
+# values for the sensors of its layout only, so a motor reading never pays for
+# blade columns; a machine's rows stay in one layout per day unless a reading
+# has sensors that layout lacks.  Writes append records to the open chunk of
+# their day under an flock, so several worker processes can share the store;
+# reads memory-map it and slice the mapped columns in place.  Once a day is
+# over, compact() sorts its rows and rewrites them as delta-encoded,
+# zlib-compressed columns; sealed chunks can't be mapped in place, so they are
+# decompressed once and kept in a bounded LRU of decoded days.  Time-range
+# reads binary-search each day's time column and downsampling reduces whole
+# buckets with NumPy, never materializing a row per reading.
+#
+# A reading's id is the id of the prediction made from it, so history cursors
+# (timestamp, id) stay valid as rows arrive late and days are sealed.  Readings
+# stored without a prediction get a negative id instead, READING_ID_BASE plus
+# their sequence number within the machine, day and layout, assigned under
+# the chunk lock.  Rows are kept in (second, id) order, the order SQLite pages
+# sensor_readings in.
+
+DAY_SECONDS = 86400
+DAY_MS = DAY_SECONDS * 1000
+
+# Column subsets a chunk may store; a row goes to the first layout that holds
+# all of its non-null sensors
+LAYOUTS = {
+    'blade': ['vibration', 'torque', 'speed', 'noise', 'temperature'],
+    'motor': ['current_phase_a', 'current_phase_b', 'current_phase_c',
+              'power_consumption', 'power_factor', 'vibration', 'temperature', 'speed'],
+    'full': SENSOR_COLUMNS,
+}
+LAYOUT_INDEXES = {layout: [SENSOR_COLUMNS.index(column) for column in columns] for layout, columns in LAYOUTS.items()}
+LAYOUT_NUMBERS = {layout: number for number, layout in enumerate(LAYOUTS)}
+ROW_DTYPES = {
+    layout: np.dtype([('ts', '<u4'), ('id', '<i8')] + [(column, '<f4') for column in columns])
+    for layout, columns in LAYOUTS.items()
+}
+HOT_SUFFIX = '.rows'
+SEALED_SUFFIX = '.npz'
+READING_ID_BASE = -(1 << 62)
+
+# Readings of one machine and day in (second, id) order: milliseconds since
+# midnight, row ids and {column: float32 values} for the columns stored that
+# day, NaN where a sensor has no value.  Arrays may be views of a mapped chunk.
+DayChunk = namedtuple('DayChunk', ['ts', 'id', 'columns'])
+
+HISTORY_SQL_COLUMNS = """r.id, r.timestamp, r.current_phase_a, r.current_phase_b, r.current_phase_c,
+            r.power_consumption, r.power_factor, r.vibration, r.temperature, r.speed, r.torque, r.noise,
+            r.prediction_id, p.health_status, p.rul_hours, p.confidence, p.maintenance_required"""
+
+PREDICTION_FIELDS = ('health_status', 'rul_hours', 'confidence', 'maintenance_required')
+
+def to_epoch(timestamp: str) -> int:
+    """'YYYY-MM-DD HH:MM:SS' (UTC, as stored by SQLite) -> seconds since the epoch"""
+    return int(np.datetime64(timestamp, 's').astype(np.int64))
+
+def format_epochs(seconds: np.ndarray) -> list:
+    return np.char.replace(np.datetime_as_string(seconds.astype('datetime64[s]')), 'T', ' ').tolist()
+
+def round_significant(values: np.ndarray) -> np.ndarray:
+    """Round to the 7 significant digits float32 holds, so 10.2 doesn't come back as 10.199999809"""
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        scale = 10.0 ** (6 - np.floor(np.log10(np.abs(values))))
+        return np.where(np.isfinite(scale), np.round(values * scale) / scale, values)
+
+def sensor_values(matrix: np.ndarray) -> list:
+    """Rows of float32 sensor values as lists of floats, None where missing"""
+    rounded = round_significant(matrix)
+    result = rounded.astype(object)
+    result[np.isnan(rounded)] = None
+    return result.tolist()
+
+class SQLiteHistory:
+    """Readings as sensor_readings rows, rolled up by the retention job"""
+    name = 'sqlite'
+
+    def __init__(self, db=None):
+        self.db = db
+
+    def write(self, conn, machine_ids, timestamps, values: dict, prediction_ids=None):
+        """Insert readings in the caller's transaction.
+
+        values maps sensor columns to one sequence each; columns left out are
+        NULL.  timestamps=None stamps the rows with CURRENT_TIMESTAMP.
+        """
+        # Only the given columns are bound; binding NULLs for the other type's sensors costs ~40%
+        columns = (['timestamp'] if timestamps is not None else []) + list(values)
+        params = ([timestamps] if timestamps is not None else []) + list(values.values())
+        if prediction_ids is not None:
+            columns.append('prediction_id')
+            params.append(prediction_ids)
+        conn.executemany(
+            f"""INSERT INTO sensor_readings
+            (machine_id, {', '.join(columns)})
+            VALUES ({', '.join('?' * (len(columns) + 1))})""",
+            zip(machine_ids, *params)
+        )
+
+    def page(self, machine_id: str, limit: int, cursor: tuple = None,
+             start: str = None, end: str = None) -> list:
+        """Readings with their predictions, newest first; (timestamp, id) keyset pagination"""
+        conditions = ["r.machine_id = ?"]
+        params = [machine_id]
+        if start is not None:
+            conditions.append("r.timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("r.timestamp < ?")
+            params.append(end)
+        if cursor is not None:
+            conditions.append("(r.timestamp, r.id) < (?, ?)")
+            params.extend(cursor)
+        params.append(limit)
+
+        with self.db.connection() as conn:
+            # Walks idx_sensor_readings_machine_time
+            rows = conn.execute(
+                f"""SELECT {HISTORY_SQL_COLUMNS}
+                FROM sensor_readings r
+                LEFT JOIN predictions p ON p.id = r.prediction_id
+                WHERE {" AND ".join(conditions)}
+                ORDER BY r.timestamp DESC, r.id DESC
+                LIMIT ?""",
+                params
+            ).fetchall()
+
+        history = [dict(row) for row in rows]
+        for entry in history:
+            if entry['maintenance_required'] is not None:
+                entry['maintenance_required'] = bool(entry['maintenance_required'])
+        return history
+
+    def downsample(self, machine_id: str, bucket_seconds: int, start: str = None, end: str = None) -> list:
+        """Per-bucket averages and maxima over raw readings and retention rollups, oldest first"""
+        raw_conditions, rollup_conditions = ["machine_id = :machine_id"], ["machine_id = :machine_id"]
+        if start is not None:
+            raw_conditions.append("timestamp >= :start")
+            rollup_conditions.append("bucket_start >= :start")
+        if end is not None:
+            raw_conditions.append("timestamp < :end")
+            rollup_conditions.append("bucket_start < :end")
+        columns = ", ".join(SENSOR_COLUMNS)
+        # Rollup rows are averages of sample_count readings, so every mean is weighted
+        averages = ", ".join(
+            f"SUM({column} * samples) / SUM(CASE WHEN {column} IS NOT NULL THEN samples END) AS {column}"
+            for column in SENSOR_COLUMNS
+        )
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                f"""SELECT datetime(bucket, 'unixepoch') AS bucket_start, SUM(samples) AS sample_count,
+                    {averages}, MAX(max_vibration) AS max_vibration, MAX(max_temperature) AS max_temperature
+                FROM (
+                    SELECT CAST(strftime('%s', timestamp) AS INTEGER) / :bucket * :bucket AS bucket, 1 AS samples,
+                        {columns}, vibration AS max_vibration, temperature AS max_temperature
+                    FROM sensor_readings WHERE {" AND ".join(raw_conditions)}
+                    UNION ALL
+                    SELECT CAST(strftime('%s', bucket_start) AS INTEGER) / :bucket * :bucket, sample_count,
+                        {columns}, max_vibration, max_temperature
+                    FROM sensor_readings_rollup WHERE {" AND ".join(rollup_conditions)}
+                )
+                GROUP BY bucket
+                ORDER BY bucket""",
+                {"machine_id": machine_id, "bucket": bucket_seconds, "start": start, "end": end}
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+class ColumnarHistory:
+    """Readings as per-machine, per-day column chunks under a directory"""
+    name = 'columnar'
+
+    def __init__(self, directory: str, db=None, cache_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.db = db
+        self.cache_bytes = cache_bytes
+        self._cache = OrderedDict()  # (path, mtime_ns, size) -> decoded sealed chunk
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.lost_rows = 0
+
+    # Layout on disk
+    def _machine_dir(self, machine_id: str) -> str:
+        # Any machine id becomes one safe path component ('.' is escaped so '..' can't climb)
+        return os.path.join(self.directory, quote(machine_id, safe='').replace('.', '%2E'))
+
+    def _path(self, machine_id: str, day: int, layout: str, suffix: str) -> str:
+        date = np.datetime_as_string(np.datetime64(day, 'D'))
+        return os.path.join(self._machine_dir(machine_id), f"{date}.{layout}{suffix}")
+
+    def _days(self, machine_id: str) -> list:
+        try:
+            names = os.listdir(self._machine_dir(machine_id))
+        except FileNotFoundError:
+            return []
+        days = {int(np.datetime64(name.split('.', 1)[0], 'D').astype(np.int64))
+                for name in names if name.endswith((HOT_SUFFIX, SEALED_SUFFIX))}
+        return sorted(days)
+
+    def machines(self) -> list:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(unquote(name) for name in os.listdir(self.directory))
+
+    # Writes
+    def write(self, conn, machine_ids, timestamps, values: dict, prediction_ids=None):
+        """Append readings; same arguments as SQLiteHistory.write, conn is unused.
+
+        Inside a transaction of self.db the rows are appended once it has
+        committed, so a rollback leaves no readings behind; otherwise they are
+        appended right away.
+        """
+        count = len(machine_ids)
+        if not count:
+            return
+        if timestamps is None:
+            millis = np.full(count, int(time.time() * 1000), dtype=np.int64)
+        else:
+            millis = np.asarray(timestamps, dtype='datetime64[ms]').astype(np.int64)
+        matrix = np.full((count, len(SENSOR_COLUMNS)), np.nan, dtype=np.float32)
+        for column, column_values in values.items():
+            matrix[:, SENSOR_COLUMNS.index(column)] = np.asarray(column_values, dtype=float)
+        if prediction_ids is None:
+            ids = np.full(count, -1, dtype=np.int64)
+        else:
+            ids = np.nan_to_num(np.asarray(prediction_ids, dtype=float), nan=-1).astype(np.int64)
+        present = ~np.isnan(matrix)
+        days = millis // DAY_MS
+
+        groups = {}
+        for index, key in enumerate(zip(machine_ids, days.tolist())):
+            groups.setdefault(key, []).append(index)
+        appends = []
+        for (machine_id, day), indices in groups.items():
+            layout = self._choose_layout(machine_id, day, present[indices].any(axis=0))
+            records = np.empty(len(indices), dtype=ROW_DTYPES[layout])
+            records['ts'] = millis[indices] - day * DAY_MS
+            records['id'] = ids[indices]
+            for column, column_index in zip(LAYOUTS[layout], LAYOUT_INDEXES[layout]):
+                records[column] = matrix[indices, column_index]
+            appends.append((machine_id, day, layout, records))
+
+        if self.db is not None and self.db.in_transaction():
+            self.db.after_commit(partial(self._append_committed, appends))
+        else:
+            for append in appends:
+                self._append(*append)
+
+    def _append_committed(self, appends: list):
+        # The predictions are committed already, so a failure can only be reported
+        for machine_id, day, layout, records in appends:
+            try:
+                self._append(machine_id, day, layout, records)
+            except OSError as e:
+                self.lost_rows += len(records)
+                print(f"❌ History append failed for {machine_id}, {len(records)} readings lost: {e}")
+
+    def _choose_layout(self, machine_id: str, day: int, present: np.ndarray) -> str:
+        """The layout the machine already uses that day if it fits, else the smallest that does"""
+        fitting = [layout for layout, indexes in LAYOUT_INDEXES.items() if present.sum() == present[indexes].sum()]
+        for layout in fitting:
+            if os.path.exists(self._path(machine_id, day, layout, HOT_SUFFIX)) or \
+                    os.path.exists(self._path(machine_id, day, layout, SEALED_SUFFIX)):
+                return layout
+        return fitting[0]
+
+    def _append(self, machine_id: str, day: int, layout: str, records: np.ndarray):
+        path = self._path(machine_id, day, layout, HOT_SUFFIX)
+        sealed_path = self._path(machine_id, day, layout, SEALED_SUFFIX)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        itemsize = records.dtype.itemsize
+        while True:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                status = os.fstat(fd)
+                if not status.st_nlink:
+                    # Sealed and removed while we waited for the lock; start a new open chunk
+                    continue
+                if status.st_size % itemsize:
+                    # A crash mid-append left a partial record; drop it so later rows stay aligned
+                    os.ftruncate(fd, status.st_size - status.st_size % itemsize)
+                missing = records['id'] < 0
+                if missing.any():
+                    # Rows before these ones: the sealed chunk's plus the open chunk's
+                    sealed = len(self._load_sealed(sealed_path).ts) if os.path.exists(sealed_path) else 0
+                    sequence = sealed + status.st_size // itemsize + np.arange(len(records))
+                    records = records.copy()
+                    records['id'][missing] = READING_ID_BASE + sequence[missing] * len(LAYOUTS) + LAYOUT_NUMBERS[layout]
+                data = memoryview(records.tobytes())
+                while data:
+                    data = data[os.write(fd, data):]
+                return
+            finally:
+                os.close(fd)  # also releases the lock
+
+    # Reads
+    def _read_day(self, machine_id: str, day: int) -> DayChunk:
+        parts = []
+        from_open_chunk = False
+        for layout in LAYOUTS:
+            hot_path = self._path(machine_id, day, layout, HOT_SUFFIX)
+            sealed_path = self._path(machine_id, day, layout, SEALED_SUFFIX)
+            # Shared lock: compaction can't move rows from the open chunk to the sealed one mid-read
+            fd = open_locked(hot_path, os.O_RDONLY, fcntl.LOCK_SH)
+            try:
+                if os.path.exists(sealed_path):
+                    parts.append(self._load_sealed(sealed_path))
+                if fd is not None:
+                    rows = map_rows(fd, layout)
+                    if len(rows):
+                        parts.append(rows_to_chunk(rows, layout))
+                        from_open_chunk = True
+            finally:
+                if fd is not None:
+                    os.close(fd)
+
+        if not parts:
+            return DayChunk(np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int64), {})
+        chunk = parts[0] if len(parts) == 1 else merge_chunks(parts)
+        # Sealed chunks are sorted already; open ones are in arrival order
+        return sort_chunk(chunk) if len(parts) > 1 or from_open_chunk else chunk
+
+    def _load_sealed(self, path: str) -> DayChunk:
+        status = os.stat(path)
+        key = (path, status.st_mtime_ns, status.st_size)
+        with self._lock:
+            chunk = self._cache.get(key)
+            if chunk is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return chunk
+            self.cache_misses += 1
+
+        with np.load(path) as sealed:
+            chunk = DayChunk(
+                np.cumsum(sealed['ts_delta'], dtype=np.int64).astype(np.uint32), sealed['id'],
+                {column: sealed[column] for column in sealed.files if column in SENSOR_COLUMNS},
+            )
+
+        size = chunk_bytes(chunk)
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = chunk
+                self._cached_bytes += size
+            while self._cached_bytes > self.cache_bytes and self._cache:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= chunk_bytes(evicted)
+        return chunk
+
+    def _candidate_days(self, machine_id: str, low: int, high: int) -> list:
+        """Days with chunks that overlap [low, high) (epoch seconds, None = unbounded)"""
+        return [
+            day for day in self._days(machine_id)
+            if (high is None or day * DAY_SECONDS < high) and (low is None or (day + 1) * DAY_SECONDS > low)
+        ]
+
+    def _slice_day(self, machine_id: str, day: int, low: int, high: int) -> tuple:
+        """(chunk, first, stop): positions [first, stop) of the day fall in [low, high)"""
+        chunk = self._read_day(machine_id, day)
+        # Bounds are whole seconds, so (second, id) order is sorted enough to binary-search
+        first = second_position(chunk, low - day * DAY_SECONDS) if low is not None else 0
+        stop = second_position(chunk, high - day * DAY_SECONDS) if high is not None else len(chunk.ts)
+        return chunk, first, stop
+
+    def page(self, machine_id: str, limit: int, cursor: tuple = None,
+             start: str = None, end: str = None) -> list:
+        """Same contract as SQLiteHistory.page"""
+        low = to_epoch(start) if start is not None else None
+        high = to_epoch(end) if end is not None else None
+        if cursor is not None:
+            cursor_second = to_epoch(cursor[0])
+            cursor_day = cursor_second // DAY_SECONDS
+            high = min(high, (cursor_day + 1) * DAY_SECONDS) if high is not None else (cursor_day + 1) * DAY_SECONDS
+
+        selected = []  # (day, chunk, positions), newest first
+        remaining = limit
+        # Newest first, reading each day only once the page reaches it
+        for day in reversed(self._candidate_days(machine_id, low, high)):
+            chunk, first, stop = self._slice_day(machine_id, day, low, high)
+            if cursor is not None and day == cursor_day:
+                # Rows of the cursor's second sort by id
+                second = second_position(chunk, cursor_second - day * DAY_SECONDS)
+                following = second_position(chunk, cursor_second - day * DAY_SECONDS + 1)
+                stop = min(stop, second + int(np.searchsorted(chunk.id[second:following], cursor[1])))
+            positions = np.arange(stop - 1, max(first, stop - remaining) - 1, -1)
+            if len(positions):
+                selected.append((day, chunk, positions))
+                remaining -= len(positions)
+            if not remaining:
+                break
+
+        history = []
+        for day, chunk, positions in selected:
+            timestamps = format_epochs((day * DAY_MS + chunk.ts[positions].astype(np.int64)) // 1000)
+            rows = sensor_values(chunk_values(chunk, positions))
+            for row_id, timestamp, row in zip(chunk.id[positions].tolist(), timestamps, rows):
+                entry = {"id": row_id, "timestamp": timestamp}
+                entry.update(zip(SENSOR_COLUMNS, row))
+                entry["prediction_id"] = row_id if row_id >= 0 else None
+                history.append(entry)
+        self._attach_predictions(history)
+        return history
+
+    def _attach_predictions(self, history: list):
+        """Join the prediction made from each reading, which lives in SQLite"""
+        ids = sorted({entry["prediction_id"] for entry in history if entry["prediction_id"] is not None})
+        predictions = {}
+        if ids and self.db is not None:
+            with self.db.connection() as conn:
+                rows = conn.execute(
+                    f"SELECT id, {', '.join(PREDICTION_FIELDS)} FROM predictions WHERE id IN ({', '.join('?' * len(ids))})",
+                    ids
+                ).fetchall()
+            predictions = {row['id']: row for row in rows}
+        for entry in history:
+            row = predictions.get(entry["prediction_id"])
+            for field in PREDICTION_FIELDS:
+                entry[field] = row[field] if row is not None else None
+            if entry['maintenance_required'] is not None:
+                entry['maintenance_required'] = bool(entry['maintenance_required'])
+
+    def downsample(self, machine_id: str, bucket_seconds: int, start: str = None, end: str = None) -> list:
+        """Same contract as SQLiteHistory.downsample, reduced with NumPy a day at a time"""
+        low = to_epoch(start) if start is not None else None
+        high = to_epoch(end) if end is not None else None
+        partials = []  # per day: (bucket starts, samples, sums, non-null counts, maxima)
+        for day in self._candidate_days(machine_id, low, high):
+            chunk, first, stop = self._slice_day(machine_id, day, low, high)
+            if stop <= first:
+                continue
+            window = slice(first, stop)
+            buckets = (day * DAY_MS + chunk.ts[window].astype(np.int64)) // 1000 // bucket_seconds * bucket_seconds
+            values = chunk_values(chunk, window)
+            present = ~np.isnan(values)
+            partials.append(reduce_buckets(
+                buckets, np.ones(len(buckets), dtype=np.int64),
+                np.where(present, values, 0).astype(np.float64), present.astype(np.int64),
+                values[:, [SENSOR_COLUMNS.index('vibration'), SENSOR_COLUMNS.index('temperature')]],
+            ))
+        if not partials:
+            return []
+
+        # Buckets can span days; days are in order, so merging neighbours is enough
+        buckets, samples, sums, counts, maxima = reduce_buckets(*(np.concatenate(arrays) for arrays in zip(*partials)))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            averages = round_significant(sums / counts)
+        summary = []
+        for bucket_start, sample_count, row, peaks in zip(
+                format_epochs(buckets), samples.tolist(), averages.tolist(), sensor_values(maxima)):
+            entry = {"bucket_start": bucket_start, "sample_count": sample_count}
+            entry.update((column, None if value != value else value) for column, value in zip(SENSOR_COLUMNS, row))
+            entry["max_vibration"], entry["max_temperature"] = peaks
+            summary.append(entry)
+        return summary
+
+    # Maintenance
+    def compact(self, retention_days: float = 0) -> dict:
+        """Seal the open chunks of finished days; with retention_days > 0, delete older days"""
+        started = time.perf_counter()
+        today = int(time.time()) // DAY_SECONDS
+        oldest = today - int(retention_days) if retention_days > 0 else None
+        sealed = deleted = 0
+        for machine_id in self.machines():
+            machine_dir = self._machine_dir(machine_id)
+            for name in sorted(os.listdir(machine_dir)):
+                date, layout, suffix = name.split('.', 2)
+                if '.' + suffix not in (HOT_SUFFIX, SEALED_SUFFIX):
+                    continue
+                day = int(np.datetime64(date, 'D').astype(np.int64))
+                path = os.path.join(machine_dir, name)
+                if oldest is not None and day < oldest:
+                    os.unlink(path)
+                    deleted += 1
+                elif day < today and '.' + suffix == HOT_SUFFIX:
+                    self._seal(path, self._path(machine_id, day, layout, SEALED_SUFFIX), layout)
+                    sealed += 1
+        return {"sealed_chunks": sealed, "deleted_chunks": deleted, "seconds": time.perf_counter() - started}
+
+    def _seal(self, hot_path: str, sealed_path: str, layout: str):
+        fd = open_locked(hot_path, os.O_RDWR, fcntl.LOCK_EX)
+        if fd is None:
+            return
+        try:
+            parts = [self._load_sealed(sealed_path)] if os.path.exists(sealed_path) else []
+            rows = map_rows(fd, layout)
+            if len(rows):
+                parts.append(rows_to_chunk(rows, layout))
+            if parts:
+                chunk = sort_chunk(merge_chunks(parts))
+                temporary = sealed_path + '.tmp'
+                with open(temporary, 'wb') as f:
+                    # Sorted times are mostly small, repetitive steps, which deflate far better than the
+                    # raw values; signed, since ids order the rows within a second
+                    np.savez_compressed(f, ts_delta=np.diff(chunk.ts.astype(np.int64), prepend=0).astype(np.int32),
+                                        id=chunk.id, **chunk.columns)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temporary, sealed_path)
+            # Writers waiting on the lock see the unlinked file and open a new chunk
+            os.unlink(hot_path)
+        finally:
+            os.close(fd)
+
+    def stats(self) -> dict:
+        hot_bytes = sealed_bytes = chunks = 0
+        machines = self.machines()
+        for machine_id in machines:
+            machine_dir = self._machine_dir(machine_id)
+            for name in os.listdir(machine_dir):
+                size = os.path.getsize(os.path.join(machine_dir, name))
+                if name.endswith(HOT_SUFFIX):
+                    hot_bytes += size
+                elif name.endswith(SEALED_SUFFIX):
+                    sealed_bytes += size
+                chunks += 1
+        return {
+            "backend": self.name,
+            "machines": len(machines),
+            "chunks": chunks,
+            "open_bytes": hot_bytes,
+            "sealed_bytes": sealed_bytes,
+            "cache_bytes": self._cached_bytes,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "lost_rows": self.lost_rows,
+        }
+
+def open_locked(path: str, flags: int, operation: int):
+    """Open and flock an open chunk; None if it doesn't exist (or was just sealed)"""
+    while True:
+        try:
+            fd = os.open(path, flags)
+        except FileNotFoundError:
+            return None
+        fcntl.flock(fd, operation)
+        if os.fstat(fd).st_nlink:
+            return fd
+        os.close(fd)
+
+def map_rows(fd: int, layout: str) -> np.ndarray:
+    """Memory-map the whole records of an open chunk"""
+    dtype = ROW_DTYPES[layout]
+    count = os.fstat(fd).st_size // dtype.itemsize
+    if not count:
+        return np.empty(0, dtype=dtype)
+    # The mapping outlives the descriptor, and the file if compaction removes it
+    return np.frombuffer(mmap.mmap(fd, count * dtype.itemsize, access=mmap.ACCESS_READ), dtype=dtype, count=count)
+
+def rows_to_chunk(rows: np.ndarray, layout: str) -> DayChunk:
+    """Field views of mapped records; nothing is copied"""
+    return DayChunk(rows['ts'], rows['id'], {column: rows[column] for column in LAYOUTS[layout]})
+
+def merge_chunks(parts: list) -> DayChunk:
+    """One chunk holding the rows of all parts, NaN for columns a part lacks"""
+    present = set().union(*(part.columns for part in parts))
+    columns = {
+        column: np.concatenate([part.columns.get(column, np.full(len(part.ts), np.nan, dtype=np.float32))
+                                for part in parts])
+        for column in SENSOR_COLUMNS if column in present
+    }
+    return DayChunk(np.concatenate([part.ts for part in parts]), np.concatenate([part.id for part in parts]), columns)
+
+def sort_chunk(chunk: DayChunk) -> DayChunk:
+    """The chunk in (second, id) order; returned as is when already sorted"""
+    if len(chunk.ts) < 2:
+        return chunk
+    seconds = (chunk.ts // 1000).astype(np.int64)
+    steps = np.diff(seconds)
+    if ((steps > 0) | ((steps == 0) & (np.diff(chunk.id) > 0))).all():
+        return chunk
+    # Late or out-of-order rows
+    order = np.lexsort((chunk.id, seconds))
+    return DayChunk(chunk.ts[order], chunk.id[order], {column: values[order] for column, values in chunk.columns.items()})
+
+def second_position(chunk: DayChunk, second: int) -> int:
+    """Position of the first row at or after a second of the chunk's day"""
+    return int(np.searchsorted(chunk.ts, min(max(second, 0), DAY_SECONDS) * 1000))
+
+def chunk_values(chunk: DayChunk, index) -> np.ndarray:
+    """(k, len(SENSOR_COLUMNS)) float32 values of the rows at index (a slice or positions), NaN where missing"""
+    values = np.full((len(chunk.ts[index]), len(SENSOR_COLUMNS)), np.nan, dtype=np.float32)
+    for column, column_values in chunk.columns.items():
+        values[:, SENSOR_COLUMNS.index(column)] = column_values[index]
+    return values
+
+def chunk_bytes(chunk: DayChunk) -> int:
+    return chunk.ts.nbytes + chunk.id.nbytes + sum(values.nbytes for values in chunk.columns.values())
+
+def reduce_buckets(buckets, samples, sums, counts, maxima) -> tuple:
+    """Combine consecutive entries with the same (sorted) bucket start"""
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    return (
+        buckets[starts],
+        np.add.reduceat(samples, starts),
+        np.add.reduceat(sums, starts, axis=0),
+        np.add.reduceat(counts, starts, axis=0),
+        # fmax ignores NaN, so a bucket's maximum is NaN only without any value
+        np.fmax.reduceat(maxima, starts, axis=0),
+    )
+
+def open_history(backend: str, db=None, directory: str = 'history', cache_bytes: int = 64 * 1024 * 1024):
+    if backend == 'sqlite':
+        return SQLiteHistory(db)
+    if backend == 'columnar':
+        return ColumnarHistory(directory, db, cache_bytes)
+    raise ValueError(f"Unknown history backend: {backend}")
+
+def import_sqlite(conn, store: ColumnarHistory, chunk_rows: int = 50000, progress=None) -> int:
+    """Copy sensor_readings into a columnar store; returns the number of readings"""
+    columns = ['machine_id', 'timestamp'] + SENSOR_COLUMNS + ['prediction_id']
+    cursor = conn.execute(f"SELECT {', '.join(columns)} FROM sensor_readings ORDER BY id")
+    total = 0
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            return total
+        data = dict(zip(columns, zip(*rows)))
+        # Rows imported without a timestamp default to now, like CURRENT_TIMESTAMP
+        timestamps = [timestamp or time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()) for timestamp in data['timestamp']]
+        store.write(None, data['machine_id'], timestamps,
+                    {column: data[column] for column in SENSOR_COLUMNS}, data['prediction_id'])
+        total += len(rows)
+        if progress is not None:
+            progress(total)
+
+if __name__ == "__main__":
+    import sqlite3
+
+    import config
+
+    parser = argparse.ArgumentParser(description="Maintain the columnar sensor history store")
+    parser.add_argument('command', choices=['compact', 'stats', 'import-sqlite'])
+    parser.add_argument('--dir', default=config.HISTORY_DIR)
+    parser.add_argument('--db', default=config.DB_PATH)
+    parser.add_argument('--retention-days', type=float, default=config.HISTORY_RETENTION_DAYS)
+    args = parser.parse_args()
+
+    store = ColumnarHistory(args.dir)
+    if args.command == 'import-sqlite':
+        conn = sqlite3.connect(args.db)
+        started = time.perf_counter()
+        total = import_sqlite(conn, store)
+        conn.close()
+        print(f"✅ Copied {total} readings from {args.db} in {time.perf_counter() - started:.1f}s; "
+              f"sensor_readings is left untouched")
+        print(store.compact(args.retention_days))
+    elif args.command == 'compact':
+        print(store.compact(args.retention_days))
+    else:
+        print(store.stats())
@@ -0,0 +1,144 @@
+import time
+
+import numpy as np
+
+import config
+from model_registry import ModelFormatError, ModelRegistry, load_pickled_fallback
+from tree_engine import CompiledModels
+
+# Fused inference for the gradient boosting models.
+#
+# The original prediction path called classifier.predict() and
+# classifier.predict_proba() separately, which evaluates every boosted tree
+# twice, and then ran LabelEncoder.inverse_transform() on the result.  Here the
+# classifier is evaluated once through predict_proba(); the label is the argmax
+# of the probabilities, mapped through a class array precomputed at load time.
+
+def feature_count(models: dict) -> int:
+    engine = models.get('engine')
+    return engine.n_features if engine is not None else models['scaler'].n_features_in_
+
+def prepare_bundle(models: dict):
+    """Prepare a freshly loaded machine type and warm it before it serves traffic"""
+    prepare_models(models)
+    # First calls pay for lazy allocations; take that hit at load time
+    run_models(models, np.zeros((1, feature_count(models))))
+
+# Versioned model bundles; score() always reads the active set (see model_registry.py)
+model_registry = ModelRegistry(
+    config.MODEL_DIR, config.MODEL_FALLBACK_DIR,
+    prepare=prepare_bundle, history_size=config.MODEL_HISTORY, model_format=config.MODEL_FORMAT,
+    compiled_root=config.MODEL_COMPILED_DIR,
+)
+
+def load_models(version: str = None, preload=None):
+    try:
+        preload = config.MODEL_PRELOAD if preload is None else preload
+        model_set = model_registry.activate(version, preload)
+        print(f"✅ All models loaded successfully! (version {model_set.version}, loaded: {', '.join(preload) or 'on first use'})")
+    except ModelFormatError as e:
+        # A misconfigured format would leave every prediction failing; refuse to start
+        print(f"❌ Error loading models: {e}")
+        raise
+    except Exception as e:
+        print(f"❌ Error loading models: {e}")
+
+def get_models(machine_type: str) -> dict:
+    return model_registry.active.get(machine_type)
+
+def score(machine_type: str, features: np.ndarray):
+    """Entry point for inference workers (picklable for process pools).
+
+    Returns (health_statuses, rul_predictions, probabilities, class_labels).
+    """
+    # Read the active set once so a concurrent swap can't mix versions within a call
+    models = get_models(machine_type)
+    return (*run_models(models, features), models['labels'])
+
+def score_timed(machine_type: str, features: np.ndarray):
+    """score() plus its stage timings, which process workers can't record themselves.
+
+    Returns ((health_statuses, rul_predictions, probabilities, class_labels), {stage: seconds}).
+    """
+    timings = {}
+    models = get_models(machine_type)
+    return (*run_models(models, features, timings), models['labels']), timings
+
+def bulk_score(machine_type: str, features: np.ndarray):
+    """Vectorized scoring for bulk imports: (statuses, rul_hours, confidences, maintenance_required)"""
+    health_statuses, rul_predictions, probabilities, _ = score(machine_type, features)
+    maintenance_required = [
+        get_visualization_properties(health_status, rul_prediction)[1]
+        for health_status, rul_prediction in zip(health_statuses, rul_predictions)
+    ]
+    return health_statuses, rul_predictions, probabilities.max(axis=1), maintenance_required
+
+def get_visualization_properties(health_status: str, rul_hours: float) -> tuple:
+    """Determine color and maintenance requirements"""
+    if health_status == "Critical" or rul_hours < 24:
+        return "#dc3545", True  # Red - Immediate maintenance
+    elif health_status == "Warning" or rul_hours < 168:  # 1 week
+        return "#ffc107", True   # Yellow - Schedule maintenance
+    else:
+        return "#28a745", False  # Green - No maintenance needed
+
+def prepare_models(models: dict):
+    """Precompute lookup tables used on the hot path"""
+    if 'classifier' not in models:
+        # Compiled artifact: engine and labels already come from disk
+        return
+    
+    # classifier.classes_ holds encoded ints; map them to the encoder's labels once
+    models['labels'] = np.asarray(models['encoder'].classes_)[models['classifier'].classes_]
+    
+    # Optional compiled backend; sklearn objects stay loaded as the fallback
+    models.pop('engine', None)
+    if config.INFERENCE_BACKEND == 'compiled':
+        try:
+            models['engine'] = CompiledModels.from_sklearn(models)
+        except Exception as e:
+            print(f"❌ Compiled backend unavailable, using sklearn: {e}")
+
+def run_models(models: dict, features: np.ndarray, timings: dict = None):
+    """Scale features and score them once with each model.
+
+    Returns (health_statuses, rul_predictions, probabilities), one entry per row.
+    When timings is given, seconds spent scaling and in each model are added to it.
+    """
+    started = time.perf_counter()
+    engine = models.get('engine')
+    # Large batches go to sklearn; compiled models load their pickles when the first one arrives
+    if engine is not None and (len(features) <= config.COMPILED_MAX_BATCH or not load_pickled_fallback(models)):
+        scaled_features = engine.scale_features(features)
+        scaled = time.perf_counter()
+        probabilities = engine.predict_proba(scaled_features)
+        health_statuses = models['labels'][probabilities.argmax(axis=1)]
+        classified = time.perf_counter()
+        rul_predictions = engine.predict_rul(scaled_features)
+    else:
+        # Classifier and regressor share the same scaled input
+        scaled_features = models['scaler'].transform(features)
+        scaled = time.perf_counter()
+        
+        # Single pass over the classifier trees
+        probabilities = models['classifier'].predict_proba(scaled_features)
+        health_statuses = models['labels'][probabilities.argmax(axis=1)]
+        classified = time.perf_counter()
+        
+        # Single pass over the regressor trees
+        rul_predictions = models['regressor'].predict(scaled_features)
+    
+    if timings is not None:
+        timings['scaling'] = scaled - started
+        timings['classifier'] = classified - scaled
+        timings['regressor'] = time.perf_counter() - classified
+    return health_statuses, rul_predictions, probabilities
+
+def run_models_unfused(models: dict, features: np.ndarray):
+    """Original four-call path, kept as the baseline for benchmarks"""
+    scaled_features = models['scaler'].transform(features)
+    health_encoded = models['classifier'].predict(scaled_features)
+    health_statuses = models['encoder'].inverse_transform(health_encoded)
+    rul_predictions = models['regressor'].predict(scaled_features)
+    probabilities = models['classifier'].predict_proba(scaled_features)
+    return health_statuses, rul_predictions, probabilities
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+# Streaming ingestion sessions.
+#
+# A gateway keeps one connection open (WebSocket or chunked NDJSON) and pushes
+# readings continuously.  Compared with one POST per reading, a session
+# resolves each machine's type once per connection, scores whatever readings
+# arrived together as one batch per machine type, and persists rows in
+# periodic bulk writes instead of one transaction per reading.  Rows stay
+# buffered until a write succeeds, so a failed flush is retried by the next one.
+
+class IngestStoreError(Exception):
+    """Readings were scored but the buffered rows could not be written yet"""
+    def __init__(self, error: Exception, results: list):
+        super().__init__(str(error))
+        self.results = results
+
+class IngestSession:
+    def __init__(self, resolve_types, predict, store, flush_rows: int = 500, flush_interval: float = 1.0):
+        # resolve_types(machine_ids) -> awaitable {machine_id: type}
+        # predict(machine_type, readings) -> awaitable [PredictionResponse]
+        # store(readings, predictions) -> awaitable, writes one transaction
+        self.resolve_types = resolve_types
+        self.predict = predict
+        self.store = store
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.machine_types = {}
+        self._readings = []
+        self._predictions = []
+        self._flusher = None
+        self._lock = asyncio.Lock()
+        self.received = 0
+        self.stored = 0
+    
+    async def __aenter__(self):
+        self._flusher = asyncio.create_task(self._flush_periodically())
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self._flusher.cancel()
+        await asyncio.gather(self._flusher, return_exceptions=True)
+        # Persist whatever is still buffered when the stream ends
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"❌ Ingest flush failed, {len(self._readings)} rows lost: {e}")
+    
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Ingest flush failed: {e}")
+    
+    async def flush(self):
+        async with self._lock:
+            if not self._readings:
+                return
+            # process() may append while the write is in flight
+            count = len(self._readings)
+            await self.store(self._readings[:count], self._predictions[:count])
+            del self._readings[:count], self._predictions[:count]
+            self.stored += count
+    
+    async def process(self, readings: list) -> list:
+        """Score readings; returns one result dict per reading, in order"""
+        self.received += len(readings)
+        
+        unknown = sorted({reading.machine_id for reading in readings} - self.machine_types.keys())
+        if unknown:
+            self.machine_types.update(await self.resolve_types(unknown))
+        
+        results = [None] * len(readings)
+        groups = {}
+        for index, reading in enumerate(readings):
+            machine_type = self.machine_types.get(reading.machine_id)
+            if machine_type is None:
+                results[index] = {"machine_id": reading.machine_id, "error": "Machine not found"}
+            else:
+                groups.setdefault(machine_type, []).append(index)
+        
+        for machine_type, indices in groups.items():
+            group_readings = [readings[i] for i in indices]
+            predictions = await self.predict(machine_type, group_readings)
+            for index, reading, prediction in zip(indices, group_readings, predictions):
+                results[index] = {"machine_id": reading.machine_id, **prediction.dict()}
+            self._readings.extend(group_readings)
+            self._predictions.extend(predictions)
+        
+        if len(self._readings) >= self.flush_rows:
+            try:
+                await self.flush()
+            except Exception as e:
+                raise IngestStoreError(e, results) from e
+        return results
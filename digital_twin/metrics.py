@@ -0,0 +1,234 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Low-overhead instrumentation of the prediction pipeline.
+#
+# Stage timings are kept as fixed-bucket histograms keyed by (stage,
+# machine_type): an observation is a perf_counter() difference, a bisect over
+# the bucket bounds and a few increments under an uncontended lock (stages on
+# the DB and inference pools observe from worker threads).  Request and error
+# counters are maintained by RequestMetricsMiddleware, a plain ASGI middleware
+# that labels requests by route template so paths with ids don't blow up the
+# label cardinality.  render() writes everything in the Prometheus text
+# exposition format for GET /metrics.
+
+# Seconds; spans a cache hit (~50 us) up to a stalled write (seconds)
+STAGE_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+# perf_counter() when the current request entered the middleware
+request_started = ContextVar('request_started', default=None)
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'total', 'count', '_lock')
+
+    def __init__(self, bounds=STAGE_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self) -> tuple:
+        """(cumulative bucket counts, sum, count), read consistently"""
+        with self._lock:
+            counts, total, count = list(self.counts), self.total, self.count
+        cumulative, running = [], 0
+        for value in counts:
+            running += value
+            cumulative.append(running)
+        return cumulative, total, count
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound holding the q-quantile (an estimate, like histogram_quantile)"""
+        cumulative, _, count = self.snapshot()
+        if not count:
+            return 0.0
+        rank = q * count
+        for bound, running in zip(self.bounds, cumulative):
+            if running >= rank:
+                return bound
+        return float('inf')
+
+class Metrics:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.started = time.time()
+        self._stages = {}     # (stage, machine_type) -> Histogram
+        self._requests = {}   # (method, route) -> Histogram
+        self._responses = {}  # (method, route, status) -> count
+        self._errors = {}     # (route, kind) -> count
+        self._lock = threading.Lock()
+
+    def _histogram(self, table: dict, key: tuple) -> Histogram:
+        histogram = table.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = table.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, stage: str, machine_type: str, seconds: float):
+        if self.enabled:
+            self._histogram(self._stages, (stage, machine_type)).observe(seconds)
+
+    def observe_stages(self, machine_type: str, timings: dict):
+        """Record {stage: seconds} measured elsewhere, e.g. in an inference worker"""
+        if self.enabled:
+            for stage, seconds in timings.items():
+                self._histogram(self._stages, (stage, machine_type)).observe(seconds)
+
+    def time(self, stage: str, machine_type: str):
+        return StageTimer(self, stage, machine_type)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        # Only called from the event loop thread
+        key = (method, route, status)
+        self._responses[key] = self._responses.get(key, 0) + 1
+        if self.enabled:
+            self._histogram(self._requests, (method, route)).observe(seconds)
+
+    def count_error(self, route: str, kind: str):
+        key = (route, kind)
+        self._errors[key] = self._errors.get(key, 0) + 1
+
+    def stage_summary(self) -> dict:
+        """{stage: {machine_type: {count, mean_ms, p50_ms, p99_ms}}} for /stats/"""
+        summary = {}
+        for (stage, machine_type), histogram in sorted(self._stages.items()):
+            _, total, count = histogram.snapshot()
+            summary.setdefault(stage, {})[machine_type] = {
+                "count": count,
+                "mean_ms": 1000 * total / count if count else 0.0,
+                "p50_ms": 1000 * histogram.quantile(0.5),
+                "p99_ms": 1000 * histogram.quantile(0.99),
+            }
+        return summary
+
+    def render(self, families: list = ()) -> str:
+        """Prometheus text format, plus extra (name, type, help, {label pairs: value}) families"""
+        lines = []
+        write_histograms(lines, 'dt_stage_duration_seconds',
+                         'Time spent in each prediction pipeline stage', ('stage', 'machine_type'), self._stages)
+        write_histograms(lines, 'dt_http_request_duration_seconds',
+                         'HTTP request latency by route', ('method', 'route'), self._requests)
+
+        lines.append('# HELP dt_http_requests_total HTTP responses by route and status')
+        lines.append('# TYPE dt_http_requests_total counter')
+        for (method, route, status), count in sorted(self._responses.items()):
+            lines.append(f'dt_http_requests_total{format_labels(method=method, route=route, status=status)} {count}')
+
+        lines.append('# HELP dt_http_errors_total Server errors (5xx and unhandled exceptions) by route')
+        lines.append('# TYPE dt_http_errors_total counter')
+        for (route, kind), count in sorted(self._errors.items()):
+            lines.append(f'dt_http_errors_total{format_labels(route=route, kind=kind)} {count}')
+
+        for name, kind, help_text, samples in families:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples.items():
+                lines.append(f'{name}{format_labels(**dict(labels))} {format_value(value)}')
+
+        lines.append('# HELP dt_process_start_time_seconds Start time of the process since the epoch')
+        lines.append('# TYPE dt_process_start_time_seconds gauge')
+        lines.append(f'dt_process_start_time_seconds {self.started:.3f}')
+        return '\n'.join(lines) + '\n'
+
+class StageTimer:
+    __slots__ = ('metrics', 'stage', 'machine_type', 'started')
+
+    def __init__(self, metrics: Metrics, stage: str, machine_type: str):
+        self.metrics = metrics
+        self.stage = stage
+        self.machine_type = machine_type
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.stage, self.machine_type, time.perf_counter() - self.started)
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def format_labels(**labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in labels.items()) + '}'
+
+def format_value(value) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def write_histograms(lines: list, name: str, help_text: str, label_names: tuple, histograms: dict):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for key, histogram in sorted(histograms.items()):
+        labels = dict(zip(label_names, key))
+        cumulative, total, count = histogram.snapshot()
+        for bound, running in zip(histogram.bounds, cumulative):
+            lines.append(f'{name}_bucket{format_labels(**labels, le=bound)} {running}')
+        lines.append(f'{name}_bucket{format_labels(**labels, le="+Inf")} {count}')
+        lines.append(f'{name}_sum{format_labels(**labels)} {total!r}')
+        lines.append(f'{name}_count{format_labels(**labels)} {count}')
+
+class RequestMetricsMiddleware:
+    """Counts and times every HTTP request by route template.
+
+    Plain ASGI rather than BaseHTTPMiddleware, which would add a task and a
+    memory stream per request.  on_complete(route, started, elapsed) is called
+    after each response, e.g. to hand slow requests to the profiler.
+    """
+
+    def __init__(self, app, metrics: Metrics, on_complete=None):
+        self.app = app
+        self.metrics = metrics
+        self.on_complete = on_complete
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        request_started.set(started)
+        status = 500
+        failed = False
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as e:
+            failed = True
+            self.metrics.count_error(route_label(scope), type(e).__name__)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            route = route_label(scope)
+            self.metrics.observe_request(scope['method'], route, status, elapsed)
+            if status >= 500 and not failed:
+                self.metrics.count_error(route, str(status))
+            if self.on_complete is not None:
+                self.on_complete(route, started, elapsed)
+
+def route_label(scope) -> str:
+    # The router stores the matched route in the scope
+    route = scope.get('route')
+    return getattr(route, 'path', None) or 'unmatched'
@@ -0,0 +1,107 @@
+import sqlite3
+
+# Schema migrations for existing databases.
+#
+# schema.sql always describes the latest schema and is applied to new
+# databases.  Databases created by older versions are upgraded here, one step
+# per entry, and the applied version is tracked in PRAGMA user_version.
+# Steps must be idempotent because a fresh database already has everything
+# schema.sql creates; a step is either an SQL statement or a callable taking
+# the connection.
+
+def add_column(table: str, column: str, declaration: str):
+    """Migration step adding a column unless it already exists"""
+    def step(conn: sqlite3.Connection):
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+    return step
+
+MIGRATIONS = [
+    # 1: composite indexes for per-machine history lookups
+    (1, [
+        "CREATE INDEX IF NOT EXISTS idx_sensor_readings_machine_time ON sensor_readings (machine_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_predictions_machine_time ON predictions (machine_id, timestamp)",
+    ]),
+    # 2: rollup table for downsampled readings
+    (2, [
+        """CREATE TABLE IF NOT EXISTS sensor_readings_rollup (
+            machine_id TEXT NOT NULL,
+            resolution TEXT NOT NULL CHECK(resolution IN ('minute', 'hour')),
+            bucket_start DATETIME NOT NULL,
+            sample_count INTEGER NOT NULL,
+            current_phase_a FLOAT,
+            current_phase_b FLOAT,
+            current_phase_c FLOAT,
+            power_consumption FLOAT,
+            power_factor FLOAT,
+            vibration FLOAT,
+            temperature FLOAT,
+            speed FLOAT,
+            torque FLOAT,
+            noise FLOAT,
+            max_vibration FLOAT,
+            max_temperature FLOAT,
+            PRIMARY KEY (machine_id, resolution, bucket_start)
+        ) WITHOUT ROWID""",
+    ]),
+    # 3: link each sensor reading to the prediction made from it
+    (3, [
+        add_column('sensor_readings', 'prediction_id', 'INTEGER REFERENCES predictions(id)'),
+    ]),
+    # 4: latest prediction per machine, maintained by trigger, for fleet summaries
+    (4, [
+        """CREATE TABLE IF NOT EXISTS machine_health (
+            machine_id TEXT PRIMARY KEY,
+            prediction_id INTEGER NOT NULL,
+            timestamp DATETIME NOT NULL,
+            health_status TEXT,
+            rul_hours FLOAT,
+            confidence FLOAT,
+            maintenance_required BOOLEAN,
+            FOREIGN KEY (machine_id) REFERENCES machines(machine_id) ON DELETE CASCADE
+        ) WITHOUT ROWID""",
+        """CREATE TRIGGER IF NOT EXISTS trg_predictions_latest AFTER INSERT ON predictions
+        BEGIN
+            INSERT INTO machine_health
+                (machine_id, prediction_id, timestamp, health_status, rul_hours, confidence, maintenance_required)
+                VALUES (NEW.machine_id, NEW.id, NEW.timestamp, NEW.health_status, NEW.rul_hours, NEW.confidence, NEW.maintenance_required)
+                ON CONFLICT (machine_id) DO UPDATE SET
+                    prediction_id = excluded.prediction_id,
+                    timestamp = excluded.timestamp,
+                    health_status = excluded.health_status,
+                    rul_hours = excluded.rul_hours,
+                    confidence = excluded.confidence,
+                    maintenance_required = excluded.maintenance_required
+                WHERE (excluded.timestamp, excluded.prediction_id) >= (machine_health.timestamp, machine_health.prediction_id);
+        END""",
+        # Backfill from existing history, one index probe per machine
+        """INSERT OR IGNORE INTO machine_health
+            (machine_id, prediction_id, timestamp, health_status, rul_hours, confidence, maintenance_required)
+            SELECT p.machine_id, p.id, p.timestamp, p.health_status, p.rul_hours, p.confidence, p.maintenance_required
+            FROM machines m
+            JOIN predictions p ON p.id = (
+                SELECT id FROM predictions WHERE machine_id = m.machine_id ORDER BY timestamp DESC, id DESC LIMIT 1
+            )""",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations; returns the resulting schema version"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, statements in MIGRATIONS:
+        if target <= version:
+            continue
+        with conn:
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            # PRAGMA does not accept bound parameters
+            conn.execute(f"PRAGMA user_version = {int(target)}")
+        print(f"✅ Database migrated to schema version {target}")
+        version = target
+    return version
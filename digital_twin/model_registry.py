@@ -0,0 +1,343 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import threading
+from functools import partial
+
+import numpy as np
+
+from tree_engine import CompiledModels
+
+# Versioned model bundles with atomic hot swap.
+#
+# A bundle is a directory under MODEL_DIR holding the classifier, regressor,
+# scaler and label encoder of every machine type plus a manifest.json:
+#
+#   model_bundles/
+#       2026-10-17T0900/
+#           manifest.json   {"version": ..., "created": ..., "files": {"motor": {...}, ...}}
+#           motor_gradient_boosting_classifier.pkl
+#           ...
+#           compiled/motor/model.json, *.npy   (optional, see export_compiled)
+#
+# The legacy directory's compiled trees are kept out of it, in a directory of
+# their own under COMPILED_ROOT named after the pickles they were built from
+# (see compiled_output), so stale arrays are never served for retrained pickles.
+#
+# Reloads load and warm the machine types already in use off the request
+# path; swap() then replaces a single reference, so a request that already
+# picked up the active ModelSet finishes on it while new requests see the new
+# one.  Previous sets are kept in memory (bounded) for instant rollback.  When
+# MODEL_DIR has no bundles the legacy saved_models/ directory is served as
+# version "saved_models".
+#
+# A machine type is only read from disk the first time it is scored.  With
+# the compiled format its trees are memory-mapped .npy arrays scored by
+# tree_engine, so neither joblib nor sklearn is imported and uvicorn workers
+# share the model pages through the page cache.  Under 'auto' the pickles stay
+# reachable: load_pickled_fallback() adds them the first time a batch too big
+# for the compiled engine arrives.
+
+MACHINE_TYPES = ('motor', 'blade')
+MODEL_PARTS = ('classifier', 'regressor', 'scaler', 'encoder')
+MANIFEST_NAME = 'manifest.json'
+
+def default_files(machine_type: str) -> dict:
+    return {
+        'classifier': f'{machine_type}_gradient_boosting_classifier.pkl',
+        'regressor': f'{machine_type}_gradient_boosting_regressor.pkl',
+        'scaler': f'{machine_type}_scaler.pkl',
+        'encoder': f'{machine_type}_label_encoder.pkl',
+    }
+
+def read_manifest(directory: str) -> dict:
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def file_fingerprint(paths) -> str:
+    """Cheap identity for a set of files; publish() preserves mtimes, so reused files match"""
+    digest = hashlib.sha256()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f'{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return digest.hexdigest()
+
+class ModelFormatError(Exception):
+    """The configured model format can't be served from a bundle"""
+
+def pickle_paths(directory: str, files: dict, machine_type: str) -> dict:
+    type_files = {**default_files(machine_type), **(files or {}).get(machine_type, {})}
+    return {part: os.path.join(directory, type_files[part]) for part in MODEL_PARTS}
+
+def compiled_output(directory: str, files: dict = None, root: str = 'compiled_models') -> str:
+    """Versioned home under root for the compiled trees of a directory of pickles"""
+    paths = [path for machine_type in MACHINE_TYPES for path in pickle_paths(directory, files, machine_type).values()]
+    name = os.path.basename(os.path.normpath(directory))
+    return os.path.join(root, f'{name}-{file_fingerprint(paths)[:12]}')
+
+def compiled_dir(compiled_root: str, machine_type: str) -> str:
+    return os.path.join(compiled_root, machine_type)
+
+def compiled_files(compiled_root: str, machine_type: str) -> list:
+    target = compiled_dir(compiled_root, machine_type)
+    return [os.path.join(target, name) for name in sorted(os.listdir(target))]
+
+def has_compiled(compiled_root: str, machine_type: str) -> bool:
+    return os.path.isfile(os.path.join(compiled_dir(compiled_root, machine_type), 'model.json'))
+
+def load_pickled(paths: dict) -> dict:
+    # Imported here so compiled-only deployments never pay for joblib/sklearn
+    import joblib
+    return {part: joblib.load(path) for part, path in paths.items()}
+
+def load_compiled(compiled_root: str, machine_type: str, fallback: dict = None) -> dict:
+    """Compiled trees; fallback holds the pickle paths large batches may load later"""
+    engine = CompiledModels.load(compiled_dir(compiled_root, machine_type))
+    models = {'engine': engine, 'labels': engine.labels}
+    if fallback is not None:
+        models['pickles'] = fallback
+    return models
+
+_fallback_lock = threading.Lock()
+
+def load_pickled_fallback(models: dict) -> bool:
+    """Add the sklearn models behind compiled ones on first use; False when there are none"""
+    if 'classifier' in models:
+        return True
+    paths = models.get('pickles')
+    if paths is None:
+        return False
+    with _fallback_lock:
+        if 'classifier' not in models:
+            loaded = load_pickled(paths)
+            # Classifier last: scorers take its presence to mean every part is there
+            for part in ('scaler', 'regressor', 'encoder', 'classifier'):
+                models[part] = loaded[part]
+    return True
+
+def export_compiled(directory: str, files: dict, output: str):
+    """Write <output>/<machine_type>/ tree arrays for a directory of pickles"""
+    for machine_type in MACHINE_TYPES:
+        models = load_pickled(pickle_paths(directory, files, machine_type))
+        labels = np.asarray(models['encoder'].classes_)[models['classifier'].classes_]
+        CompiledModels.from_sklearn(models).save(compiled_dir(output, machine_type), labels)
+
+class ModelSet:
+    """One bundle: per machine type models, loaded on first use"""
+
+    def __init__(self, version: str, loaders: dict, manifest: dict, fingerprints: dict, prepare=None):
+        self.version = version
+        self.manifest = manifest
+        # {machine_type: digest of its model files}, used to tell which types changed
+        self.fingerprints = fingerprints
+        self.loaded_at = datetime.datetime.now().isoformat()
+        self._loaders = loaders
+        self._prepare = prepare
+        self._models = {}
+        self._lock = threading.Lock()
+
+    @property
+    def models(self) -> dict:
+        """Machine types loaded so far"""
+        return dict(self._models)
+
+    def get(self, machine_type: str) -> dict:
+        models = self._models.get(machine_type)
+        if models is None:
+            with self._lock:
+                models = self._models.get(machine_type)
+                if models is None:
+                    models = self._loaders[machine_type]()
+                    if self._prepare is not None:
+                        self._prepare(models)
+                    self._models[machine_type] = models
+        return models
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "created": self.manifest.get('created'),
+            "loaded_at": self.loaded_at,
+            "machine_types": sorted(self._loaders),
+            "loaded": sorted(self._models),
+        }
+
+class ModelRegistry:
+    def __init__(self, root: str, fallback_dir: str = None, prepare=None, history_size: int = 2,
+                 model_format: str = 'auto', compiled_root: str = 'compiled_models'):
+        self.root = root
+        self.fallback_dir = fallback_dir
+        # Where `compile` puts the fallback directory's trees
+        self.compiled_root = compiled_root
+        # 'pickle', 'compiled', or 'auto' (compiled when the bundle has the arrays)
+        self.model_format = model_format
+        # prepare(models) runs on each loaded machine type before it can be swapped in
+        self.prepare = prepare
+        self.history_size = history_size
+        self.active = None
+        self._history = []
+        # A rollback pins the active version so the watcher won't re-deploy the newest bundle
+        self.pinned = False
+        self._lock = threading.Lock()
+
+    def versions(self) -> list:
+        """Available bundle versions, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        bundles = []
+        for name in os.listdir(self.root):
+            if name.startswith('.'):
+                continue
+            directory = os.path.join(self.root, name)
+            if os.path.isfile(os.path.join(directory, MANIFEST_NAME)):
+                bundles.append((read_manifest(directory).get('created', ''), name))
+        return [name for _, name in sorted(bundles)]
+
+    def latest_version(self):
+        versions = self.versions()
+        if versions:
+            return versions[-1]
+        if self.fallback_dir and os.path.isdir(self.fallback_dir):
+            return os.path.basename(os.path.normpath(self.fallback_dir))
+        return None
+
+    def bundle_dir(self, version: str) -> str:
+        if version in self.versions():
+            return os.path.join(self.root, version)
+        if self.fallback_dir and version == os.path.basename(os.path.normpath(self.fallback_dir)):
+            return self.fallback_dir
+        raise KeyError(f"Unknown model version: {version}")
+
+    def load(self, version: str = None, preload=()) -> ModelSet:
+        """Open a bundle without activating it; types in preload are loaded now
+        (blocking, so run it off the event loop), the rest on first use"""
+        version = version or self.latest_version()
+        if version is None:
+            raise KeyError("No model bundles available")
+        directory = self.bundle_dir(version)
+        manifest = read_manifest(directory)
+        files = manifest.get('files', {})
+
+        if directory == self.fallback_dir:
+            compiled_root = compiled_output(directory, files, self.compiled_root)
+        else:
+            compiled_root = os.path.join(directory, 'compiled')
+
+        loaders, fingerprints = {}, {}
+        for machine_type in MACHINE_TYPES:
+            available = has_compiled(compiled_root, machine_type)
+            if self.model_format == 'compiled' and not available:
+                raise ModelFormatError(
+                    f"Model version {version} has no compiled {machine_type} models in {compiled_root}; "
+                    f"run `python model_registry.py compile` or set DT_MODEL_FORMAT=pickle"
+                )
+            part_paths = pickle_paths(directory, files, machine_type)
+            if self.model_format != 'pickle' and available:
+                paths = compiled_files(compiled_root, machine_type)
+                # 'compiled' never touches the pickles; 'auto' keeps them for large batches
+                fallback = part_paths if self.model_format == 'auto' and all(
+                    os.path.exists(path) for path in part_paths.values()) else None
+                loaders[machine_type] = partial(load_compiled, compiled_root, machine_type, fallback)
+            else:
+                paths = list(part_paths.values())
+                loaders[machine_type] = partial(load_pickled, part_paths)
+            fingerprints[machine_type] = file_fingerprint(paths)
+
+        model_set = ModelSet(version, loaders, manifest, fingerprints, prepare=self.prepare)
+        for machine_type in preload:
+            model_set.get(machine_type)
+        return model_set
+
+    def swap(self, model_set: ModelSet, pin: bool = False):
+        """Make model_set the active one; returns the previously active set"""
+        with self._lock:
+            previous = self.active
+            if previous is not None:
+                self._history.append(previous)
+                del self._history[:-self.history_size]
+            self.active = model_set
+            self.pinned = pin
+            return previous
+
+    def rollback(self):
+        """Reactivate the previous set; returns (replaced set, restored set)"""
+        with self._lock:
+            if not self._history:
+                raise LookupError("No previous model version to roll back to")
+            previous, self.active = self.active, self._history.pop()
+            self.pinned = True
+            return previous, self.active
+
+    def activate(self, version: str = None, preload=()) -> ModelSet:
+        model_set = self.load(version, preload)
+        self.swap(model_set, pin=version is not None)
+        return model_set
+
+    def describe(self) -> dict:
+        return {
+            "active": self.active.describe() if self.active is not None else None,
+            "pinned": self.pinned,
+            "history": [model_set.version for model_set in reversed(self._history)],
+            "available": self.versions(),
+        }
+
+def publish(source_dir: str, root: str, version: str = None, notes: str = '', compile: bool = True) -> str:
+    """Copy a directory of model files into a new bundle and write its manifest"""
+    created = datetime.datetime.now().isoformat(timespec='seconds')
+    version = version or created.replace(':', '')
+    target = os.path.join(root, version)
+    if os.path.exists(target):
+        raise FileExistsError(f"Model version already exists: {version}")
+
+    # Copy into a temp dir and rename, so a watcher never sees a half-written bundle
+    staging = os.path.join(root, f'.{version}.tmp')
+    os.makedirs(staging)
+    files = {}
+    for machine_type in MACHINE_TYPES:
+        files[machine_type] = default_files(machine_type)
+        for name in files[machine_type].values():
+            shutil.copy2(os.path.join(source_dir, name), os.path.join(staging, name))
+    if compile:
+        export_compiled(staging, files, os.path.join(staging, 'compiled'))
+    with open(os.path.join(staging, MANIFEST_NAME), 'w') as f:
+        json.dump({"version": version, "created": created, "notes": notes, "files": files}, f, indent=2)
+    os.rename(staging, target)
+    return version
+
+if __name__ == "__main__":
+    import argparse
+
+    import config
+
+    parser = argparse.ArgumentParser(description="Manage versioned model bundles")
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish_parser = commands.add_parser('publish', help="publish a directory of trained models as a new bundle")
+    publish_parser.add_argument('source', nargs='?', default=config.MODEL_FALLBACK_DIR, help="directory with the .pkl files")
+    publish_parser.add_argument('--version', help="bundle name (default: current timestamp)")
+    publish_parser.add_argument('--notes', default='')
+    publish_parser.add_argument('--no-compile', action='store_true', help="skip the memory-mappable .npy export")
+    compile_parser = commands.add_parser('compile', help="export .npy tree arrays for a directory of pickles")
+    compile_parser.add_argument('directory', nargs='?', default=config.MODEL_FALLBACK_DIR)
+    compile_parser.add_argument('--output', help="target directory (default: a versioned directory under DT_MODEL_COMPILED_DIR)")
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        version = publish(args.source, config.MODEL_DIR, args.version, args.notes, compile=not args.no_compile)
+        print(f"✅ Published model bundle {version} to {config.MODEL_DIR}")
+    else:
+        files = read_manifest(args.directory).get('files')
+        output = args.output or compiled_output(args.directory, files, config.MODEL_COMPILED_DIR)
+        if os.path.exists(output):
+            print(f"✅ Compiled models already up to date in {output}")
+        else:
+            # Export next to the target and rename, so a loader never sees half the arrays
+            staging = f'{output}.tmp'
+            shutil.rmtree(staging, ignore_errors=True)
+            export_compiled(args.directory, files, staging)
+            os.rename(staging, output)
+            print(f"✅ Compiled models written to {output}")
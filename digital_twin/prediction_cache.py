@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Memoizing cache in front of the motor and blade models.
+#
+# Steady-state machines report nearly identical readings second after
+# second.  Feature vectors are quantized (per-feature step, 0 = exact match)
+# and used as keys into a per-machine-type LRU with a TTL, so repeated
+# readings skip tree evaluation.  invalidate() drops one machine type's
+# entries when its models are reloaded and bumps its generation; put() ignores
+# results scored under an earlier generation, so a score that started on the
+# old models can't repopulate the cache after a swap.  Only touched from the
+# event loop.
+
+def parse_quanta(spec: str) -> dict:
+    """Parse 'vibration=0.01,temperature=0.1' into {feature: step}"""
+    quanta = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, step = item.partition('=')
+        quanta[name.strip()] = float(step)
+    return quanta
+
+class PredictionCache:
+    def __init__(self, feature_columns: dict, quantum: float = 0.0, quanta: dict = None,
+                 max_size: int = 50000, ttl: float = 300.0):
+        # feature_columns: {machine_type: [feature names in model order]}
+        self.max_size = max_size
+        self.ttl = ttl
+        self._steps = {
+            machine_type: np.array([(quanta or {}).get(column, quantum) for column in columns], dtype=float)
+            for machine_type, columns in feature_columns.items()
+        }
+        self._entries = {machine_type: OrderedDict() for machine_type in feature_columns}
+        self._generations = dict.fromkeys(feature_columns, 0)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def keys(self, machine_type: str, features: np.ndarray) -> list:
+        steps = self._steps[machine_type]
+        quantized = np.where(steps > 0, np.round(features / np.where(steps > 0, steps, 1.0)), features)
+        return [row.tobytes() for row in quantized]
+    
+    def get(self, machine_type: str, key: bytes):
+        entries = self._entries[machine_type]
+        item = entries.get(key)
+        if item is None or time.monotonic() - item[0] > self.ttl:
+            if item is not None:
+                del entries[key]
+            self.misses += 1
+            return None
+        entries.move_to_end(key)
+        self.hits += 1
+        return item[1]
+    
+    def generation(self, machine_type: str) -> int:
+        """Read before scoring and hand to put()"""
+        return self._generations[machine_type]
+    
+    def put(self, machine_type: str, key: bytes, value, generation: int = None):
+        if generation is not None and generation != self._generations[machine_type]:
+            # Scored by models that have since been swapped out
+            return
+        entries = self._entries[machine_type]
+        entries[key] = (time.monotonic(), value)
+        entries.move_to_end(key)
+        # The size bound is per machine type
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, machine_type: str = None):
+        """Drop cached predictions for one machine type, or all of them"""
+        for name, entries in self._entries.items():
+            if machine_type is None or name == machine_type:
+                entries.clear()
+                self._generations[name] += 1
+        self.invalidations += 1
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": {name: len(entries) for name, entries in self._entries.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
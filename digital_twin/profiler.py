@@ -0,0 +1,101 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+# Opt-in sampling profiler for slow requests.
+#
+# A daemon thread snapshots the Python stack of every thread in the process
+# (sys._current_frames) every `interval` seconds and keeps the samples in a
+# bounded ring buffer.  When a request takes longer than `threshold`, the
+# samples taken while it ran are folded into "thread;frame;frame count" lines
+# (the collapsed-stack format read by flamegraph.pl, speedscope and inferno)
+# and written to `directory`.  Samples cover the whole process, including the
+# DB and inference worker threads, so with concurrent requests a dump also
+# shows whatever else was running at the time; a cooldown between dumps keeps
+# a burst of slow requests from filling the disk.  Costs nothing unless enabled.
+
+# Innermost frames of pool threads parked waiting for work; sampling them only adds noise
+IDLE_FRAMES = {('thread.py', '_worker'), ('threading.py', 'wait'), ('queue.py', 'get')}
+
+class SlowRequestProfiler:
+    def __init__(self, directory: str, threshold: float, interval: float = 0.005,
+                 max_samples: int = 50000, cooldown: float = 10.0):
+        self.directory = directory
+        self.threshold = threshold
+        self.interval = interval
+        self.cooldown = cooldown
+        self._samples = deque(maxlen=max_samples)  # (perf_counter, folded stack)
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_dump = 0.0
+        self.dumps = 0
+        self.skipped = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                self._samples.append((now, fold_stack(names.get(thread_id, str(thread_id)), frame)))
+
+    def request_finished(self, route: str, started: float, elapsed: float):
+        """Called after every request; dumps the samples of slow ones"""
+        if elapsed < self.threshold or self._thread is None:
+            return
+        now = time.perf_counter()
+        if now - self._last_dump < self.cooldown:
+            self.skipped += 1
+            return
+        self._last_dump = now
+        stacks = Counter(stack for sampled_at, stack in list(self._samples) if started <= sampled_at <= started + elapsed)
+        if not stacks:
+            return
+        route_name = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{route_name}-{elapsed * 1000:.0f}ms.folded"
+        # Small file; written from a daemon thread so the event loop isn't blocked on disk
+        threading.Thread(target=self._write, args=(os.path.join(self.directory, name), stacks), daemon=True).start()
+        self.dumps += 1
+
+    def _write(self, path: str, stacks: Counter):
+        with open(path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "interval_ms": self.interval * 1000,
+            "buffered_samples": len(self._samples),
+            "dumps": self.dumps,
+            "skipped": self.skipped,
+        }
+
+def fold_stack(thread_name: str, frame) -> str:
+    """Root-first 'thread;file:function;...' for one thread's current stack"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    frames.append(thread_name)
+    return ';'.join(reversed(frames))
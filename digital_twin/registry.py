@@ -0,0 +1,67 @@
+from collections import OrderedDict
+
+# In-process machine registry.
+#
+# Machine type, location, status and motor/blade limits are read on every
+# prediction but almost never change, so they are cached here instead of
+# being selected per request.  The cache is filled at startup, updated by the
+# routes that create (or would update/delete) machines, and bounded with LRU
+# eviction; misses are loaded from the database by the caller.  Only touched
+# from the event loop thread.
+
+class MachineRegistry:
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, machine_id: str):
+        entry = self._entries.get(machine_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(machine_id)
+        self.hits += 1
+        return entry
+    
+    def lookup(self, machine_ids) -> tuple:
+        """Split ids into ({machine_id: entry} for cached ones, [missing ids])"""
+        found, missing = {}, []
+        for machine_id in machine_ids:
+            entry = self.get(machine_id)
+            if entry is None:
+                missing.append(machine_id)
+            else:
+                found[machine_id] = entry
+        return found, missing
+    
+    def put(self, entry: dict):
+        machine_id = entry['machine_id']
+        self._entries[machine_id] = entry
+        self._entries.move_to_end(machine_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, machine_id: str):
+        """Drop a machine after it was updated or deleted"""
+        self._entries.pop(machine_id, None)
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
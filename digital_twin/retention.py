@@ -0,0 +1,114 @@
+import argparse
+import sqlite3
+import time
+
+# Retention job for raw sensor readings.
+#
+# Readings older than the raw retention window are averaged into per-minute
+# or per-hour buckets in sensor_readings_rollup, then deleted from
+# sensor_readings.  Work is done one machine at a time so each transaction,
+# and the write lock it holds, stays short.  Buckets that already exist (e.g.
+# a bucket straddling two runs) are merged using sample-count weighting.
+
+SENSOR_COLUMNS = [
+    'current_phase_a', 'current_phase_b', 'current_phase_c',
+    'power_consumption', 'power_factor', 'vibration', 'temperature',
+    'speed', 'torque', 'noise'
+]
+
+BUCKET_FORMATS = {
+    'minute': '%Y-%m-%d %H:%M:00',
+    'hour': '%Y-%m-%d %H:00:00',
+}
+
+def _weighted(column: str) -> str:
+    # Combine an existing bucket average with a new one; NULL means "no samples"
+    return (
+        f"{column} = CASE WHEN excluded.{column} IS NULL THEN sensor_readings_rollup.{column} "
+        f"WHEN sensor_readings_rollup.{column} IS NULL THEN excluded.{column} "
+        f"ELSE (sensor_readings_rollup.{column} * sensor_readings_rollup.sample_count "
+        f"+ excluded.{column} * excluded.sample_count) "
+        f"/ (sensor_readings_rollup.sample_count + excluded.sample_count) END"
+    )
+
+def _rollup_sql(resolution: str) -> str:
+    bucket = f"strftime('{BUCKET_FORMATS[resolution]}', timestamp)"
+    averages = ", ".join(f"AVG({column})" for column in SENSOR_COLUMNS)
+    updates = ",\n        ".join(
+        [_weighted(column) for column in SENSOR_COLUMNS]
+        + [
+            "max_vibration = MAX(COALESCE(sensor_readings_rollup.max_vibration, excluded.max_vibration), "
+            "COALESCE(excluded.max_vibration, sensor_readings_rollup.max_vibration))",
+            "max_temperature = MAX(COALESCE(sensor_readings_rollup.max_temperature, excluded.max_temperature), "
+            "COALESCE(excluded.max_temperature, sensor_readings_rollup.max_temperature))",
+            "sample_count = sensor_readings_rollup.sample_count + excluded.sample_count",
+        ]
+    )
+    return f"""INSERT INTO sensor_readings_rollup
+        (machine_id, resolution, bucket_start, sample_count, {", ".join(SENSOR_COLUMNS)}, max_vibration, max_temperature)
+        SELECT machine_id, '{resolution}', {bucket}, COUNT(*), {averages}, MAX(vibration), MAX(temperature)
+        FROM sensor_readings
+        WHERE machine_id = ? AND timestamp < ?
+        GROUP BY {bucket}
+        ON CONFLICT (machine_id, resolution, bucket_start) DO UPDATE SET
+        {updates}"""
+
+def run_retention(conn: sqlite3.Connection, raw_days: float, resolution: str = 'minute',
+                  prediction_days: float = 0, rollup: bool = True) -> dict:
+    """Roll up and prune readings older than raw_days.
+
+    Readings are kept forever when raw_days <= 0, and so are predictions
+    unless prediction_days > 0.  rollup=False only prunes predictions, for
+    when readings live outside sensor_readings.
+    """
+    if resolution not in BUCKET_FORMATS:
+        raise ValueError(f"Unknown rollup resolution: {resolution}")
+    
+    started = time.perf_counter()
+    rollup = rollup and raw_days > 0
+    cutoff = conn.execute("SELECT datetime('now', ?)", (f"-{raw_days} days",)).fetchone()[0] if rollup else None
+    rollup_sql = _rollup_sql(resolution)
+    
+    machine_ids = [row[0] for row in conn.execute("SELECT machine_id FROM machines")] if rollup else []
+    rolled_up = 0
+    for machine_id in machine_ids:
+        with conn:
+            conn.execute(rollup_sql, (machine_id, cutoff))
+            # Both statements use idx_sensor_readings_machine_time
+            rolled_up += conn.execute(
+                "DELETE FROM sensor_readings WHERE machine_id = ? AND timestamp < ?",
+                (machine_id, cutoff)
+            ).rowcount
+    
+    pruned_predictions = 0
+    if prediction_days > 0:
+        with conn:
+            pruned_predictions = conn.execute(
+                "DELETE FROM predictions WHERE timestamp < datetime('now', ?)",
+                (f"-{prediction_days} days",)
+            ).rowcount
+    
+    # Keep query planner statistics current after large deletes
+    conn.execute("PRAGMA optimize")
+    
+    return {
+        "cutoff": cutoff,
+        "machines": len(machine_ids),
+        "readings_rolled_up": rolled_up,
+        "predictions_pruned": pruned_predictions,
+        "seconds": time.perf_counter() - started,
+    }
+
+if __name__ == "__main__":
+    import config
+    
+    parser = argparse.ArgumentParser(description="Roll up and prune old sensor readings")
+    parser.add_argument('--db', default=config.DB_PATH)
+    parser.add_argument('--raw-days', type=float, default=config.RETENTION_RAW_DAYS)
+    parser.add_argument('--resolution', choices=sorted(BUCKET_FORMATS), default=config.RETENTION_RESOLUTION)
+    parser.add_argument('--prediction-days', type=float, default=config.RETENTION_PREDICTION_DAYS)
+    args = parser.parse_args()
+    
+    conn = sqlite3.connect(args.db)
+    print(run_retention(conn, args.raw_days, args.resolution, args.prediction_days))
+    conn.close()
@@ -52,6 +52,7 @@ CREATE TABLE IF NOT EXISTS sensor_readings (
     speed FLOAT,
     torque FLOAT,
     noise FLOAT,
+    prediction_id INTEGER REFERENCES predictions(id),
     FOREIGN KEY (machine_id) REFERENCES machines(machine_id) ON DELETE CASCADE
 );
 
@@ -64,4 +65,59 @@ CREATE TABLE IF NOT EXISTS predictions (
     confidence FLOAT,
     maintenance_required BOOLEAN,
     FOREIGN KEY (machine_id) REFERENCES machines(machine_id) ON DELETE CASCADE
-);
\ No newline at end of file
+);
+
+-- Per-machine time-range lookups
+CREATE INDEX IF NOT EXISTS idx_sensor_readings_machine_time ON sensor_readings (machine_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_predictions_machine_time ON predictions (machine_id, timestamp);
+
+-- Downsampled sensor readings written by the retention job (retention.py);
+-- sensor columns hold per-bucket averages
+CREATE TABLE IF NOT EXISTS sensor_readings_rollup (
+    machine_id TEXT NOT NULL,
+    resolution TEXT NOT NULL CHECK(resolution IN ('minute', 'hour')),
+    bucket_start DATETIME NOT NULL,
+    sample_count INTEGER NOT NULL,
+    current_phase_a FLOAT,
+    current_phase_b FLOAT,
+    current_phase_c FLOAT,
+    power_consumption FLOAT,
+    power_factor FLOAT,
+    vibration FLOAT,
+    temperature FLOAT,
+    speed FLOAT,
+    torque FLOAT,
+    noise FLOAT,
+    max_vibration FLOAT,
+    max_temperature FLOAT,
+    PRIMARY KEY (machine_id, resolution, bucket_start)
+) WITHOUT ROWID;
+
+-- Latest prediction per machine, kept current by a trigger on every
+-- predictions insert so fleet summaries never scan the history
+CREATE TABLE IF NOT EXISTS machine_health (
+    machine_id TEXT PRIMARY KEY,
+    prediction_id INTEGER NOT NULL,
+    timestamp DATETIME NOT NULL,
+    health_status TEXT,
+    rul_hours FLOAT,
+    confidence FLOAT,
+    maintenance_required BOOLEAN,
+    FOREIGN KEY (machine_id) REFERENCES machines(machine_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- Backfilled or out-of-order inserts (bulk imports) never replace a newer prediction
+CREATE TRIGGER IF NOT EXISTS trg_predictions_latest AFTER INSERT ON predictions
+BEGIN
+    INSERT INTO machine_health
+        (machine_id, prediction_id, timestamp, health_status, rul_hours, confidence, maintenance_required)
+        VALUES (NEW.machine_id, NEW.id, NEW.timestamp, NEW.health_status, NEW.rul_hours, NEW.confidence, NEW.maintenance_required)
+        ON CONFLICT (machine_id) DO UPDATE SET
+            prediction_id = excluded.prediction_id,
+            timestamp = excluded.timestamp,
+            health_status = excluded.health_status,
+            rul_hours = excluded.rul_hours,
+            confidence = excluded.confidence,
+            maintenance_required = excluded.maintenance_required
+        WHERE (excluded.timestamp, excluded.prediction_id) >= (machine_health.timestamp, machine_health.prediction_id);
+END;
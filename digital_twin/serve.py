@@ -0,0 +1,164 @@
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+import config
+from model_registry import MACHINE_TYPES
+
+# Pre-fork multi-worker server.
+#
+# `uvicorn --workers N` spawns fresh interpreters, so every worker imports
+# sklearn and loads its own copy of the models.  Here the master imports the
+# app, initializes the database and loads every machine type once, then forks
+# the workers, which inherit the models copy-on-write (compiled .npy models are
+# memory-mapped and share the page cache either way).  gc.freeze() moves the
+# loaded objects out of the collector's generations so collections in the
+# workers don't touch, and thereby copy, their pages.  All workers accept on
+# one listening socket and each runs its own event loop, executors and
+# connection pool, so inference scales past the GIL.
+#
+# SQLite is shared through WAL, which serializes writers across processes with
+# file locks; each worker's write-behind buffer turns its requests into a few
+# batched transactions and busy_timeout covers the lock handoffs.  Schema
+# migrations run once in the master (workers' startup finds nothing left to
+# do) and the retention job only in worker 0.
+#
+# In-process state is per worker: rolling features, the prediction cache,
+# /events subscriptions, /stats/ and /metrics only cover the worker that
+# serves the request.  SIGHUP reloads the models in the master and replaces
+# the workers one at a time; SIGTERM/SIGINT drain and stop them.  Linux/macOS
+# only (os.fork).  Run from the digital_twin directory:
+#
+#     python serve.py [--workers 4] [--host 0.0.0.0] [--port 8000]
+
+class Master:
+    def __init__(self, app_module, sock: socket.socket, workers: int, log_level: str):
+        self.app_module = app_module
+        self.sock = sock
+        self.workers = workers
+        self.log_level = log_level
+        self.children = {}  # pid -> worker index
+        self.stopping = False
+        self.reload_requested = False
+
+    def prepare(self):
+        """Everything shared with the workers, done once before forking"""
+        app = self.app_module
+        # Connections must not cross fork(); the pool is reopened in each worker
+        app.db.open()
+        app.init_db()
+        app.db.close()
+        app.load_models(preload=MACHINE_TYPES)
+        gc.collect()
+        gc.freeze()
+
+    def spawn(self, index: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            code = 0
+            try:
+                run_worker(self.app_module, self.sock, index, self.log_level)
+            except BaseException as e:
+                print(f"❌ Worker {index} failed: {e}")
+                code = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(code)
+        self.children[pid] = index
+        return pid
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGHUP, self._reload)
+        for index in range(self.workers):
+            self.spawn(index)
+        print(f"✅ Serving with {self.workers} workers (master pid {os.getpid()})")
+
+        while self.children:
+            if self.reload_requested and not self.stopping:
+                self.reload_requested = False
+                self.rolling_restart()
+            # Polled so signal flags are acted on promptly (waitpid is retried after signals)
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                time.sleep(0.2)
+                continue
+            index = self.children.pop(pid, None)
+            if index is not None and not self.stopping and not self._replaced(index):
+                print(f"❌ Worker {index} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+                time.sleep(1)
+                self.spawn(index)
+        self.sock.close()
+
+    def _replaced(self, index: int) -> bool:
+        # A worker retired by a rolling restart already has its successor running
+        return index in self.children.values()
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reload(self, signum, frame):
+        # Acted on from the main loop, not inside the handler
+        self.reload_requested = True
+
+    def rolling_restart(self):
+        """Load the newest models once in the master, then replace the workers one by one"""
+        gc.unfreeze()
+        self.app_module.load_models(preload=MACHINE_TYPES)
+        gc.collect()
+        gc.freeze()
+        for pid, index in list(self.children.items()):
+            self.spawn(index)
+            # Give the successor time to start accepting before the old worker drains
+            time.sleep(config.SERVER_RESTART_GRACE_SECONDS)
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        print("✅ Workers restarted with reloaded models")
+
+def run_worker(app_module, sock: socket.socket, index: int, log_level: str):
+    import uvicorn
+
+    if index != 0:
+        # One retention job per database is enough
+        config.RETENTION_ENABLED = False
+    server = uvicorn.Server(uvicorn.Config(app_module.app, log_level=log_level, lifespan="on"))
+    server.run(sockets=[sock])
+
+def listen(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork multi-worker server for the digital twin API")
+    parser.add_argument('--workers', type=int, default=config.SERVER_WORKERS or os.cpu_count() or 1)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--log-level', default='warning')
+    args = parser.parse_args()
+
+    import app
+
+    master = Master(app, listen(args.host, args.port), args.workers, args.log_level)
+    master.prepare()
+    master.run()
+
+if __name__ == "__main__":
+    main()
@@ -79,17 +79,17 @@ async function loadMachines() {
             
             machinesList.innerHTML += `
                 <div class="col-md-4 mb-4">
-                    <div class="card machine-card ${statusClass}">
+                    <div class="card machine-card ${statusClass}" data-machine-id="${machine.machine_id}">
                         <div class="card-body">
                             <div class="d-flex justify-content-between align-items-start">
                                 <h5 class="card-title">${machine.name}</h5>
-                                <span class="badge bg-${statusColor}">${machine.current_status || 'Unknown'}</span>
+                                <span class="badge bg-${statusColor} machine-status">${machine.current_status || 'Unknown'}</span>
                             </div>
                             <h6 class="card-subtitle mb-2 text-muted">${machine.machine_id}</h6>
                             <p class="card-text">
                                 <strong>Type:</strong> ${machine.type}<br>
                                 <strong>Location:</strong> ${machine.location || 'N/A'}<br>
-                                <strong>RUL:</strong> ${machine.current_rul ? machine.current_rul.toFixed(1) + ' hours' : 'N/A'}
+                                <strong>RUL:</strong> <span class="machine-rul">${machine.current_rul ? machine.current_rul.toFixed(1) + ' hours' : 'N/A'}</span>
                             </p>
                             <button class="btn btn-outline-primary btn-sm" onclick="showMachineDetails('${machine.machine_id}')">
                                 View Details
@@ -345,6 +345,9 @@ async function loadPredictionHistory(machineId) {
         historyTable.innerHTML = '';
         
         history.forEach(prediction => {
+            // Readings stored without a prediction have nothing to show here
+            if (prediction.health_status == null) return;
+            
             const date = new Date(prediction.timestamp).toLocaleString();
             const maintenanceBadge = prediction.maintenance_required ? 
                 '<span class="badge bg-danger">Yes</span>' : 
@@ -444,9 +447,42 @@ async function predictHealth() {
     }
 }
 
+// Subscribe to pushed health updates instead of polling
+function subscribeToHealthEvents() {
+    const events = new EventSource('/events');
+    
+    events.addEventListener('health', event => {
+        const update = JSON.parse(event.data);
+        
+        // Update the machine card
+        const card = document.querySelector(`.machine-card[data-machine-id="${update.machine_id}"]`);
+        if (card) {
+            card.className = card.className.replace(/status-\S+/, `status-${update.health_status.toLowerCase().replace(/\s+/g, '-')}`);
+            const badge = card.querySelector('.machine-status');
+            badge.className = `badge bg-${getStatusColor(update.health_status)} machine-status`;
+            badge.textContent = update.health_status;
+            card.querySelector('.machine-rul').textContent = `${update.rul_hours.toFixed(1)} hours`;
+        }
+        
+        // Update the open detail view
+        if (update.machine_id === currentMachineId) {
+            document.getElementById('healthStatus').textContent = update.health_status;
+            document.getElementById('rul').textContent = `RUL: ${update.rul_hours.toFixed(1)} hours`;
+            document.getElementById('healthColor').style.backgroundColor = update.color_code;
+            updateMachineColor(update.color_code, update.health_status);
+        }
+    });
+    
+    events.onerror = error => {
+        // EventSource reconnects on its own using the server's retry hint
+        console.error('Health event stream error:', error);
+    };
+}
+
 // Initialize the application
 document.addEventListener('DOMContentLoaded', function() {
     loadMachines();
     initThreeJS();
+    subscribeToHealthEvents();
 });
 
@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The app reads its settings when config is first imported and resolves
+# schema.sql, static/ and saved_models/ against the working directory, so point
+# the settings at a scratch directory and run from digital_twin/ before any
+# test module imports it.
+APP_DIR = Path(__file__).resolve().parent.parent
+SCRATCH = tempfile.mkdtemp(prefix='digital-twin-tests-')
+os.environ.update({
+    'DT_DB_PATH': os.path.join(SCRATCH, 'test.db'),
+    'DT_HISTORY_DIR': os.path.join(SCRATCH, 'history'),
+    'DT_MODEL_DIR': os.path.join(SCRATCH, 'model_bundles'),
+    'DT_MODEL_COMPILED_DIR': os.path.join(SCRATCH, 'compiled_models'),
+    'DT_RETENTION_ENABLED': '0',
+})
+os.chdir(APP_DIR)
+sys.path.insert(0, str(APP_DIR))
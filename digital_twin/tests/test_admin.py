@@ -0,0 +1,21 @@
+from fastapi.testclient import TestClient
+
+import app
+
+def test_admin_routes_are_closed_without_a_token(monkeypatch):
+    monkeypatch.setattr(app.config, 'ADMIN_TOKEN', '')
+    client = TestClient(app.app)
+    for method, path in (('get', '/admin/models'), ('post', '/admin/models/reload'), ('post', '/admin/models/rollback')):
+        response = getattr(client, method)(path, headers={'X-Admin-Token': ''})
+        assert response.status_code == 403, path
+        assert 'DT_ADMIN_TOKEN' in response.json()['detail']
+
+def test_admin_routes_check_the_token(monkeypatch):
+    monkeypatch.setattr(app.config, 'ADMIN_TOKEN', 'secret')
+    client = TestClient(app.app)
+
+    assert client.post('/admin/models/rollback').status_code == 403
+    assert client.post('/admin/models/rollback', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    response = client.get('/admin/models', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert 'available' in response.json()
@@ -0,0 +1,55 @@
+import asyncio
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+import app
+from events import EventBroker
+
+def parse_sse(chunk: str) -> tuple:
+    fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines())
+    return fields['event'], json.loads(fields['data'])
+
+def test_predict_pushes_a_health_event_to_subscribers():
+    with TestClient(app.app) as client:
+        client.post("/machines/", json={"machine_id": "SSE-1", "name": "SSE-1", "type": "motor", "location": "Hall A"})
+        # TestClient buffers whole bodies and this one never ends, so run the /events
+        # handler on the app's event loop and read its stream a message at a time
+        response = client.portal.call(lambda: app.health_events(machine_id=["SSE-1"], location=None))
+        assert response.media_type == "text/event-stream"
+        stream = response.body_iterator
+        try:
+            assert client.portal.call(stream.__anext__) == "retry: 3000\n\n"
+            client.post("/predict/", json={"machine_id": "OTHER", "vibration": 1.0})
+            prediction = client.post("/predict/", json={"machine_id": "SSE-1", "vibration": 2.5, "temperature": 60.0})
+            assert prediction.status_code == 200
+
+            name, event = parse_sse(client.portal.call(stream.__anext__))
+        finally:
+            client.portal.call(stream.aclose)
+        assert not app.broker.has_subscribers
+
+    assert name == "health"
+    expected = prediction.json()
+    assert event["machine_id"] == "SSE-1" and event["location"] == "Hall A"
+    for field in ("health_status", "rul_hours", "color_code", "maintenance_required"):
+        assert event[field] == expected[field]
+
+def test_slow_subscriber_drops_oldest_events_without_blocking_publishers():
+    async def run():
+        broker = EventBroker(max_queue=4)
+        slow = broker.subscribe()
+        filtered = broker.subscribe(machine_ids=["M-1"])
+        started = time.perf_counter()
+        for index in range(1000):
+            broker.publish([{"machine_id": f"M-{index % 2}", "sequence": index}])
+        elapsed = time.perf_counter() - started
+        return broker, slow, filtered, elapsed
+
+    broker, slow, filtered, elapsed = asyncio.run(run())
+    assert elapsed < 1.0
+    # Nobody read anything: each queue holds only its newest events
+    assert [slow.queue.get_nowait()["sequence"] for _ in range(slow.queue.qsize())] == [996, 997, 998, 999]
+    assert [filtered.queue.get_nowait()["sequence"] for _ in range(filtered.queue.qsize())] == [993, 995, 997, 999]
+    assert broker.stats() == {"subscribers": 2, "published": 1000, "dropped": 996 + 496}
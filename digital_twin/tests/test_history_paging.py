@@ -0,0 +1,106 @@
+import sqlite3
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from history_store import ColumnarHistory, SQLiteHistory, format_epochs
+from storage import ConnectionPool
+
+# Several readings per second, so pages keep breaking inside a second and the
+# cursor's id tiebreaker decides what comes next
+START = 1704067200  # 2024-01-01 00:00:00 UTC
+
+def timestamps(first: int, count: int, per_second: int = 5) -> list:
+    return format_epochs(START + first + np.arange(count) // per_second)
+
+def walk(page, limit: int, between_pages=None) -> list:
+    """Every entry reachable by following cursors from the newest page"""
+    entries, cursor = [], None
+    while True:
+        batch = page(limit, cursor)
+        entries.extend(batch)
+        if between_pages is not None:
+            between_pages(len(entries))
+        if len(batch) < limit:
+            return entries
+        cursor = (batch[-1]['timestamp'], batch[-1]['id'])
+
+def assert_newest_first(entries: list):
+    keys = [(entry['timestamp'], entry['id']) for entry in entries]
+    assert keys == sorted(keys, reverse=True)
+    assert len(set(keys)) == len(keys)
+
+@pytest.fixture(params=['sqlite', 'columnar'])
+def history(request, tmp_path):
+    path = str(tmp_path / 'history.db')
+    conn = sqlite3.connect(path)
+    with open('schema.sql') as f:
+        conn.executescript(f.read())
+    conn.execute("INSERT INTO machines (machine_id, name, type) VALUES ('PG-1', 'PG-1', 'motor')")
+    conn.commit()
+    conn.close()
+    db = ConnectionPool(path, size=2)
+    db.open()
+    if request.param == 'sqlite':
+        store = SQLiteHistory(db)
+    else:
+        store = ColumnarHistory(str(tmp_path / 'columns'), db)
+    yield db, store
+    db.close()
+
+def write(db, store, first: int, vibrations: list):
+    with db.transaction() as conn:
+        store.write(conn, ['PG-1'] * len(vibrations), timestamps(first, len(vibrations)),
+                    {'vibration': vibrations})
+
+def test_keyset_pages_have_no_duplicates_or_gaps(history):
+    db, store = history
+    # Crosses midnight, which splits the columnar store into two days
+    write(db, store, 86400 - 100, list(range(1000)))
+    entries = walk(lambda limit, cursor: store.page('PG-1', limit, cursor), 37)
+
+    assert_newest_first(entries)
+    assert sorted(entry['vibration'] for entry in entries) == list(range(1000))
+
+    # A time window pages the same way
+    start, end = timestamps(86400 - 50, 1)[0], timestamps(86400 + 50, 1)[0]
+    window = walk(lambda limit, cursor: store.page('PG-1', limit, cursor, start, end), 23)
+    assert_newest_first(window)
+    assert sorted(entry['vibration'] for entry in window) == list(range(250, 750))
+
+def test_rows_inserted_while_paging_are_seen_once_if_older_than_the_cursor(history):
+    db, store = history
+    write(db, store, 0, list(range(500)))
+
+    def insert_late(seen: int):
+        if seen == 60:
+            # Behind the cursor: must show up on a later page.  Ahead of it: must not.
+            write(db, store, 10, [1000, 1001, 1002])
+            write(db, store, 10000, [2000])
+
+    entries = walk(lambda limit, cursor: store.page('PG-1', limit, cursor), 30, insert_late)
+
+    assert_newest_first(entries)
+    assert sorted(entry['vibration'] for entry in entries) == list(range(500)) + [1000, 1001, 1002]
+
+def test_history_endpoint_follows_cursors_and_streams_the_same_rows():
+    with TestClient(app.app) as client:
+        client.post("/machines/", json={"machine_id": "PG-API", "name": "PG-API", "type": "motor"})
+        with app.db.transaction() as conn:
+            app.history.write(conn, ['PG-API'] * 300, timestamps(0, 300), {'vibration': list(range(300))})
+
+        entries, cursor = [], None
+        while True:
+            response = client.get("/machines/PG-API/history", params={"limit": 40, **({"cursor": cursor} if cursor else {})})
+            assert response.status_code == 200
+            entries.extend(response.json())
+            cursor = response.headers.get("x-next-cursor")
+            if cursor is None:
+                break
+        streamed = client.get("/machines/PG-API/history", params={"stream": "true"}).json()
+
+    assert_newest_first(entries)
+    assert sorted(entry['vibration'] for entry in entries) == list(range(300))
+    assert streamed == entries
@@ -0,0 +1,101 @@
+import sqlite3
+
+from migrations import SCHEMA_VERSION, migrate
+
+# The tables of the original schema.sql that later versions build on, as
+# databases at user_version 0 have them
+BASELINE_SCHEMA = """
+CREATE TABLE machines (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    machine_id TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL CHECK(type IN ('motor', 'blade')),
+    installation_date DATE DEFAULT CURRENT_DATE,
+    manufacturer TEXT,
+    model TEXT,
+    location TEXT,
+    status TEXT DEFAULT 'operational' CHECK(status IN ('operational', 'maintenance', 'decommissioned'))
+);
+CREATE TABLE sensor_readings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    machine_id TEXT NOT NULL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    current_phase_a FLOAT,
+    current_phase_b FLOAT,
+    current_phase_c FLOAT,
+    power_consumption FLOAT,
+    power_factor FLOAT,
+    vibration FLOAT,
+    temperature FLOAT,
+    speed FLOAT,
+    torque FLOAT,
+    noise FLOAT,
+    FOREIGN KEY (machine_id) REFERENCES machines(machine_id) ON DELETE CASCADE
+);
+CREATE TABLE predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    machine_id TEXT NOT NULL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    health_status TEXT,
+    rul_hours FLOAT,
+    confidence FLOAT,
+    maintenance_required BOOLEAN,
+    FOREIGN KEY (machine_id) REFERENCES machines(machine_id) ON DELETE CASCADE
+);
+"""
+
+def schema_objects(conn: sqlite3.Connection) -> set:
+    return {tuple(row) for row in conn.execute(
+        "SELECT type, name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%' "
+        "AND tbl_name IN ('machines', 'sensor_readings', 'predictions', 'sensor_readings_rollup', 'machine_health')"
+    )}
+
+def test_version_0_database_is_migrated_to_latest(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'old.db')
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("INSERT INTO machines (machine_id, name, type) VALUES ('M1', 'Motor', 'motor')")
+    conn.execute("INSERT INTO sensor_readings (machine_id, timestamp, vibration) VALUES ('M1', '2024-01-01 00:00:00', 0.4)")
+    conn.executemany(
+        "INSERT INTO predictions (machine_id, timestamp, health_status, rul_hours) VALUES ('M1', ?, ?, ?)",
+        [('2024-01-01 00:00:00', 'Normal', 900.0), ('2024-01-02 00:00:00', 'Bearing Fault', 120.0),
+         ('2024-01-01 12:00:00', 'Normal', 800.0)],
+    )
+    conn.commit()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+
+    assert migrate(conn) == SCHEMA_VERSION == 4
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 4
+
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_sensor_readings_machine_time', 'idx_predictions_machine_time'} <= indexes
+    plan = " ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM sensor_readings WHERE machine_id = 'M1' ORDER BY timestamp DESC"
+    ))
+    assert 'idx_sensor_readings_machine_time' in plan
+
+    rollup_columns = [row[1] for row in conn.execute("PRAGMA table_info(sensor_readings_rollup)")]
+    assert rollup_columns[:4] == ['machine_id', 'resolution', 'bucket_start', 'sample_count']
+    assert 'prediction_id' in {row[1] for row in conn.execute("PRAGMA table_info(sensor_readings)")}
+
+    # Existing rows survive, and machine_health is backfilled with the newest prediction
+    assert conn.execute("SELECT vibration, prediction_id FROM sensor_readings").fetchall() == [(0.4, None)]
+    assert conn.execute("SELECT prediction_id, health_status FROM machine_health").fetchall() == [(2, 'Bearing Fault')]
+    conn.execute("INSERT INTO predictions (machine_id, timestamp, health_status) VALUES ('M1', '2024-01-03 00:00:00', 'Normal')")
+    assert conn.execute("SELECT prediction_id FROM machine_health").fetchone()[0] == 4
+
+    # Running again is a no-op
+    assert migrate(conn) == 4
+    conn.close()
+
+def test_migrated_database_matches_a_fresh_one(tmp_path):
+    old = sqlite3.connect(tmp_path / 'old.db')
+    old.executescript(BASELINE_SCHEMA)
+    migrate(old)
+    fresh = sqlite3.connect(tmp_path / 'fresh.db')
+    with open('schema.sql') as f:
+        fresh.executescript(f.read())
+    assert migrate(fresh) == 4
+
+    assert schema_objects(old) == schema_objects(fresh)
+    old.close()
+    fresh.close()
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import config
+import inference
+from model_registry import ModelRegistry, compiled_output, export_compiled
+
+@pytest.fixture(scope='module')
+def compiled_root(tmp_path_factory):
+    root = str(tmp_path_factory.mktemp('compiled_models'))
+    export_compiled('saved_models', None, compiled_output('saved_models', None, root))
+    return root
+
+def registry(compiled_root: str, model_format: str) -> ModelRegistry:
+    return ModelRegistry('missing_bundles', 'saved_models', prepare=inference.prepare_bundle,
+                         model_format=model_format, compiled_root=compiled_root)
+
+def test_auto_loads_pickles_for_large_batches(compiled_root):
+    models = registry(compiled_root, 'auto').load().get('motor')
+    assert 'engine' in models and 'classifier' not in models
+    features = np.random.default_rng(0).normal(0, 2, size=(config.COMPILED_MAX_BATCH + 1, inference.feature_count(models)))
+
+    statuses, rul, probabilities = inference.run_models(models, features)
+    assert 'classifier' in models
+    scaled = models['scaler'].transform(features)
+    np.testing.assert_array_equal(probabilities, models['classifier'].predict_proba(scaled))
+    np.testing.assert_array_equal(rul, models['regressor'].predict(scaled))
+    # Small batches stay on the compiled engine
+    small = inference.run_models(models, features[:1])
+    np.testing.assert_allclose(small[2], probabilities[:1], atol=1e-9)
+    assert list(small[0]) == list(statuses[:1])
+
+def test_compiled_format_never_loads_pickles(compiled_root):
+    models = registry(compiled_root, 'compiled').load().get('blade')
+    features = np.zeros((config.COMPILED_MAX_BATCH + 1, inference.feature_count(models)))
+
+    inference.run_models(models, features)
+    assert 'classifier' not in models
@@ -0,0 +1,35 @@
+import sqlite3
+
+import pytest
+
+from retention import run_retention
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'retention.db')
+    with open('schema.sql') as f:
+        conn.executescript(f.read())
+    conn.execute("INSERT INTO machines (machine_id, name, type) VALUES ('R-1', 'R-1', 'motor')")
+    conn.executemany(
+        "INSERT INTO sensor_readings (machine_id, timestamp, vibration) VALUES ('R-1', datetime('now', ?), ?)",
+        [('-30 days', 0.2), ('-30 days', 0.4), ('-1 hours', 0.6)],
+    )
+    conn.execute("INSERT INTO predictions (machine_id, timestamp, health_status) VALUES ('R-1', datetime('now', '-30 days'), 'Normal')")
+    conn.commit()
+    yield conn
+    conn.close()
+
+def test_zero_days_keeps_everything(conn):
+    result = run_retention(conn, 0)
+
+    assert result['readings_rolled_up'] == 0 and result['cutoff'] is None
+    assert conn.execute("SELECT COUNT(*) FROM sensor_readings").fetchone()[0] == 3
+    assert conn.execute("SELECT COUNT(*) FROM sensor_readings_rollup").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0] == 1
+
+def test_old_readings_are_rolled_up_before_deletion(conn):
+    result = run_retention(conn, 7, 'hour', prediction_days=7)
+
+    assert result['readings_rolled_up'] == 2 and result['predictions_pruned'] == 1
+    assert conn.execute("SELECT vibration FROM sensor_readings").fetchall() == [(0.6,)]
+    assert conn.execute("SELECT sample_count, round(vibration, 6) FROM sensor_readings_rollup").fetchall() == [(2, 0.3)]
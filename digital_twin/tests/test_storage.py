@@ -0,0 +1,19 @@
+from storage import ConnectionPool, insert_returning_ids
+
+def test_insert_returning_ids_follow_row_order(tmp_path):
+    db = ConnectionPool(str(tmp_path / 'ids.db'), size=2)
+    db.open()
+    with db.transaction() as conn:
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT)")
+        conn.executemany("INSERT INTO items (name) VALUES (?)", [('old',)] * 3)
+        # AUTOINCREMENT never reuses a deleted id, so the next block starts after it
+        conn.execute("DELETE FROM items WHERE id = 3")
+    with db.transaction() as conn:
+        ids = insert_returning_ids(conn, "INSERT INTO items (name) VALUES (?)", ((f'new-{n}',) for n in range(5)))
+        assert insert_returning_ids(conn, "INSERT INTO items (name) VALUES (?)", []) == []
+    with db.connection() as conn:
+        stored = dict(conn.execute("SELECT id, name FROM items WHERE name LIKE 'new-%'").fetchall())
+    db.close()
+
+    assert ids == [4, 5, 6, 7, 8]
+    assert [stored[row_id] for row_id in ids] == [f'new-{n}' for n in range(5)]
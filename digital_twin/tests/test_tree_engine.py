@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from model_registry import MACHINE_TYPES, load_pickled, pickle_paths
+import tree_engine
+from tree_engine import CompiledModels
+
+@pytest.fixture(scope='module', params=MACHINE_TYPES)
+def models(request):
+    return load_pickled(pickle_paths('saved_models', None, request.param))
+
+def sample_features(models, rows: int = 500) -> np.ndarray:
+    """Raw readings around the training distribution, some of them exactly on split thresholds"""
+    scaler = models['scaler']
+    rng = np.random.default_rng(0)
+    features = scaler.mean_ + scaler.scale_ * rng.normal(0, 2, size=(rows, scaler.n_features_in_))
+    # A row whose scaled feature equals a threshold must take the same branch as sklearn
+    tree = models['classifier'].estimators_[0, 0].tree_
+    split = tree.feature >= 0
+    for row, (feature, threshold) in enumerate(zip(tree.feature[split], tree.threshold[split])):
+        features[row, feature] = threshold * scaler.scale_[feature] + scaler.mean_[feature]
+    return features
+
+def test_compiled_models_match_sklearn(models):
+    engine = CompiledModels.from_sklearn(models)
+    features = sample_features(models)
+    scaled = models['scaler'].transform(features)
+
+    np.testing.assert_allclose(engine.scale_features(features), scaled, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(engine.predict_proba(scaled), models['classifier'].predict_proba(scaled), atol=1e-9)
+    np.testing.assert_allclose(engine.predict_rul(scaled), models['regressor'].predict(scaled), rtol=1e-9, atol=1e-9)
+    # Single rows take the same path as batches
+    np.testing.assert_allclose(engine.predict_proba(scaled[:1]), models['classifier'].predict_proba(scaled[:1]), atol=1e-9)
+
+def test_saved_engine_is_memory_mapped_and_identical(models, tmp_path):
+    engine = CompiledModels.from_sklearn(models)
+    labels = np.asarray(models['encoder'].classes_)[models['classifier'].classes_]
+    engine.save(str(tmp_path), labels)
+    loaded = CompiledModels.load(str(tmp_path))
+    scaled = models['scaler'].transform(sample_features(models))
+
+    assert list(loaded.labels) == [str(label) for label in labels]
+    assert isinstance(loaded.classifier.leaf_values, np.memmap)
+    np.testing.assert_array_equal(loaded.predict_proba(scaled), engine.predict_proba(scaled))
+    np.testing.assert_array_equal(loaded.predict_rul(scaled), engine.predict_rul(scaled))
+
+def test_descent_matches_exit_tables(models, monkeypatch):
+    tables = CompiledModels.from_sklearn(models)
+    # Deeper ensembles skip the exit tables and descend level by level
+    monkeypatch.setattr(tree_engine, 'EXIT_TABLE_MAX_DEPTH', 0)
+    descent = CompiledModels.from_sklearn(models)
+    scaled = models['scaler'].transform(sample_features(models, rows=300))
+    scaled[0, 0] = np.nan
+
+    assert tables.classifier._exit_tables is not None and descent.classifier._exit_tables is None
+    np.testing.assert_allclose(descent.predict_proba(scaled), tables.predict_proba(scaled), rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(descent.predict_rul(scaled), tables.predict_rul(scaled), rtol=1e-12)
@@ -0,0 +1,79 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from write_behind import WriteBehindBuffer
+
+def prediction(rul_hours: float):
+    return app.PredictionResponse(
+        health_status="Normal", rul_hours=rul_hours, confidence_scores={"Normal": 1.0},
+        color_code="#28a745", maintenance_required=False,
+    )
+
+def test_close_drains_buffer_and_keeps_machine_types():
+    written = []
+
+    async def write(readings, predictions, machine_type):
+        await asyncio.sleep(0.001)
+        written.append((machine_type, list(readings)))
+
+    async def run():
+        buffer = WriteBehindBuffer(write, max_rows=5, max_delay=0.05, durability='async')
+        buffer.start()
+        for index in range(40):
+            await buffer.submit([index], [index], 'motor' if index % 2 else 'blade')
+        await buffer.close()
+        with pytest.raises(RuntimeError):
+            await buffer.submit([0], [0], 'motor')
+        return buffer
+
+    buffer = asyncio.run(run())
+    assert buffer.pending_rows == 0
+    assert buffer.written_rows == 40
+    assert sorted(row for _, rows in written for row in rows) == list(range(40))
+    for machine_type, rows in written:
+        assert {'motor' if row % 2 else 'blade' for row in rows} == {machine_type}
+
+def test_store_predictions_links_each_reading_to_its_prediction():
+    with TestClient(app.app) as client:
+        for machine_id in ("WB-1", "WB-2"):
+            client.post("/machines/", json={"machine_id": machine_id, "name": machine_id, "type": "motor"})
+
+        def store(machine_id: str):
+            for batch in range(20):
+                values = [batch * 100 + index for index in range(25)]
+                readings = [app.SensorData(machine_id=machine_id, vibration=value) for value in values]
+                app.store_predictions(readings, [prediction(value) for value in values], 'motor')
+
+        def other_writer():
+            # Predictions inserted on another connection in between, with the machine_health trigger firing
+            conn = sqlite3.connect(app.config.DB_PATH, timeout=10)
+            for _ in range(200):
+                with conn:
+                    conn.execute(
+                        "INSERT INTO predictions (machine_id, health_status, rul_hours, confidence, maintenance_required) "
+                        "VALUES ('WB-1', 'Normal', -1, 1.0, 0)"
+                    )
+            conn.close()
+
+        threads = [threading.Thread(target=store, args=(machine_id,)) for machine_id in ("WB-1", "WB-2")]
+        threads.append(threading.Thread(target=other_writer))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with app.db.connection() as conn:
+            rows = conn.execute(
+                """SELECT r.machine_id, r.vibration, p.machine_id AS predicted_for, p.rul_hours
+                FROM sensor_readings r LEFT JOIN predictions p ON p.id = r.prediction_id
+                WHERE r.machine_id LIKE 'WB-%'"""
+            ).fetchall()
+    assert len(rows) == 2 * 20 * 25
+    for row in rows:
+        assert row['predicted_for'] == row['machine_id']
+        assert row['rul_hours'] == row['vibration']
@@ -0,0 +1,301 @@
+import json
+import os
+
+import numpy as np
+
+# Compiled inference backend for the gradient boosting models.
+#
+# At load time every fitted tree is padded to a perfect binary tree of the
+# ensemble's depth and flattened into contiguous per-level NumPy arrays
+# (split feature, threshold) plus a leaf value table.  A leaf that sits above
+# the bottom level becomes a split whose subtrees all carry the leaf value, so
+# padding never changes the prediction.
+#
+# Shallow ensembles (depth <= EXIT_TABLE_MAX_DEPTH, sklearn's default depth
+# of 3 included) are scored through per-feature exit tables: for each feature,
+# the splits a value exceeds are a prefix of its sorted thresholds, so the
+# leaves every tree can still exit through are tabulated per prefix, and a
+# batch costs one binary search and one table gather per feature plus a
+# single leaf-value gather per row and tree.  Deeper ensembles descend level
+# by level, all rows and trees at once, depth steps each.  Both avoid
+# sklearn's per-call input validation and per-tree Python loop, which
+# dominate single-row latency.
+#
+# The flattened arrays can be saved as .npy files and memory-mapped back
+# (CompiledModels.save / CompiledModels.load), so a server can score without
+# unpickling or even importing sklearn, and worker processes share the pages.
+
+# Padding to a perfect tree costs 2 ** depth leaves per tree
+MAX_COMPILED_DEPTH = 8
+
+# Rows evaluated per chunk; keeps the (rows, trees) working set in cache
+CHUNK_ROWS = 128
+
+# Deepest trees evaluated through exit tables: their leaf masks fit a byte
+EXIT_TABLE_MAX_DEPTH = 3
+
+def _floor_float32(threshold: np.ndarray) -> np.ndarray:
+    """Largest float32 <= threshold.
+
+    sklearn compares float32 inputs against float64 thresholds; for a float32
+    x, ``x > t`` is equivalent to ``x > floor32(t)``, so the whole comparison
+    can run in float32.
+    """
+    rounded = threshold.astype(np.float32)
+    too_high = rounded.astype(np.float64) > threshold
+    return np.where(too_high, np.nextafter(rounded, np.float32(-np.inf)), rounded)
+
+class CompiledEnsemble:
+    """Flattened gradient boosting ensemble producing raw (pre-link) scores"""
+    
+    def __init__(self, features, thresholds, leaf_values, n_outputs, learning_rate, init_raw):
+        self.features = features        # per level: (n_trees * 2 ** level,) split feature
+        self.thresholds = thresholds    # per level: (n_trees, 2 ** level) float32 threshold
+        self.leaf_values = leaf_values  # (n_trees, 2 ** depth)
+        self.depth = len(thresholds)
+        self.n_trees = leaf_values.shape[0]
+        self.n_outputs = n_outputs
+        self.learning_rate = learning_rate
+        self.init_raw = init_raw
+        # Descent helpers: each tree's first node per level, and the thresholds flattened alike
+        self._tree_offsets = [np.arange(self.n_trees) * 2 ** level for level in range(self.depth + 1)]
+        self._flat_thresholds = [level_thresholds.reshape(-1) for level_thresholds in thresholds]
+        self._exit_tables = self._build_exit_tables()
+    
+    def _build_exit_tables(self):
+        """Per-feature exit tables, or None when the trees are too deep for them.
+
+        A split that sends x right rules out every leaf of its left subtree,
+        and a row exits through the leftmost leaf no split ruled out.  Sorting
+        a feature's thresholds turns "the splits x exceeds" into a prefix, so
+        the AND of their leaf masks is tabulated per prefix length; a row then
+        needs one binary search and one table row per feature, whatever the
+        depth.  Columns are ordered by output so per-output sums are contiguous.
+        """
+        if self.depth > EXIT_TABLE_MAX_DEPTH:
+            return None
+        n_leaves = 2 ** self.depth
+        all_leaves = 2 ** n_leaves - 1
+        # Column j holds tree order[j]
+        order = np.arange(self.n_trees).reshape(-1, self.n_outputs).T.ravel()
+        column = np.empty(self.n_trees, dtype=np.intp)
+        column[order] = np.arange(self.n_trees)
+        
+        columns, features, thresholds, masks = [], [], [], []
+        for level in range(self.depth):
+            level_thresholds = np.asarray(self.thresholds[level])
+            # Padded splits (+inf) never send a row right
+            tree, position = np.nonzero(np.isfinite(level_thresholds))
+            width = 2 ** (self.depth - level)
+            left = (2 ** (width // 2) - 1) << (position * width)
+            columns.append(column[tree])
+            features.append(np.asarray(self.features[level])[tree * 2 ** level + position])
+            thresholds.append(level_thresholds[tree, position])
+            masks.append((all_leaves & ~left).astype(np.uint8))
+        columns, features, thresholds, masks = (
+            np.concatenate(arrays) if arrays else np.zeros(0) for arrays in (columns, features, thresholds, masks)
+        )
+        
+        tables = []
+        for feature in np.unique(features).astype(np.intp):
+            selected = features == feature
+            ordered, rank = np.unique(thresholds[selected], return_inverse=True)
+            # Row k: leaves still open once the splits on the k smallest thresholds fired
+            table = np.full((len(ordered) + 1, self.n_trees), all_leaves, dtype=np.uint8)
+            np.bitwise_and.at(table, (rank + 1, columns[selected].astype(np.intp)), masks[selected].astype(np.uint8))
+            tables.append((int(feature), ordered.astype(np.float32), np.bitwise_and.accumulate(table, axis=0)))
+        
+        # Leaf value for every (column, mask of open leaves): the leftmost open leaf's
+        open_masks = np.arange(1, 256)
+        first_leaf = np.zeros(256, dtype=np.intp)
+        first_leaf[1:] = np.log2(open_masks & -open_masks).astype(np.intp)
+        exit_values = np.asarray(self.leaf_values)[order][:, np.minimum(first_leaf, n_leaves - 1)]
+        return tables, np.ascontiguousarray(exit_values).ravel(), np.arange(self.n_trees) * 256, all_leaves
+    
+    @classmethod
+    def from_sklearn(cls, model):
+        # Row-major order so tree i * n_outputs + k contributes to output k
+        trees = [estimator.tree_ for estimator in model.estimators_.ravel()]
+        n_outputs = model.estimators_.shape[1]
+        depth = max(tree.max_depth for tree in trees)
+        if depth > MAX_COMPILED_DEPTH:
+            raise ValueError(f"Tree depth {depth} exceeds compiled limit of {MAX_COMPILED_DEPTH}")
+        
+        n_trees = len(trees)
+        features = [np.zeros((n_trees, 2 ** level), dtype=np.intp) for level in range(depth)]
+        # +inf sends padded splits left; both sides hold the same value anyway
+        thresholds = [np.full((n_trees, 2 ** level), np.inf) for level in range(depth)]
+        leaf_values = np.zeros((n_trees, 2 ** depth), dtype=np.float64)
+        
+        for tree_index, tree in enumerate(trees):
+            stack = [(0, 0, 0)]  # (node, level, position within level)
+            while stack:
+                node, level, position = stack.pop()
+                if tree.children_left[node] == -1:
+                    width = 2 ** (depth - level)
+                    leaf_values[tree_index, position * width:(position + 1) * width] = tree.value[node, 0, 0]
+                    continue
+                features[level][tree_index, position] = tree.feature[node]
+                thresholds[level][tree_index, position] = tree.threshold[node]
+                stack.append((tree.children_left[node], level + 1, 2 * position))
+                stack.append((tree.children_right[node], level + 1, 2 * position + 1))
+        
+        return cls(
+            features=[np.ascontiguousarray(level_features.ravel()) for level_features in features],
+            thresholds=[np.ascontiguousarray(_floor_float32(level_thresholds)) for level_thresholds in thresholds],
+            leaf_values=np.ascontiguousarray(leaf_values),
+            n_outputs=n_outputs,
+            learning_rate=float(model.learning_rate),
+            # Init estimators are fitted priors/means, so the init score is constant
+            init_raw=np.asarray(model._raw_predict_init(np.zeros((1, model.n_features_in_))), dtype=np.float64)[0],
+        )
+    
+    def save(self, directory: str, name: str) -> dict:
+        """Write the tree arrays as {name}_*.npy; returns the scalar metadata"""
+        np.save(os.path.join(directory, f'{name}_features.npy'),
+                np.concatenate(self.features) if self.features else np.zeros(0, dtype=np.intp))
+        np.save(os.path.join(directory, f'{name}_thresholds.npy'),
+                np.concatenate([level.ravel() for level in self.thresholds]) if self.thresholds
+                else np.zeros(0, dtype=np.float32))
+        np.save(os.path.join(directory, f'{name}_leaf_values.npy'), self.leaf_values)
+        return {
+            "depth": self.depth,
+            "n_outputs": self.n_outputs,
+            "learning_rate": self.learning_rate,
+            "init_raw": self.init_raw.tolist(),
+        }
+    
+    @classmethod
+    def load(cls, directory: str, name: str, meta: dict, mmap_mode: str = 'r'):
+        flat_features = np.load(os.path.join(directory, f'{name}_features.npy'), mmap_mode=mmap_mode)
+        flat_thresholds = np.load(os.path.join(directory, f'{name}_thresholds.npy'), mmap_mode=mmap_mode)
+        leaf_values = np.load(os.path.join(directory, f'{name}_leaf_values.npy'), mmap_mode=mmap_mode)
+        
+        # Levels are stored back to back; slicing a memmap keeps it a memmap
+        n_trees = leaf_values.shape[0]
+        features, thresholds, offset = [], [], 0
+        for level in range(meta['depth']):
+            width = n_trees * 2 ** level
+            features.append(flat_features[offset:offset + width])
+            thresholds.append(flat_thresholds[offset:offset + width].reshape(n_trees, 2 ** level))
+            offset += width
+        
+        return cls(
+            features=features,
+            thresholds=thresholds,
+            leaf_values=leaf_values,
+            n_outputs=meta['n_outputs'],
+            learning_rate=meta['learning_rate'],
+            init_raw=np.asarray(meta['init_raw'], dtype=np.float64),
+        )
+    
+    def _exit_sums(self, X: np.ndarray) -> np.ndarray:
+        """Per-output sums of the trees' leaf values, through the exit tables"""
+        tables, exit_values, column_offsets, all_leaves = self._exit_tables
+        exits = None
+        for feature, thresholds, table in tables:
+            values = X[:, feature]
+            fired = np.searchsorted(thresholds, values)
+            # NaN never compares greater, so it goes left at every split
+            fired[np.isnan(values)] = 0
+            if exits is None:
+                exits = table[fired]
+            else:
+                exits &= table[fired]
+        if exits is None:
+            # No splits at all: every tree is a single leaf
+            exits = np.full((X.shape[0], self.n_trees), all_leaves, dtype=np.uint8)
+        leaf_values = np.take(exit_values, exits + column_offsets)
+        return leaf_values.reshape(X.shape[0], self.n_outputs, -1).sum(axis=2)
+    
+    def _descent_sums(self, X: np.ndarray) -> np.ndarray:
+        """Per-output sums of the trees' leaf values, descending depth levels per row and tree"""
+        n_rows, n_features = X.shape
+        # Row r's value of feature f sits at r * n_features + f of the flattened input
+        row_offsets = (np.arange(n_rows) * n_features)[:, None]
+        position = np.zeros((n_rows, self.n_trees), dtype=np.intp)
+        for level in range(self.depth):
+            # Node of each (row, tree) within this level's (n_trees, 2 ** level) arrays
+            node = position + self._tree_offsets[level]
+            values = np.take(X, row_offsets + np.take(self.features[level], node))
+            position = 2 * position + (values > np.take(self._flat_thresholds[level], node))
+        leaf_values = np.take(self.leaf_values, position + self._tree_offsets[self.depth])
+        return leaf_values.reshape(n_rows, -1, self.n_outputs).sum(axis=1)
+    
+    def raw_predict(self, X: np.ndarray) -> np.ndarray:
+        # sklearn trees see float32 inputs
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        sums = self._exit_sums if self._exit_tables is not None else self._descent_sums
+        if X.shape[0] <= CHUNK_ROWS:
+            per_output = sums(X)
+        else:
+            per_output = np.concatenate([sums(X[start:start + CHUNK_ROWS]) for start in range(0, X.shape[0], CHUNK_ROWS)])
+        return self.init_raw + self.learning_rate * per_output
+
+class CompiledModels:
+    """Drop-in replacement for the scaler/classifier/regressor trio"""
+    
+    def __init__(self, n_features, mean, scale, classifier, regressor, labels=None):
+        self.n_features = n_features
+        self.mean = mean
+        self.scale = scale
+        self.classifier = classifier
+        self.regressor = regressor
+        # Decoded class names; only set when loaded from disk (sklearn models carry an encoder)
+        self.labels = labels
+    
+    @classmethod
+    def from_sklearn(cls, models: dict):
+        scaler = models['scaler']
+        return cls(
+            n_features=int(scaler.n_features_in_),
+            mean=np.asarray(scaler.mean_ if scaler.with_mean else 0.0, dtype=np.float64),
+            scale=np.asarray(scaler.scale_ if scaler.with_std else 1.0, dtype=np.float64),
+            classifier=CompiledEnsemble.from_sklearn(models['classifier']),
+            regressor=CompiledEnsemble.from_sklearn(models['regressor']),
+        )
+    
+    def save(self, directory: str, labels):
+        """Write model.json plus .npy tree arrays into directory"""
+        os.makedirs(directory, exist_ok=True)
+        meta = {
+            "format": 1,
+            "n_features": self.n_features,
+            "mean": np.broadcast_to(self.mean, self.n_features).tolist(),
+            "scale": np.broadcast_to(self.scale, self.n_features).tolist(),
+            "labels": [str(label) for label in labels],
+            "classifier": self.classifier.save(directory, 'classifier'),
+            "regressor": self.regressor.save(directory, 'regressor'),
+        }
+        with open(os.path.join(directory, 'model.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+    
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str = 'r'):
+        with open(os.path.join(directory, 'model.json')) as f:
+            meta = json.load(f)
+        return cls(
+            n_features=meta['n_features'],
+            mean=np.asarray(meta['mean'], dtype=np.float64),
+            scale=np.asarray(meta['scale'], dtype=np.float64),
+            classifier=CompiledEnsemble.load(directory, 'classifier', meta['classifier'], mmap_mode),
+            regressor=CompiledEnsemble.load(directory, 'regressor', meta['regressor'], mmap_mode),
+            labels=np.asarray(meta['labels']),
+        )
+    
+    def scale_features(self, features: np.ndarray) -> np.ndarray:
+        return (np.asarray(features, dtype=np.float64) - self.mean) / self.scale
+    
+    def predict_proba(self, scaled_features: np.ndarray) -> np.ndarray:
+        raw = self.classifier.raw_predict(scaled_features)
+        if raw.shape[1] == 1:
+            # Binary classification: sigmoid of a single score
+            positive = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        # Multiclass: softmax over per-class scores
+        raw = raw - raw.max(axis=1, keepdims=True)
+        exp = np.exp(raw)
+        return exp / exp.sum(axis=1, keepdims=True)
+    
+    def predict_rul(self, scaled_features: np.ndarray) -> np.ndarray:
+        return self.regressor.raw_predict(scaled_features)[:, 0]
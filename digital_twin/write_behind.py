@@ -0,0 +1,191 @@
+import asyncio
+import time
+
+from executors import ExecutorOverloaded
+
+# Write-behind buffer for prediction rows.
+#
+# Request handlers hand their readings and predictions to the buffer instead
+# of committing a transaction each.  A single background writer drains it
+# whenever `max_rows` rows are waiting or the oldest has waited `max_delay`
+# seconds, writing everything accumulated so far with one transaction per
+# machine type, so the stage metrics keep their per-type labels.  Rows that
+# arrive while a write is in progress join the next one, so batches grow with
+# load even with max_delay = 0, which writes as soon as the writer is free and
+# adds no latency when idle.  Each transaction inserts its predictions with a
+# single executemany (storage.insert_returning_ids).  Durability is configurable:
+#
+#   'flush'  submit() returns once the batch holding the rows has committed,
+#            and write errors reach the caller (group commit)
+#   'async'  submit() returns immediately; rows still buffered are lost if the
+#            process dies, and write errors are only logged and counted
+#
+# At most `max_pending` rows may wait; beyond that submit() raises
+# ExecutorOverloaded so the request gets a 503 instead of growing the buffer
+# without bound.  close() stops intake and drains what is left.  Only touched
+# from the event loop.
+
+class WriteBehindBuffer:
+    def __init__(self, write, max_rows: int = 1000, max_delay: float = 0.0,
+                 max_pending: int = 20000, durability: str = 'flush'):
+        # write(readings, predictions, machine_type) -> awaitable, stores the rows in one transaction
+        if durability not in ('flush', 'async'):
+            raise ValueError(f"Unknown durability mode: {durability}")
+        self.write = write
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.durability = durability
+        self._entries = []   # (readings, predictions, machine_type, future or None)
+        self._pending = 0
+        self._oldest = None  # perf_counter() of the oldest buffered entry
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._writer = None
+        self._closing = False
+
+        # Metrics
+        self.written_rows = 0
+        self.batches = 0
+        self.failed_rows = 0
+        self.rejected_rows = 0
+        self.write_seconds = 0.0
+        self.max_batch_rows = 0
+        self.started = None
+
+    def start(self):
+        if self._writer is None:
+            self._closing = False
+            self.started = time.perf_counter()
+            # Events bind to the loop that first waits on them; an app started again runs on a new one
+            self._wakeup = asyncio.Event()
+            self._full = asyncio.Event()
+            self._writer = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop accepting rows and write out everything still buffered"""
+        if self._writer is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        self._full.set()
+        await self._writer
+        self._writer = None
+
+    @property
+    def pending_rows(self) -> int:
+        return self._pending
+
+    async def submit(self, readings: list, predictions: list, machine_type: str = 'mixed'):
+        """Buffer rows of one machine type; in 'flush' mode, wait until they are committed"""
+        if self._writer is None or self._closing:
+            raise RuntimeError("Write-behind buffer is not running")
+        if self._pending + len(readings) > self.max_pending:
+            self.rejected_rows += len(readings)
+            raise ExecutorOverloaded('write_behind')
+
+        future = asyncio.get_running_loop().create_future() if self.durability == 'flush' else None
+        self._entries.append((readings, predictions, machine_type, future))
+        self._pending += len(readings)
+        if self._oldest is None:
+            self._oldest = time.perf_counter()
+        self._wakeup.set()
+        if self._pending >= self.max_rows:
+            self._full.set()
+        if future is not None:
+            await future
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Size trigger, or time trigger measured from the oldest buffered row
+            remaining = self.max_delay - (time.perf_counter() - self._oldest) if self._oldest is not None else 0
+            if not self._full.is_set() and remaining > 0:
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+            entries = self._take_batch()
+            if entries:
+                await self._write_batch(entries)
+            if self._closing and not self._entries:
+                return
+
+    def _take_batch(self) -> list:
+        """Remove up to max_rows rows (whole submissions) from the buffer"""
+        count, rows = 0, 0
+        while count < len(self._entries) and (rows < self.max_rows or count == 0):
+            rows += len(self._entries[count][0])
+            count += 1
+        entries, self._entries = self._entries[:count], self._entries[count:]
+        self._pending -= rows
+        if not self._entries:
+            # Leftovers keep the old timestamp and events so they go out next
+            self._oldest = None
+            self._wakeup.clear()
+            self._full.clear()
+        return entries
+
+    async def _write_batch(self, entries: list):
+        groups = {}
+        for entry in entries:
+            groups.setdefault(entry[2], []).append(entry)
+        for machine_type, group in groups.items():
+            await self._write_group(machine_type, group)
+
+    async def _write_group(self, machine_type: str, entries: list):
+        readings = [reading for entry in entries for reading in entry[0]]
+        predictions = [prediction for entry in entries for prediction in entry[1]]
+        started = time.perf_counter()
+        try:
+            await self.write(readings, predictions, machine_type)
+        except Exception as e:
+            if len(entries) == 1:
+                self._fail(entries[0], e)
+                return
+            # Retry each submission on its own so one bad request can't fail the rest
+            for entry in entries:
+                try:
+                    await self.write(entry[0], entry[1], machine_type)
+                except Exception as entry_error:
+                    self._fail(entry, entry_error)
+                else:
+                    self._done(entry)
+            return
+        finally:
+            self.write_seconds += time.perf_counter() - started
+            self.batches += 1
+            self.max_batch_rows = max(self.max_batch_rows, len(readings))
+        for entry in entries:
+            self._done(entry)
+
+    def _done(self, entry):
+        self.written_rows += len(entry[0])
+        future = entry[3]
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    def _fail(self, entry, error: Exception):
+        self.failed_rows += len(entry[0])
+        future = entry[3]
+        if future is None:
+            print(f"❌ Write-behind flush failed, {len(entry[0])} rows lost: {error}")
+        elif not future.done():
+            future.set_exception(error)
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self.started if self.started is not None else 0.0
+        return {
+            "durability": self.durability,
+            "pending_rows": self._pending,
+            "written_rows": self.written_rows,
+            "batches": self.batches,
+            "mean_batch_rows": self.written_rows / self.batches if self.batches else 0.0,
+            "max_batch_rows": self.max_batch_rows,
+            "failed_rows": self.failed_rows,
+            "rejected_rows": self.rejected_rows,
+            # Rows per second of write time (capacity), and over the buffer's lifetime (achieved)
+            "insert_rows_per_second": self.written_rows / self.write_seconds if self.write_seconds else 0.0,
+            "achieved_rows_per_second": self.written_rows / elapsed if elapsed else 0.0,
+        }